@@ -8,6 +8,9 @@
 KdbIndex *kdb_index_new(const char *col_name);
 
 
+KdbIndex *kdb_index_new_kind(const char *col_name, uint8_t kind);
+
+
 void kdb_index_free(KdbIndex *idx);
 
 
@@ -19,12 +22,26 @@ KdbStatus kdb_index_insert(KdbIndex       *idx,
                            uint64_t         file_offset);
 
 
-KdbStatus kdb_index_remove(KdbIndex *idx, uint64_t record_id);
+KdbStatus kdb_index_insert_batch(KdbIndex        *idx,
+                                 const KdbRecord *records,
+                                 size_t           count,
+                                 const uint64_t  *file_offsets);
+
+
+KdbStatus kdb_index_reserve(KdbIndex *idx, size_t count);
+
+
+KdbStatus kdb_index_remove(KdbIndex       *idx,
+                           const KdbValue *value,
+                           uint64_t        record_id);
 
 
 KdbStatus kdb_index_rebuild(KdbIndex *idx, KdbTable *tbl);
 
 
+KdbStatus kdb_index_rebuild_all(KdbIndex **indices, uint32_t count, KdbTable *tbl);
+
+
 KdbStatus kdb_index_lookup(const KdbIndex *idx,
                            const KdbValue *value,
                            uint64_t       *file_offsets_out,
@@ -32,6 +49,12 @@ KdbStatus kdb_index_lookup(const KdbIndex *idx,
                            size_t         *count_out);
 
 
+KdbStatus kdb_index_candidates(const KdbIndex *idx,
+                               const KdbValue *value,
+                               uint64_t      **file_offsets_out,
+                               size_t         *count_out);
+
+
 uint64_t kdb_index_lookup_one(const KdbIndex *idx, const KdbValue *value);
 
 
@@ -46,6 +69,12 @@ KdbIndex *kdb_index_find(KdbIndex **indices,
                          const char *col_name);
 
 
+KdbIndex *kdb_index_find_kind(KdbIndex  **indices,
+                              uint32_t    count,
+                              const char *col_name,
+                              uint8_t     kind);
+
+
 uint32_t kdb_index_hash(const KdbValue *v);
 
 
@@ -9,7 +9,7 @@
 
 #define KDB_MAGIC              0x4B554D44  
 #define KDB_VERSION_MAJOR      1
-#define KDB_VERSION_MINOR      0
+#define KDB_VERSION_MINOR      1
 #define KDB_VERSION_PATCH      0
 
 
@@ -22,6 +22,14 @@
 #define KDB_MAX_BATCH_SIZE     65536
 #define KDB_PAGE_SIZE          4096
 #define KDB_INDEX_BUCKETS      1024
+#define KDB_INDEX_HASH         0x01
+#define KDB_INDEX_TRIGRAM      0x02
+#define KDB_TRIGRAM_MIN_LEN    3
+#define KDB_INDEX_SLAB_MIN     256
+#define KDB_SCAN_BLOCK_SIZE    (1 << 20)
+#define KDB_COUNT_CACHE_SLOTS  8
+#define KDB_COUNT_CACHE_KEY    512
+#define KDB_TEXT_CANDIDATE_MUL 10
 
 
 typedef enum {
@@ -93,7 +101,8 @@ typedef struct {
     uint64_t  updated_at;
     uint32_t  field_count;
     uint8_t   deleted;       
-    uint8_t   _pad[3];
+    uint8_t   _pad;
+    uint16_t  field_capacity;
     KdbRecordField *fields;        
 } KdbRecord;
 
@@ -129,6 +138,26 @@ typedef struct {
 } KdbQuery;
 
 
+typedef struct {
+    const KdbQuery *query;
+    uint32_t        slots[KDB_MAX_FILTER_KEYS];
+    uint8_t         name_lens[KDB_MAX_FILTER_KEYS];
+    uint8_t         literals[KDB_MAX_FILTER_KEYS];
+    uint32_t        literal_count;
+    uint8_t         builtin_id[KDB_MAX_FILTER_KEYS];
+    uint8_t         ranged[KDB_MAX_FILTER_KEYS];
+    int64_t         range_lo[KDB_MAX_FILTER_KEYS];
+    int64_t         range_hi[KDB_MAX_FILTER_KEYS];
+} KdbPredicate;
+
+
+typedef struct {
+    const char *name;
+    uint32_t    name_len;
+    KdbValue    value;
+} KdbFieldView;
+
+
 typedef struct {
     KdbRecord *rows;       
     size_t     count;
@@ -139,15 +168,39 @@ typedef struct {
 typedef struct KdbIndexNode {
     uint64_t            record_id;
     uint64_t            file_offset;    
+    uint32_t            hash;
     struct KdbIndexNode *next;           
 } KdbIndexNode;
 
 typedef struct {
     char          col_name[KDB_MAX_NAME_LEN];
+    uint8_t       kind;
+    uint8_t       _pad[7];
     KdbIndexNode *buckets[KDB_INDEX_BUCKETS];
+    KdbIndexNode *free_nodes;
+    size_t        free_count;
+    struct KdbIndexSlab *slabs;
 } KdbIndex;
 
 
+typedef struct {
+    uint64_t id;
+    uint64_t offset;
+} KdbIdSlot;
+
+
+typedef struct {
+    uint64_t version;
+    uint64_t mutations;
+    uint64_t data_end;
+    uint64_t last_used;
+    uint64_t count;
+    uint32_t key_len;
+    uint8_t  valid;
+    char     key[KDB_COUNT_CACHE_KEY];
+} KdbCountCacheEntry;
+
+
 typedef struct {
     char           name[KDB_MAX_NAME_LEN];
     char           path[4096];
@@ -157,8 +210,24 @@ typedef struct {
     uint32_t       index_count;
     uint8_t        dirty;           
     uint8_t        read_only;
-    uint8_t        _pad[6];
+    uint8_t        schema_dirty;
+    uint8_t        defer_header;
+    uint8_t        _pad[4];
     int            lock_fd;         
+    uint8_t       *scan_buf;
+    uint64_t       version;
+    uint64_t       mutations;
+    uint64_t       disk_ino;
+    uint64_t       disk_size;
+    uint64_t       disk_mtime_ns;
+    uint64_t       data_end;
+    KdbCountCacheEntry count_cache[KDB_COUNT_CACHE_SLOTS];
+    uint64_t       count_cache_tick;
+    KdbIdSlot     *id_map;
+    size_t         id_map_count;
+    size_t         id_map_capacity;
+    uint64_t       id_map_version;
+    uint8_t        id_map_sorted;
 } KdbTable;
 
 
@@ -167,7 +236,8 @@ typedef struct {
     KdbTable *tables[KDB_MAX_TABLES];
     uint32_t  table_count;
     uint8_t   read_only;
-    uint8_t   _pad[7];
+    uint8_t   in_memory;
+    uint8_t   _pad[6];
 } KumDB;
 
 
@@ -190,9 +260,15 @@ typedef enum {
 
 
 #define KDB_RECORD_FIXED_SIZE  (8 + 8 + 8 + 4 + 1 + 3)   
+#define KDB_RECORD_DELETED_AT  (8 + 8 + 8 + 4)
 #define KDB_FIELD_HEADER_SIZE  (KDB_MAX_NAME_LEN + 1 + 7) 
 
 
+#define KDB_RECORD_FORMAT_LEGACY   0
+#define KDB_RECORD_FORMAT_COMPACT  1
+#define KDB_MAX_RECORD_SIZE    (KDB_MAX_COLUMNS * (KDB_FIELD_HEADER_SIZE + KDB_MAX_STRING_LEN) + KDB_RECORD_FIXED_SIZE)
+
+
 #define KDB_UNUSED(x)       ((void)(x))
 #define KDB_ARRAY_LEN(a)    (sizeof(a) / sizeof((a)[0]))
 #define KDB_MIN(a, b)       ((a) < (b) ? (a) : (b))
@@ -39,9 +39,11 @@ typedef struct {
 } KdbRows;
 
 typedef KdbStatus (*KdbValidator)(const KdbRow *row, void *user_data);
+typedef int       (*KdbRowCallback)(const KdbRow *row, void *user_data);
 
 KumDB *kdb_open         (const char *data_dir);
 KumDB *kdb_open_readonly(const char *data_dir);
+KumDB *kdb_open_memory  (void);
 void   kdb_close        (KumDB *db);
 
 KdbStatus kdb_add(KumDB *db, const char *table_name, const KdbField *fields);
@@ -58,11 +60,29 @@ KdbStatus kdb_batch_import(KumDB           *db,
                            size_t           count,
                            size_t          *inserted_out);
 
+KdbStatus kdb_batch_import_validated(KumDB           *db,
+                                     const char      *table_name,
+                                     const KdbField **rows,
+                                     size_t           count,
+                                     KdbValidator     validator,
+                                     void            *user_data,
+                                     size_t          *inserted_out);
+
 KdbRows *kdb_find      (KumDB *db, const char *table_name, const char **filters);
+KdbRows *kdb_find_page (KumDB *db, const char *table_name, const char **filters,
+                        size_t offset, size_t limit);
 KdbRow  *kdb_find_one  (KumDB *db, const char *table_name, const char **filters);
 KdbRow  *kdb_find_by_id(KumDB *db, const char *table_name, uint64_t id);
+KdbRows *kdb_find_text (KumDB *db, const char *table_name, const char *col_name,
+                        const char *needle, size_t limit);
 int64_t  kdb_count     (KumDB *db, const char *table_name, const char **filters);
 
+KdbStatus kdb_foreach(KumDB          *db,
+                      const char     *table_name,
+                      const char    **filters,
+                      KdbRowCallback  callback,
+                      void           *user_data);
+
 KdbStatus kdb_update(KumDB          *db,
                      const char     *table_name,
                      const char    **where_filters,
@@ -74,8 +94,12 @@ KdbStatus kdb_delete(KumDB      *db,
                      const char **filters,
                      size_t     *deleted_out);
 
+KdbStatus kdb_create_index(KumDB *db, const char *table_name, const char *col_name);
+KdbStatus kdb_create_text_index(KumDB *db, const char *table_name, const char *col_name);
+
 KdbStatus kdb_drop_table  (KumDB *db, const char *table_name);
 KdbStatus kdb_compact     (KumDB *db, const char *table_name);
+KdbStatus kdb_backup      (KumDB *db, const char *dest_dir);
 int       kdb_table_exists(KumDB *db, const char *table_name);
 
 KdbStatus kdb_list_tables(KumDB      *db,
@@ -92,6 +116,7 @@ KdbStatus kdb_row_get_int   (const KdbRow *row, const char *col, int64_t    *out
 KdbStatus kdb_row_get_float (const KdbRow *row, const char *col, double     *out);
 KdbStatus kdb_row_get_bool  (const KdbRow *row, const char *col, int        *out);
 KdbStatus kdb_row_get_string(const KdbRow *row, const char *col, const char **out);
+KdbStatus kdb_row_get_blob  (const KdbRow *row, const char *col, const void **data, size_t *len);
 
 const char *kdb_last_error (void);
 KdbStatus   kdb_last_status(void);
@@ -107,6 +132,7 @@ static inline KdbField kdb_field_float (const char *n, double      v) { KdbField
 static inline KdbField kdb_field_bool  (const char *n, int         v) { KdbField f = {n, KDB_TYPE_BOOL,   .v.as_bool   = v}; return f; }
 static inline KdbField kdb_field_string(const char *n, const char *v) { KdbField f = {n, KDB_TYPE_STRING, .v.as_string = v}; return f; }
 static inline KdbField kdb_field_null  (const char *n)                { KdbField f = {n, KDB_TYPE_NULL,   {0}           }; return f; }
+static inline KdbField kdb_field_blob  (const char *n, const void *d, size_t len) { KdbField f = {n, KDB_TYPE_BLOB, .v.as_blob = {d, len}}; return f; }
 static inline KdbField kdb_field_end   (void)                         { KdbField f = {NULL, KDB_TYPE_NULL, {0}           }; return f; }
 
 #ifdef __cplusplus
@@ -5,15 +5,25 @@
 
 typedef struct {
     int  fd;                    
+    int  keep_open;
     char path[4096];            
 } KdbLock;
 
 KdbStatus kdb_lock_acquire(KdbLock *lock, const char *table_path, int wait);
 
+KdbStatus kdb_lock_acquire_cached(KdbLock    *lock,
+                                  int        *fd_cache,
+                                  const char *table_path,
+                                  int         wait);
+
 void kdb_lock_release(KdbLock *lock);
 
 int kdb_lock_is_held(const KdbLock *lock);
 
+void kdb_temp_path(const char *dest_path, char *out_buf, size_t out_size);
+
+void kdb_fsync_parent_dir(const char *path);
+
 KdbStatus kdb_atomic_write(const char    *dest_path,
                            const uint8_t *data,
                            size_t         len);
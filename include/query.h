@@ -13,6 +13,19 @@ KdbStatus kdb_query_add_filter(KdbQuery   *q,
                                const char *raw_value,
                                const char *raw_value2);
 
+KdbStatus kdb_query_add_filter_typed(KdbQuery   *q,
+                                     const char *key,
+                                     const char *raw_value,
+                                     const char *raw_value2,
+                                     KdbType     col_type);
+
+KdbStatus kdb_query_add_filter_op(KdbQuery    *q,
+                                  const char  *col_name,
+                                  KdbOperator  op,
+                                  const char  *raw_value,
+                                  const char  *raw_value2,
+                                  KdbType      col_type);
+
 KdbStatus kdb_query_add_filter_value(KdbQuery       *q,
                                      const char     *col_name,
                                      KdbOperator     op,
@@ -25,6 +38,17 @@ int kdb_query_is_empty(const KdbQuery *q);
 
 int kdb_query_matches(const KdbQuery *q, const KdbRecord *r);
 
+void kdb_predicate_init(KdbPredicate *p, const KdbQuery *q, const KdbTable *tbl);
+
+int kdb_predicate_matches(KdbPredicate *p, const KdbRecord *r);
+
+int kdb_predicate_may_match_raw(const KdbPredicate *p, const uint8_t *body, size_t size);
+
+int kdb_predicate_matches_view(KdbPredicate       *p,
+                               uint64_t            id,
+                               const KdbFieldView *fields,
+                               uint32_t            count);
+
 KdbStatus kdb_result_init(KdbResult *res, size_t initial_capacity);
 
 KdbStatus kdb_result_append(KdbResult *res, const KdbRecord *r);
@@ -41,6 +65,19 @@ void kdb_result_offset(KdbResult *res, size_t offset);
 
 void kdb_result_print(const KdbResult *res, FILE *fp);
 
+KdbStatus kdb_query_each(KdbTable       *tbl,
+                         const KdbQuery *q,
+                         KdbScanCallback callback,
+                         void           *user_data);
+
+KdbStatus kdb_query_each_candidate(KdbTable             *tbl,
+                                   const KdbQuery       *q,
+                                   KdbScanOffsetCallback callback,
+                                   void                 *user_data,
+                                   int                  *handled);
+
+int kdb_query_may_match(KdbTable *tbl, const KdbQuery *q);
+
 KdbStatus kdb_query_execute(KdbTable        *tbl,
                             const KdbQuery  *q,
                             KdbResult       *res_out);
@@ -53,6 +90,18 @@ KdbStatus kdb_query_count(KdbTable       *tbl,
                           const KdbQuery *q,
                           size_t         *count_out);
 
+KdbStatus kdb_query_count_from(KdbTable       *tbl,
+                               const KdbQuery *q,
+                               uint64_t        start,
+                               size_t         *count_out);
+
+KdbStatus kdb_query_text(KdbTable   *tbl,
+                         const char *col_name,
+                         const char *needle,
+                         size_t      limit,
+                         size_t      max_candidates,
+                         KdbResult  *res_out);
+
 void kdb_query_print(const KdbQuery *q, FILE *fp);
 
 #endif 
\ No newline at end of file
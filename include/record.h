@@ -21,6 +21,10 @@ KdbStatus kdb_record_set_field(KdbRecord  *r,
                                const char *col_name,
                                const KdbValue *value);
 
+KdbStatus kdb_record_take_field(KdbRecord  *r,
+                                const char *col_name,
+                                KdbValue   *value);
+
 
 KdbStatus kdb_record_set_int   (KdbRecord *r, const char *col, int64_t  v);
 KdbStatus kdb_record_set_float (KdbRecord *r, const char *col, double   v);
@@ -37,6 +41,11 @@ KdbStatus kdb_record_update_field(KdbRecord      *r,
 const KdbRecordField *kdb_record_get_field(const KdbRecord *r, const char *col_name);
 
 
+void kdb_record_order_fields(KdbRecord       *r,
+                             const KdbColumn *columns,
+                             uint32_t         column_count);
+
+
 KdbStatus kdb_record_get_int   (const KdbRecord *r, const char *col, int64_t  *out);
 KdbStatus kdb_record_get_float (const KdbRecord *r, const char *col, double   *out);
 KdbStatus kdb_record_get_bool  (const KdbRecord *r, const char *col, uint8_t  *out);
@@ -59,6 +68,25 @@ KdbRecord *kdb_record_deserialize(const uint8_t *buf,
                                   size_t         buf_size,
                                   size_t        *bytes_read);
 
+KdbStatus kdb_record_peek_header(const uint8_t *buf,
+                                 size_t         buf_size,
+                                 uint64_t      *id_out,
+                                 uint8_t       *deleted_out,
+                                 uint8_t       *format_out);
+
+
+int kdb_record_view_fields(const uint8_t *buf,
+                           size_t         buf_size,
+                           KdbFieldView  *fields_out,
+                           uint32_t       max_fields);
+
+
+void kdb_record_borrow_view(const uint8_t      *buf,
+                            const KdbFieldView *fields,
+                            uint32_t            count,
+                            KdbRecordField     *slots,
+                            KdbRecord          *r_out);
+
 
 KdbStatus kdb_record_write(const KdbRecord *r, FILE *fp);
 
@@ -16,13 +16,17 @@ KdbStatus kdb_storage_open(KdbTable   *tbl,
 
 KdbStatus kdb_storage_flush_header(KdbTable *tbl);
 
+KdbStatus kdb_storage_sync_header(KdbTable *tbl);
+
+KdbStatus kdb_storage_refresh(KdbTable *tbl, int *changed_out);
+
 void kdb_storage_close(KdbTable *tbl);
 
 KdbStatus kdb_storage_drop(const char *data_dir, const char *table_name);
 
 int kdb_storage_exists(const char *data_dir, const char *table_name);
 
-KdbStatus kdb_storage_append(KdbTable *tbl, KdbRecord *r);
+KdbStatus kdb_storage_append(KdbTable *tbl, KdbRecord *r, uint64_t *offset_out);
 
 KdbRecord *kdb_storage_read_at(KdbTable *tbl, uint64_t file_offset);
 
@@ -32,6 +36,30 @@ KdbStatus kdb_storage_scan(KdbTable      *tbl,
                            KdbScanCallback callback,
                            void           *user_data);
 
+typedef int (*KdbScanOffsetCallback)(const KdbRecord *r,
+                                     uint64_t         file_offset,
+                                     void            *user_data);
+
+KdbStatus kdb_storage_scan_offsets(KdbTable             *tbl,
+                                   KdbScanOffsetCallback callback,
+                                   void                 *user_data);
+
+typedef int (*KdbScanRawCallback)(const uint8_t *body,
+                                  uint32_t       size,
+                                  uint64_t       file_offset,
+                                  void          *user_data);
+
+KdbStatus kdb_storage_scan_raw(KdbTable          *tbl,
+                               KdbScanRawCallback callback,
+                               void              *user_data);
+
+KdbStatus kdb_storage_scan_raw_from(KdbTable          *tbl,
+                                    uint64_t           start,
+                                    KdbScanRawCallback callback,
+                                    void              *user_data);
+
+KdbStatus kdb_storage_data_end(KdbTable *tbl, uint64_t *end_out);
+
 typedef int (*KdbTransformFn)(KdbRecord *r, void *user_data);
 
 KdbStatus kdb_storage_rewrite(KdbTable      *tbl,
@@ -40,9 +68,18 @@ KdbStatus kdb_storage_rewrite(KdbTable      *tbl,
 
 KdbStatus kdb_storage_compact(KdbTable *tbl);
 
+KdbStatus kdb_storage_backup(KdbTable *tbl, const char *dest_path);
+
+KdbStatus kdb_storage_offset_of(KdbTable *tbl, uint64_t id, uint64_t *offset_out);
+
+KdbStatus kdb_storage_tombstone(KdbTable       *tbl,
+                                const uint64_t *offsets,
+                                size_t          count);
+
 KdbStatus kdb_storage_append_batch(KdbTable        *tbl,
                                    KdbRecord       *records,
-                                   size_t           count);
+                                   size_t           count,
+                                   uint64_t        *offsets_out);
 
 void kdb_storage_path(const char *data_dir,
                       const char *table_name,
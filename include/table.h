@@ -16,6 +16,8 @@ KdbStatus kdb_table_open(KdbTable   *tbl,
 
 void kdb_table_close(KdbTable *tbl);
 
+KdbStatus kdb_table_refresh(KdbTable *tbl);
+
 KdbStatus kdb_table_drop(KdbTable   *tbl,
                          const char *data_dir,
                          const char *table_name);
@@ -28,6 +30,15 @@ KdbStatus kdb_table_add_column(KdbTable       *tbl,
                                uint8_t         nullable,
                                uint8_t         indexed);
 
+KdbStatus kdb_table_create_index(KdbTable   *tbl,
+                                 const char *col_name,
+                                 uint8_t     persist);
+
+KdbStatus kdb_table_create_index_kind(KdbTable   *tbl,
+                                      const char *col_name,
+                                      uint8_t     kind,
+                                      uint8_t     persist);
+
 KdbStatus kdb_table_drop_column(KdbTable   *tbl,
                                 const char *col_name);
 
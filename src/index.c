@@ -8,69 +8,147 @@
 #include "../include/types.h"
 
 
-uint32_t kdb_index_hash(const KdbValue *v) {
-    if (!v) return 0;
+static uint64_t kdb__mix64(uint64_t h) {
+    h ^= h >> 33;
+    h *= 0xff51afd7ed558ccdull;
+    h ^= h >> 33;
+    h *= 0xc4ceb9fe1a85ec53ull;
+    h ^= h >> 33;
+    return h;
+}
+
+static uint64_t kdb__hash_bytes(const uint8_t *p, size_t len, uint64_t h) {
+    h ^= (uint64_t)len * 0x9e3779b97f4a7c15ull;
+    for (; len >= 8; p += 8, len -= 8) {
+        uint64_t w;
+        memcpy(&w, p, 8);
+        h  = (h ^ w) * 0xbf58476d1ce4e5b9ull;
+        h ^= h >> 31;
+    }
+    if (len > 0) {
+        uint64_t w = 0;
+        memcpy(&w, p, len);
+        h  = (h ^ w) * 0xbf58476d1ce4e5b9ull;
+        h ^= h >> 31;
+    }
+    return h;
+}
 
-    uint32_t hash = 2166136261u; 
-#define FNV_MIX(byte) hash ^= (uint8_t)(byte); hash *= 16777619u
+static uint32_t kdb__value_hash(const KdbValue *v) {
+    if (!v) return 0;
 
+    
+    KdbType  tag = v->type == KDB_TYPE_INT ? KDB_TYPE_FLOAT : v->type;
+    uint64_t h   = 0x243f6a8885a308d3ull + (uint64_t)tag;
     switch (v->type) {
-        case KDB_TYPE_INT: {
-            uint64_t n = (uint64_t)v->v.as_int;
-            for (int i = 0; i < 8; i++) { FNV_MIX(n); n >>= 8; }
-            break;
-        }
+        case KDB_TYPE_INT:
         case KDB_TYPE_FLOAT: {
+            
+            double   d = v->type == KDB_TYPE_INT ? (double)v->v.as_int : v->v.as_float;
             uint64_t bits;
-            memcpy(&bits, &v->v.as_float, 8);
-            for (int i = 0; i < 8; i++) { FNV_MIX(bits); bits >>= 8; }
+            if (d == 0.0) d = 0.0;
+            memcpy(&bits, &d, 8);
+            h ^= bits;
             break;
         }
         case KDB_TYPE_BOOL:
-            FNV_MIX(v->v.as_bool);
+            h ^= v->v.as_bool;
             break;
         case KDB_TYPE_STRING:
-            if (v->v.as_string.data) {
-                const char *p = v->v.as_string.data;
-                while (*p) { FNV_MIX(*p); p++; }
-            }
+            if (v->v.as_string.data)
+                h = kdb__hash_bytes((const uint8_t *)v->v.as_string.data, v->v.as_string.len, h);
             break;
         case KDB_TYPE_BLOB:
-            if (v->v.as_blob.data) {
-                const uint8_t *p = v->v.as_blob.data;
-                for (size_t i = 0; i < v->v.as_blob.len; i++) { FNV_MIX(p[i]); }
-            }
+            if (v->v.as_blob.data)
+                h = kdb__hash_bytes(v->v.as_blob.data, v->v.as_blob.len, h);
             break;
         case KDB_TYPE_NULL:
         default:
-            FNV_MIX(0xff);
             break;
     }
-#undef FNV_MIX
+    return (uint32_t)kdb__mix64(h);
+}
+
+uint32_t kdb_index_hash(const KdbValue *v) {
+    return kdb__value_hash(v) % KDB_INDEX_BUCKETS;
+}
+
+
+struct KdbIndexSlab {
+    struct KdbIndexSlab *next;
+    KdbIndexNode         nodes[];
+};
+
+KdbStatus kdb_index_reserve(KdbIndex *idx, size_t count) {
+    if (!idx) {
+        kdb_err_null_arg("idx", "kdb_index_reserve");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (idx->free_count >= count) return KDB_OK;
+
+    size_t n = KDB_MAX(count - idx->free_count, (size_t)KDB_INDEX_SLAB_MIN);
+    struct KdbIndexSlab *slab = malloc(sizeof(*slab) + n * sizeof(KdbIndexNode));
+    if (!slab) { kdb_err_oom("KdbIndexNode slab"); return KDB_ERR_OOM; }
+    slab->next = idx->slabs;
+    idx->slabs = slab;
+
+    for (size_t i = n; i-- > 0; ) {
+        slab->nodes[i].next = idx->free_nodes;
+        idx->free_nodes     = &slab->nodes[i];
+    }
+    idx->free_count += n;
+    return KDB_OK;
+}
 
-    return hash % KDB_INDEX_BUCKETS;
+static KdbIndexNode *kdb__node_alloc(KdbIndex *idx) {
+    if (!idx->free_nodes && kdb_index_reserve(idx, 1) != KDB_OK) return NULL;
+    KdbIndexNode *node = idx->free_nodes;
+    idx->free_nodes    = node->next;
+    idx->free_count--;
+    memset(node, 0, sizeof(*node));
+    return node;
+}
+
+static void kdb__node_release(KdbIndex *idx, KdbIndexNode *node) {
+    node->next      = idx->free_nodes;
+    idx->free_nodes = node;
+    idx->free_count++;
+}
+
+static void kdb__index_clear(KdbIndex *idx) {
+    for (uint32_t i = 0; i < KDB_INDEX_BUCKETS; i++) {
+        KdbIndexNode *node = idx->buckets[i];
+        while (node) {
+            KdbIndexNode *next = node->next;
+            kdb__node_release(idx, node);
+            node = next;
+        }
+        idx->buckets[i] = NULL;
+    }
 }
 
 
 KdbIndex *kdb_index_new(const char *col_name) {
+    return kdb_index_new_kind(col_name, KDB_INDEX_HASH);
+}
+
+KdbIndex *kdb_index_new_kind(const char *col_name, uint8_t kind) {
     KdbIndex *idx = (KdbIndex *)calloc(1, sizeof(KdbIndex));
     if (!idx) { kdb_err_oom("KdbIndex"); return NULL; }
     if (col_name)
         KDB_STRLCPY(idx->col_name, col_name, KDB_MAX_NAME_LEN);
+    idx->kind = kind;
     
     return idx;
 }
 
 void kdb_index_free(KdbIndex *idx) {
     if (!idx) return;
-    for (uint32_t i = 0; i < KDB_INDEX_BUCKETS; i++) {
-        KdbIndexNode *node = idx->buckets[i];
-        while (node) {
-            KdbIndexNode *next = node->next;
-            free(node);
-            node = next;
-        }
-        idx->buckets[i] = NULL;
+    struct KdbIndexSlab *slab = idx->slabs;
+    while (slab) {
+        struct KdbIndexSlab *next = slab->next;
+        free(slab);
+        slab = next;
     }
     free(idx);
 }
@@ -83,6 +161,114 @@ void kdb_index_free_array(KdbIndex **indices, uint32_t count) {
 }
 
 
+static uint32_t kdb__gram_bucket(uint32_t gram) {
+    return ((gram * 2654435761u) >> 16) % KDB_INDEX_BUCKETS;
+}
+
+
+static uint32_t *kdb__trigrams(const char *text,
+                               size_t      len,
+                               uint32_t   *stack_buf,
+                               size_t      stack_cap,
+                               size_t     *count_out) {
+    *count_out = 0;
+    if (!text || len < KDB_TRIGRAM_MIN_LEN) return stack_buf;
+
+    size_t    n     = len - KDB_TRIGRAM_MIN_LEN + 1;
+    uint32_t *grams = stack_buf;
+    if (n > stack_cap) {
+        grams = (uint32_t *)malloc(n * sizeof(uint32_t));
+        if (!grams) { kdb_err_oom("trigram buffer"); return NULL; }
+    }
+
+    
+    uint32_t  seen_buf[512];
+    unsigned  seen_bits = 6;
+    while (((size_t)1 << seen_bits) < n * 2) seen_bits++;
+    size_t    seen_cap = (size_t)1 << seen_bits;
+    uint32_t *seen = seen_buf;
+    if (seen_cap > KDB_ARRAY_LEN(seen_buf)) {
+        seen = (uint32_t *)malloc(seen_cap * sizeof(uint32_t));
+        if (!seen) {
+            if (grams != stack_buf) free(grams);
+            kdb_err_oom("trigram set");
+            return NULL;
+        }
+    }
+    memset(seen, 0, seen_cap * sizeof(uint32_t));
+
+    const uint8_t *p      = (const uint8_t *)text;
+    size_t         unique = 0;
+    for (size_t i = 0; i < n; i++) {
+        uint32_t gram = ((uint32_t)p[i] << 16) | ((uint32_t)p[i + 1] << 8) | p[i + 2];
+        size_t   slot = (gram * 2654435761u) >> (32 - seen_bits);
+        while (seen[slot] && seen[slot] != gram + 1)
+            slot = (slot + 1) & (seen_cap - 1);
+        if (seen[slot]) continue;
+        seen[slot]      = gram + 1;
+        grams[unique++] = gram;
+    }
+    if (seen != seen_buf) free(seen);
+    *count_out = unique;
+    return grams;
+}
+
+static KdbStatus kdb__trigram_insert(KdbIndex       *idx,
+                                     const KdbValue *value,
+                                     uint64_t        record_id,
+                                     uint64_t        file_offset) {
+    if (value->type != KDB_TYPE_STRING) return KDB_OK;
+
+    uint32_t  stack_buf[256];
+    size_t    count = 0;
+    uint32_t *grams = kdb__trigrams(value->v.as_string.data, value->v.as_string.len,
+                                    stack_buf, KDB_ARRAY_LEN(stack_buf), &count);
+    if (!grams) return KDB_ERR_OOM;
+
+    KdbStatus st = kdb_index_reserve(idx, count);
+    for (size_t i = 0; st == KDB_OK && i < count; i++) {
+        KdbIndexNode *node = kdb__node_alloc(idx);
+        uint32_t bucket   = kdb__gram_bucket(grams[i]);
+        node->record_id   = record_id;
+        node->file_offset = file_offset;
+        node->hash        = grams[i];
+        node->next        = idx->buckets[bucket];
+        idx->buckets[bucket] = node;
+    }
+    if (grams != stack_buf) free(grams);
+    return st;
+}
+
+static size_t kdb__trigram_remove(KdbIndex       *idx,
+                                  const KdbValue *value,
+                                  uint64_t        record_id) {
+    if (value->type != KDB_TYPE_STRING) return 0;
+
+    uint32_t  stack_buf[256];
+    size_t    count = 0;
+    uint32_t *grams = kdb__trigrams(value->v.as_string.data, value->v.as_string.len,
+                                    stack_buf, KDB_ARRAY_LEN(stack_buf), &count);
+    if (!grams) return 0;
+
+    size_t removed = 0;
+    for (size_t i = 0; i < count; i++) {
+        KdbIndexNode **pp = &idx->buckets[kdb__gram_bucket(grams[i])];
+        while (*pp) {
+            if ((*pp)->hash == grams[i] && (*pp)->record_id == record_id) {
+                KdbIndexNode *to_free = *pp;
+                *pp = to_free->next;
+                kdb__node_release(idx, to_free);
+                removed++;
+                break;
+            }
+            pp = &(*pp)->next;
+        }
+    }
+    if (grams != stack_buf) free(grams);
+    return removed;
+}
+
+
 KdbStatus kdb_index_insert(KdbIndex       *idx,
                            const KdbRecord *r,
                            uint64_t         file_offset) {
@@ -94,14 +280,18 @@ KdbStatus kdb_index_insert(KdbIndex       *idx,
     
     const KdbRecordField *f = kdb_record_get_field(r, idx->col_name);
     if (!f) return KDB_OK; 
+    if (idx->kind == KDB_INDEX_TRIGRAM)
+        return kdb__trigram_insert(idx, &f->value, r->id, file_offset);
 
-    uint32_t bucket = kdb_index_hash(&f->value);
+    uint32_t hash   = kdb__value_hash(&f->value);
+    uint32_t bucket = hash % KDB_INDEX_BUCKETS;
 
-    KdbIndexNode *node = (KdbIndexNode *)calloc(1, sizeof(KdbIndexNode));
-    if (!node) { kdb_err_oom("KdbIndexNode"); return KDB_ERR_OOM; }
+    KdbIndexNode *node = kdb__node_alloc(idx);
+    if (!node) return KDB_ERR_OOM;
 
     node->record_id   = r->id;
     node->file_offset = file_offset;
+    node->hash        = hash;
 
     
     node->next         = idx->buckets[bucket];
@@ -111,23 +301,49 @@ KdbStatus kdb_index_insert(KdbIndex       *idx,
 }
 
 
-KdbStatus kdb_index_remove(KdbIndex *idx, uint64_t record_id) {
-    if (!idx) {
-        kdb_err_null_arg("idx", "kdb_index_remove");
+KdbStatus kdb_index_insert_batch(KdbIndex        *idx,
+                                 const KdbRecord *records,
+                                 size_t           count,
+                                 const uint64_t  *file_offsets) {
+    if (!idx || !records || !file_offsets) {
+        kdb_err_null_arg("idx/records/file_offsets", "kdb_index_insert_batch");
         return KDB_ERR_BAD_ARG;
     }
 
-    for (uint32_t i = 0; i < KDB_INDEX_BUCKETS; i++) {
-        KdbIndexNode **pp = &idx->buckets[i];
-        while (*pp) {
-            if ((*pp)->record_id == record_id) {
-                KdbIndexNode *to_free = *pp;
-                *pp = to_free->next;
-                free(to_free);
-                return KDB_OK;
-            }
-            pp = &(*pp)->next;
+    
+    KdbStatus st = KDB_OK;
+    if (idx->kind == KDB_INDEX_HASH) st = kdb_index_reserve(idx, count);
+    for (size_t i = 0; st == KDB_OK && i < count; i++)
+        st = kdb_index_insert(idx, &records[i], file_offsets[i]);
+    return st;
+}
+
+
+KdbStatus kdb_index_remove(KdbIndex       *idx,
+                           const KdbValue *value,
+                           uint64_t        record_id) {
+    if (!idx || !value) {
+        kdb_err_null_arg("idx/value", "kdb_index_remove");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    if (idx->kind == KDB_INDEX_TRIGRAM) {
+        if (kdb__trigram_remove(idx, value, record_id) > 0) return KDB_OK;
+        kdb_err_record_not_found(record_id, idx->col_name);
+        return KDB_ERR_NOT_FOUND;
+    }
+
+    
+    uint32_t       hash = kdb__value_hash(value);
+    KdbIndexNode **pp   = &idx->buckets[hash % KDB_INDEX_BUCKETS];
+    while (*pp) {
+        if ((*pp)->hash == hash && (*pp)->record_id == record_id) {
+            KdbIndexNode *to_free = *pp;
+            *pp = to_free->next;
+            kdb__node_release(idx, to_free);
+            return KDB_OK;
         }
+        pp = &(*pp)->next;
     }
 
     kdb_err_record_not_found(record_id, idx->col_name);
@@ -136,20 +352,17 @@ KdbStatus kdb_index_remove(KdbIndex *idx, uint64_t record_id) {
 
 
 typedef struct {
-    KdbIndex *idx;
-    uint64_t  file_offset;
-    FILE     *fp;
-    uint64_t  data_offset;
+    KdbIndex **indices;
+    uint32_t   count;
+    KdbStatus  status;
 } KdbRebuildCtx;
 
-static int kdb__rebuild_cb(const KdbRecord *r, void *ud) {
+static int kdb__rebuild_cb(const KdbRecord *r, uint64_t file_offset, void *ud) {
     KdbRebuildCtx *ctx = (KdbRebuildCtx *)ud;
-    
-
-    kdb_index_insert(ctx->idx, r, ctx->file_offset);
-    
-
-    ctx->file_offset += 4 + kdb_record_serial_size(r);
+    for (uint32_t i = 0; i < ctx->count; i++) {
+        KdbStatus st = kdb_index_insert(ctx->indices[i], r, file_offset);
+        if (st != KDB_OK) { ctx->status = st; return 0; }
+    }
     return 1;
 }
 
@@ -158,26 +371,28 @@ KdbStatus kdb_index_rebuild(KdbIndex *idx, KdbTable *tbl) {
         kdb_err_null_arg("idx/tbl", "kdb_index_rebuild");
         return KDB_ERR_BAD_ARG;
     }
+    return kdb_index_rebuild_all(&idx, 1, tbl);
+}
+
+KdbStatus kdb_index_rebuild_all(KdbIndex **indices, uint32_t count, KdbTable *tbl) {
+    if ((!indices && count > 0) || !tbl) {
+        kdb_err_null_arg("indices/tbl", "kdb_index_rebuild_all");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (count == 0) return KDB_OK;
 
     
-    for (uint32_t i = 0; i < KDB_INDEX_BUCKETS; i++) {
-        KdbIndexNode *node = idx->buckets[i];
-        while (node) {
-            KdbIndexNode *next = node->next;
-            free(node);
-            node = next;
+    for (uint32_t i = 0; i < count; i++) {
+        kdb__index_clear(indices[i]);
+        if (indices[i]->kind == KDB_INDEX_HASH) {
+            KdbStatus st = kdb_index_reserve(indices[i], (size_t)tbl->header.record_count);
+            if (st != KDB_OK) return st;
         }
-        idx->buckets[i] = NULL;
     }
 
-    KdbRebuildCtx ctx = {
-        .idx         = idx,
-        .file_offset = tbl->header.data_offset,
-        .fp          = tbl->fp,
-        .data_offset = tbl->header.data_offset
-    };
-
-    return kdb_storage_scan(tbl, kdb__rebuild_cb, &ctx);
+    KdbRebuildCtx ctx = { .indices = indices, .count = count, .status = KDB_OK };
+    KdbStatus     st  = kdb_storage_scan_offsets(tbl, kdb__rebuild_cb, &ctx);
+    return st != KDB_OK ? st : ctx.status;
 }
 
 
@@ -192,13 +407,13 @@ KdbStatus kdb_index_lookup(const KdbIndex *idx,
     }
 
     *count_out = 0;
-    uint32_t bucket = kdb_index_hash(value);
+    uint32_t hash = kdb__value_hash(value);
 
-    const KdbIndexNode *node = idx->buckets[bucket];
+    const KdbIndexNode *node = idx->buckets[hash % KDB_INDEX_BUCKETS];
     while (node && *count_out < max_results) {
         
-
-        file_offsets_out[(*count_out)++] = node->file_offset;
+        if (node->hash == hash)
+            file_offsets_out[(*count_out)++] = node->file_offset;
         node = node->next;
     }
 
@@ -210,6 +425,118 @@ KdbStatus kdb_index_lookup(const KdbIndex *idx,
     return KDB_OK;
 }
 
+static int kdb__offset_cmp(const void *a, const void *b) {
+    uint64_t x = *(const uint64_t *)a;
+    uint64_t y = *(const uint64_t *)b;
+    return (x > y) - (x < y);
+}
+
+static KdbStatus kdb__collect_offsets(const KdbIndexNode *head,
+                                     uint32_t            hash,
+                                     uint64_t          **offsets_out,
+                                     size_t             *count_out) {
+    *offsets_out = NULL;
+    *count_out   = 0;
+
+    size_t count = 0;
+    for (const KdbIndexNode *node = head; node; node = node->next)
+        count += (node->hash == hash);
+    if (count == 0) return KDB_OK;
+
+    uint64_t *offsets = (uint64_t *)malloc(count * sizeof(uint64_t));
+    if (!offsets) { kdb_err_oom("index candidates"); return KDB_ERR_OOM; }
+
+    size_t n = 0;
+    for (const KdbIndexNode *node = head; node; node = node->next) {
+        if (node->hash == hash) offsets[n++] = node->file_offset;
+    }
+
+    
+    qsort(offsets, n, sizeof(uint64_t), kdb__offset_cmp);
+
+    *offsets_out = offsets;
+    *count_out   = n;
+    return KDB_OK;
+}
+
+static KdbStatus kdb__trigram_candidates(const KdbIndex *idx,
+                                         const KdbValue *needle,
+                                         uint64_t      **file_offsets_out,
+                                         size_t         *count_out) {
+    if (needle->type != KDB_TYPE_STRING || needle->v.as_string.len < KDB_TRIGRAM_MIN_LEN) {
+        kdb_err_bad_arg("needle", "trigram lookup needs a string of 3+ bytes");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    uint32_t  stack_buf[256];
+    size_t    count = 0;
+    uint32_t *grams = kdb__trigrams(needle->v.as_string.data, needle->v.as_string.len,
+                                    stack_buf, KDB_ARRAY_LEN(stack_buf), &count);
+    if (!grams) return KDB_ERR_OOM;
+
+    
+    size_t rarest = 0, rarest_len = SIZE_MAX;
+    for (size_t i = 0; i < count && rarest_len > 0; i++) {
+        size_t len = 0;
+        for (const KdbIndexNode *node = idx->buckets[kdb__gram_bucket(grams[i])]; node; node = node->next)
+            len += (node->hash == grams[i]);
+        if (len < rarest_len) { rarest = i; rarest_len = len; }
+    }
+
+    uint64_t *result = NULL;
+    size_t    kept   = 0;
+    KdbStatus st     = KDB_OK;
+    if (rarest_len > 0)
+        st = kdb__collect_offsets(idx->buckets[kdb__gram_bucket(grams[rarest])],
+                                  grams[rarest], &result, &kept);
+
+    
+    for (size_t i = 0; st == KDB_OK && kept > 0 && i < count; i++) {
+        if (i == rarest) continue;
+        uint64_t *other = NULL;
+        size_t    n     = 0;
+        st = kdb__collect_offsets(idx->buckets[kdb__gram_bucket(grams[i])], grams[i], &other, &n);
+        if (st != KDB_OK) break;
+
+        size_t a = 0, b = 0, out = 0;
+        while (a < kept && b < n) {
+            if (result[a] < other[b])      a++;
+            else if (result[a] > other[b]) b++;
+            else { result[out++] = result[a]; a++; b++; }
+        }
+        kept = out;
+        free(other);
+    }
+    if (grams != stack_buf) free(grams);
+
+    if (st != KDB_OK || kept == 0) {
+        free(result);
+        return st;
+    }
+    *file_offsets_out = result;
+    *count_out        = kept;
+    return KDB_OK;
+}
+
+KdbStatus kdb_index_candidates(const KdbIndex *idx,
+                               const KdbValue *value,
+                               uint64_t      **file_offsets_out,
+                               size_t         *count_out) {
+    if (!idx || !value || !file_offsets_out || !count_out) {
+        kdb_err_null_arg("idx/value/file_offsets_out/count_out", "kdb_index_candidates");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    *file_offsets_out = NULL;
+    *count_out        = 0;
+    if (idx->kind == KDB_INDEX_TRIGRAM)
+        return kdb__trigram_candidates(idx, value, file_offsets_out, count_out);
+
+    uint32_t hash = kdb__value_hash(value);
+    return kdb__collect_offsets(idx->buckets[hash % KDB_INDEX_BUCKETS], hash,
+                                file_offsets_out, count_out);
+}
+
 uint64_t kdb_index_lookup_one(const KdbIndex *idx, const KdbValue *value) {
     if (!idx || !value) return UINT64_MAX;
     uint64_t offset = 0;
@@ -230,10 +557,13 @@ KdbStatus kdb_index_build_for_table(const KdbColumn *columns,
 
     *count_out = 0;
     for (uint32_t i = 0; i < column_count; i++) {
-        if (!columns[i].indexed) continue;
-        KdbIndex *idx = kdb_index_new(columns[i].name);
-        if (!idx) return KDB_ERR_OOM;
-        indices_out[(*count_out)++] = idx;
+        const uint8_t kinds[] = { KDB_INDEX_HASH, KDB_INDEX_TRIGRAM };
+        for (size_t k = 0; k < KDB_ARRAY_LEN(kinds); k++) {
+            if (!(columns[i].indexed & kinds[k])) continue;
+            KdbIndex *idx = kdb_index_new_kind(columns[i].name, kinds[k]);
+            if (!idx) return KDB_ERR_OOM;
+            indices_out[(*count_out)++] = idx;
+        }
     }
     return KDB_OK;
 }
@@ -241,9 +571,17 @@ KdbStatus kdb_index_build_for_table(const KdbColumn *columns,
 KdbIndex *kdb_index_find(KdbIndex **indices,
                          uint32_t   count,
                          const char *col_name) {
+    return kdb_index_find_kind(indices, count, col_name, KDB_INDEX_HASH);
+}
+
+KdbIndex *kdb_index_find_kind(KdbIndex  **indices,
+                              uint32_t    count,
+                              const char *col_name,
+                              uint8_t     kind) {
     if (!indices || !col_name) return NULL;
     for (uint32_t i = 0; i < count; i++) {
-        if (indices[i] && strcmp(indices[i]->col_name, col_name) == 0)
+        if (indices[i] && indices[i]->kind == kind &&
+            strcmp(indices[i]->col_name, col_name) == 0)
             return indices[i];
     }
     return NULL;
@@ -2,6 +2,8 @@
 #include <stdlib.h>
 #include <string.h>
 #include <time.h>
+#include <unistd.h>
+#include <dirent.h>
 #include <sys/stat.h>
 
 #include "../include/kumdb.h"
@@ -17,7 +19,7 @@ static void kdb_row_free_internal(KdbRow *row);
 
 
 const char *kdb_version(void) {
-    return "1.0.0";
+    return "1.1.0";
 }
 
 
@@ -30,7 +32,7 @@ static KdbTable *kdb__get_table(KumDB *db, const char *table_name) {
     
     for (uint32_t i = 0; i < db->table_count; i++) {
         if (db->tables[i] && strcmp(db->tables[i]->name, table_name) == 0)
-            return db->tables[i];
+            return kdb_table_refresh(db->tables[i]) == KDB_OK ? db->tables[i] : NULL;
     }
 
     
@@ -52,7 +54,8 @@ static KdbTable *kdb__get_table(KumDB *db, const char *table_name) {
     KdbStatus st = kdb_table_open(tbl, db->data_dir, table_name);
     if (st != KDB_OK) { free(tbl); return NULL; }
 
-    tbl->read_only = db->read_only;
+    tbl->read_only    = db->read_only;
+    tbl->defer_header = db->in_memory;
     db->tables[db->table_count++] = tbl;
     return tbl;
 }
@@ -64,7 +67,7 @@ static KdbTable *kdb__get_or_create_table(KumDB *db, const char *table_name) {
     
     for (uint32_t i = 0; i < db->table_count; i++) {
         if (db->tables[i] && strcmp(db->tables[i]->name, table_name) == 0)
-            return db->tables[i];
+            return kdb_table_refresh(db->tables[i]) == KDB_OK ? db->tables[i] : NULL;
     }
 
     if (!kdb_storage_exists(db->data_dir, table_name)) {
@@ -108,6 +111,12 @@ static KdbRecord *kdb__fields_to_record(const KdbField *fields) {
                     return NULL;
                 }
                 break;
+            case KDB_TYPE_BLOB:
+                if (kdb_value_from_blob(f->v.as_blob.data, f->v.as_blob.len, &val) != KDB_OK) {
+                    kdb_record_free(r);
+                    return NULL;
+                }
+                break;
             case KDB_TYPE_NULL:
                 kdb_value_from_null(&val);
                 break;
@@ -116,7 +125,7 @@ static KdbRecord *kdb__fields_to_record(const KdbField *fields) {
                 break;
         }
 
-        KdbStatus st = kdb_record_set_field(r, f->name, &val);
+        KdbStatus st = kdb_record_take_field(r, f->name, &val);
         kdb_value_free(&val);
         if (st != KDB_OK) { kdb_record_free(r); return NULL; }
     }
@@ -124,7 +133,7 @@ static KdbRecord *kdb__fields_to_record(const KdbField *fields) {
 }
 
 
-static KdbStatus kdb__build_query(const char **filters, KdbQuery *q) {
+static KdbStatus kdb__build_query(const KdbTable *tbl, const char **filters, KdbQuery *q) {
     kdb_query_init(q);
     if (!filters) return KDB_OK; 
 
@@ -180,79 +189,150 @@ static KdbStatus kdb__build_query(const char **filters, KdbQuery *q) {
             value2 = comma + 1;
         }
 
-        KdbStatus st = kdb_query_add_filter(q, key, value, value2);
+        const KdbColumn *col      = kdb_table_get_column(tbl, col_name);
+        KdbType          col_type = col ? (KdbType)col->type : KDB_TYPE_UNKNOWN;
+        if (!col && strcmp(col_name, "id") == 0) col_type = KDB_TYPE_INT;
+
+        KdbStatus st = kdb_query_add_filter_op(q, col_name, op, value, value2, col_type);
         if (st != KDB_OK) { kdb_query_free(q); return st; }
     }
     return KDB_OK;
 }
 
 
-static KdbRow *kdb__record_to_row(const KdbRecord *r) {
-    if (!r) return NULL;
-
-    KdbRow *row = (KdbRow *)calloc(1, sizeof(KdbRow));
-    if (!row) { kdb_err_oom("KdbRow"); return NULL; }
+static const char *kdb__shared_name(const KdbRow *names_from, uint32_t i, const char *name) {
+    if (!names_from || i >= names_from->field_count) return NULL;
+    const char *candidate = names_from->fields[i].name;
+    return (candidate && strcmp(candidate, name) == 0) ? candidate : NULL;
+}
 
+static KdbStatus kdb__record_fill_row(const KdbRecord *r, KdbRow *row, const KdbRow *names_from) {
+    memset(row, 0, sizeof(*row));
     row->id          = r->id;
     row->created_at  = r->created_at;
     row->updated_at  = r->updated_at;
-    row->field_count = r->field_count;
 
-    if (r->field_count > 0) {
-        row->fields = (KdbField *)calloc(r->field_count, sizeof(KdbField));
-        if (!row->fields) { free(row); kdb_err_oom("KdbRow fields"); return NULL; }
+    if (r->field_count == 0) return KDB_OK;
 
-        for (uint32_t i = 0; i < r->field_count; i++) {
-            const KdbRecordField *src = &r->fields[i];
-            KdbField       *dst = &row->fields[i];
-            
-            char *name_copy = (char *)malloc(KDB_MAX_NAME_LEN);
-            if (!name_copy) {
-                
-                for (uint32_t j = 0; j < i; j++) free((void *)row->fields[j].name);
-                free(row->fields);
-                free(row);
-                kdb_err_oom("KdbRow field name");
-                return NULL;
-            }
-            KDB_STRLCPY(name_copy, src->col_name, KDB_MAX_NAME_LEN);
-            dst->name = name_copy;
+    
+    size_t block_size = r->field_count * sizeof(KdbField);
+    for (uint32_t i = 0; i < r->field_count; i++) {
+        const KdbRecordField *src = &r->fields[i];
+        if (!kdb__shared_name(names_from, i, src->col_name))
+            block_size += strlen(src->col_name) + 1;
+        if (src->value.type == KDB_TYPE_STRING && src->value.v.as_string.data)
+            block_size += src->value.v.as_string.len + 1;
+        else if (src->value.type == KDB_TYPE_BLOB)
+            block_size += src->value.v.as_blob.len;
+    }
 
-            
-            switch (src->value.type) {
-                case KDB_TYPE_INT:
-                    dst->type       = KDB_TYPE_INT;
-                    dst->v.as_int   = src->value.v.as_int;
-                    break;
-                case KDB_TYPE_FLOAT:
-                    dst->type       = KDB_TYPE_FLOAT;
-                    dst->v.as_float = src->value.v.as_float;
-                    break;
-                case KDB_TYPE_BOOL:
-                    dst->type      = KDB_TYPE_BOOL;
-                    dst->v.as_bool = src->value.v.as_bool;
-                    break;
-                case KDB_TYPE_STRING: {
-                    dst->type = KDB_TYPE_STRING;
-                    char *str_copy = NULL;
-                    if (src->value.v.as_string.data) {
-                        str_copy = (char *)malloc(src->value.v.as_string.len + 1);
-                        if (str_copy) {
-                            memcpy(str_copy, src->value.v.as_string.data,
-                                   src->value.v.as_string.len + 1);
-                        }
-                    }
-                    dst->v.as_string = str_copy;
-                    break;
+    uint8_t *block = (uint8_t *)malloc(block_size);
+    if (!block) { kdb_err_oom("KdbRow fields"); return KDB_ERR_OOM; }
+
+    KdbField *fields = (KdbField *)block;
+    char     *chars  = (char *)(block + r->field_count * sizeof(KdbField));
+
+    for (uint32_t i = 0; i < r->field_count; i++) {
+        const KdbRecordField *src = &r->fields[i];
+        KdbField             *dst = &fields[i];
+        memset(dst, 0, sizeof(*dst));
+
+        const char *shared = kdb__shared_name(names_from, i, src->col_name);
+        if (shared) {
+            dst->name = shared;
+        } else {
+            size_t name_len = strlen(src->col_name) + 1;
+            memcpy(chars, src->col_name, name_len);
+            dst->name = chars;
+            chars += name_len;
+        }
+
+        switch (src->value.type) {
+            case KDB_TYPE_INT:
+                dst->type       = KDB_TYPE_INT;
+                dst->v.as_int   = src->value.v.as_int;
+                break;
+            case KDB_TYPE_FLOAT:
+                dst->type       = KDB_TYPE_FLOAT;
+                dst->v.as_float = src->value.v.as_float;
+                break;
+            case KDB_TYPE_BOOL:
+                dst->type      = KDB_TYPE_BOOL;
+                dst->v.as_bool = src->value.v.as_bool;
+                break;
+            case KDB_TYPE_STRING:
+                dst->type = KDB_TYPE_STRING;
+                if (src->value.v.as_string.data) {
+                    size_t len = src->value.v.as_string.len + 1;
+                    memcpy(chars, src->value.v.as_string.data, len);
+                    dst->v.as_string = chars;
+                    chars += len;
                 }
-                case KDB_TYPE_NULL:
-                default:
-                    dst->type = KDB_TYPE_NULL;
-                    break;
-            }
+                break;
+            case KDB_TYPE_BLOB:
+                dst->type           = KDB_TYPE_BLOB;
+                dst->v.as_blob.data = chars;
+                dst->v.as_blob.len  = src->value.v.as_blob.len;
+                if (src->value.v.as_blob.len > 0)
+                    memcpy(chars, src->value.v.as_blob.data, src->value.v.as_blob.len);
+                chars += src->value.v.as_blob.len;
+                break;
+            case KDB_TYPE_NULL:
+            default:
+                dst->type = KDB_TYPE_NULL;
+                break;
         }
     }
-    return row;
+
+    row->fields      = fields;
+    row->field_count = r->field_count;
+    return KDB_OK;
+}
+
+static void kdb__record_view_row(const KdbRecord *r, KdbRow *row, KdbField *fields) {
+    row->id          = r->id;
+    row->created_at  = r->created_at;
+    row->updated_at  = r->updated_at;
+    row->field_count = r->field_count;
+    row->fields      = fields;
+
+    for (uint32_t i = 0; i < r->field_count; i++) {
+        const KdbValue *src = &r->fields[i].value;
+        KdbField       *dst = &fields[i];
+        memset(dst, 0, sizeof(*dst));
+        dst->name = r->fields[i].col_name;
+        dst->type = src->type;
+        switch (src->type) {
+            case KDB_TYPE_INT:    dst->v.as_int    = src->v.as_int;           break;
+            case KDB_TYPE_FLOAT:  dst->v.as_float  = src->v.as_float;         break;
+            case KDB_TYPE_BOOL:   dst->v.as_bool   = src->v.as_bool;          break;
+            case KDB_TYPE_STRING: dst->v.as_string = src->v.as_string.data;   break;
+            case KDB_TYPE_BLOB:
+                dst->v.as_blob.data = src->v.as_blob.data;
+                dst->v.as_blob.len  = src->v.as_blob.len;
+                break;
+            default:
+                dst->type = KDB_TYPE_NULL;
+                break;
+        }
+    }
+}
+
+static KdbStatus kdb__validate_record(const KdbRecord *r,
+                                      KdbValidator     validator,
+                                      void            *user_data) {
+    KdbField  stack[KDB_MAX_COLUMNS];
+    KdbField *fields = stack;
+    if (r->field_count > KDB_MAX_COLUMNS) {
+        fields = (KdbField *)malloc(r->field_count * sizeof(KdbField));
+        if (!fields) { kdb_err_oom("validator row"); return KDB_ERR_OOM; }
+    }
+
+    KdbRow row;
+    kdb__record_view_row(r, &row, fields);
+    KdbStatus st = validator(&row, user_data);
+    if (fields != stack) free(fields);
+    return st;
 }
 
 
@@ -292,6 +372,43 @@ KumDB *kdb_open_readonly(const char *data_dir) {
     return kdb__open_internal(data_dir, 1);
 }
 
+KumDB *kdb_open_memory(void) {
+    
+    const char *bases[] = { "/dev/shm", getenv("TMPDIR"), "/tmp" };
+    char        dir[4096];
+    dir[0] = '\0';
+    for (size_t i = 0; i < KDB_ARRAY_LEN(bases); i++) {
+        if (!bases[i]) continue;
+        snprintf(dir, sizeof(dir), "%s/kumdb-XXXXXX", bases[i]);
+        if (mkdtemp(dir)) break;
+        dir[0] = '\0';
+    }
+    if (!dir[0]) {
+        kdb_err_io("/dev/shm", "mkdtemp");
+        return NULL;
+    }
+
+    KumDB *db = kdb__open_internal(dir, 0);
+    if (!db) { rmdir(dir); return NULL; }
+    db->in_memory = 1;
+    return db;
+}
+
+static void kdb__remove_dir(const char *dir_path) {
+    DIR *dir = opendir(dir_path);
+    if (dir) {
+        struct dirent *ent;
+        char           path[4096 + 256];
+        while ((ent = readdir(dir)) != NULL) {
+            if (strcmp(ent->d_name, ".") == 0 || strcmp(ent->d_name, "..") == 0) continue;
+            snprintf(path, sizeof(path), "%s/%s", dir_path, ent->d_name);
+            unlink(path);
+        }
+        closedir(dir);
+    }
+    rmdir(dir_path);
+}
+
 void kdb_close(KumDB *db) {
     if (!db) return;
     for (uint32_t i = 0; i < db->table_count; i++) {
@@ -301,6 +418,7 @@ void kdb_close(KumDB *db) {
             db->tables[i] = NULL;
         }
     }
+    if (db->in_memory) kdb__remove_dir(db->data_dir);
     free(db);
 }
 
@@ -331,10 +449,7 @@ KdbStatus kdb_add_validated(KumDB            *db,
 
     
     if (validator) {
-        KdbRow *row = kdb__record_to_row(r);
-        if (!row) { kdb_record_free(r); return KDB_ERR_OOM; }
-        KdbStatus vst = validator(row, user_data);
-        kdb_row_free(row);
+        KdbStatus vst = kdb__validate_record(r, validator, user_data);
         if (vst != KDB_OK) {
             kdb_record_free(r);
             if (kdb_last_status() == KDB_OK)
@@ -353,6 +468,46 @@ KdbStatus kdb_batch_import(KumDB             *db,
                            const KdbField   **rows,
                            size_t             count,
                            size_t            *inserted_out) {
+    return kdb_batch_import_validated(db, table_name, rows, count, NULL, NULL, inserted_out);
+}
+
+static void kdb__free_batch(KdbRecord *records, size_t count) {
+    for (size_t i = 0; i < count; i++) {
+        if (records[i].fields) {
+            for (uint32_t j = 0; j < records[i].field_count; j++)
+                kdb_value_free(&records[i].fields[j].value);
+            free(records[i].fields);
+        }
+    }
+    free(records);
+}
+
+static KdbStatus kdb__validate_batch(const char      *table_name,
+                                     const KdbRecord *records,
+                                     size_t           count,
+                                     KdbValidator     validator,
+                                     void            *user_data) {
+    for (size_t i = 0; i < count; i++) {
+        KdbStatus vst = kdb__validate_record(&records[i], validator, user_data);
+        if (vst != KDB_OK) {
+            if (kdb_last_status() == KDB_OK) {
+                char reason[64];
+                snprintf(reason, sizeof(reason), "validator rejected batch row %zu", i);
+                kdb_err_validation(table_name, reason);
+            }
+            return KDB_ERR_VALIDATION;
+        }
+    }
+    return KDB_OK;
+}
+
+KdbStatus kdb_batch_import_validated(KumDB           *db,
+                                     const char      *table_name,
+                                     const KdbField **rows,
+                                     size_t           count,
+                                     KdbValidator     validator,
+                                     void            *user_data,
+                                     size_t          *inserted_out) {
     if (!db || !table_name || !rows) {
         kdb_err_null_arg("db/table_name/rows", "kdb_batch_import");
         return KDB_ERR_BAD_ARG;
@@ -373,38 +528,62 @@ KdbStatus kdb_batch_import(KumDB             *db,
     KdbRecord *records = (KdbRecord *)calloc(count, sizeof(KdbRecord));
     if (!records) { kdb_err_oom("batch record array"); return KDB_ERR_OOM; }
 
-    size_t built = 0;
     for (size_t i = 0; i < count; i++) {
         KdbRecord *r = kdb__fields_to_record(rows[i]);
         if (!r) {
-            
-            for (size_t j = 0; j < built; j++) {
-                if (records[j].fields) {
-                    for (uint32_t k = 0; k < records[j].field_count; k++)
-                        kdb_value_free(&records[j].fields[k].value);
-                    free(records[j].fields);
-                }
-            }
-            free(records);
+            kdb__free_batch(records, i);
             return kdb_last_status();
         }
         memcpy(&records[i], r, sizeof(KdbRecord));
         free(r); 
-        built++;
     }
 
-    KdbStatus st = kdb_table_insert_batch(tbl, records, count, inserted_out);
-
     
-    for (size_t i = 0; i < built; i++) {
-        if (records[i].fields) {
-            for (uint32_t j = 0; j < records[i].field_count; j++)
-                kdb_value_free(&records[i].fields[j].value);
-            free(records[i].fields);
+    KdbStatus st = validator
+        ? kdb__validate_batch(table_name, records, count, validator, user_data)
+        : KDB_OK;
+    if (st == KDB_OK)
+        st = kdb_table_insert_batch(tbl, records, count, inserted_out);
+
+    kdb__free_batch(records, count);
+    return st;
+}
+
+typedef struct {
+    KdbRows  *rows;
+    size_t    capacity;
+    size_t    skip;
+    size_t    limit;
+    KdbStatus status;
+} KdbFindCtx;
+
+static int kdb__find_cb(const KdbRecord *r, void *ud) {
+    KdbFindCtx *ctx  = (KdbFindCtx *)ud;
+    KdbRows    *rows = ctx->rows;
+
+    if (ctx->skip > 0) {
+        ctx->skip--;
+        return 1;
+    }
+
+    if (rows->count == ctx->capacity) {
+        size_t  new_cap = ctx->capacity ? ctx->capacity * 2 : 16;
+        KdbRow *grown   = (KdbRow *)realloc(rows->rows, new_cap * sizeof(KdbRow));
+        if (!grown) {
+            kdb_err_oom("KdbRow array");
+            ctx->status = KDB_ERR_OOM;
+            return 0;
         }
+        rows->rows    = grown;
+        ctx->capacity = new_cap;
     }
-    free(records);
-    return st;
+
+    
+    const KdbRow *names_from = rows->count > 0 ? &rows->rows[0] : NULL;
+    ctx->status = kdb__record_fill_row(r, &rows->rows[rows->count], names_from);
+    if (ctx->status != KDB_OK) return 0;
+    rows->count++;
+    return rows->count < ctx->limit;
 }
 
 KdbRows *kdb_find(KumDB *db, const char *table_name, const char **filters) {
@@ -412,44 +591,55 @@ KdbRows *kdb_find(KumDB *db, const char *table_name, const char **filters) {
         kdb_err_null_arg("db/table_name", "kdb_find");
         return NULL;
     }
+    return kdb_find_page(db, table_name, filters, 0, SIZE_MAX);
+}
+
+KdbRows *kdb_find_page(KumDB       *db,
+                       const char  *table_name,
+                       const char **filters,
+                       size_t       offset,
+                       size_t       limit) {
+    if (!db || !table_name) {
+        kdb_err_null_arg("db/table_name", "kdb_find_page");
+        return NULL;
+    }
 
     KdbTable *tbl = kdb__get_table(db, table_name);
     if (!tbl) return NULL;
 
     KdbQuery q;
-    if (kdb__build_query(filters, &q) != KDB_OK) return NULL;
+    if (kdb__build_query(tbl, filters, &q) != KDB_OK) return NULL;
 
-    KdbResult res;
-    KdbStatus st = kdb_query_execute(tbl, &q, &res);
-    kdb_query_free(&q);
-    if (st != KDB_OK) return NULL;
+    KdbRows *rows = (KdbRows *)calloc(1, sizeof(KdbRows));
+    if (!rows) { kdb_query_free(&q); kdb_err_oom("KdbRows"); return NULL; }
+    if (limit == 0) { kdb_query_free(&q); return rows; }
 
     
-    KdbRows *rows = (KdbRows *)calloc(1, sizeof(KdbRows));
-    if (!rows) { kdb_result_free(&res); kdb_err_oom("KdbRows"); return NULL; }
-
-    rows->count = res.count;
-    if (res.count > 0) {
-        rows->rows = (KdbRow *)calloc(res.count, sizeof(KdbRow));
-        if (!rows->rows) {
-            kdb_result_free(&res);
-            free(rows);
-            kdb_err_oom("KdbRow array");
-            return NULL;
-        }
-        for (size_t i = 0; i < res.count; i++) {
-            KdbRow *row = kdb__record_to_row(&res.rows[i]);
-            if (row) {
-                memcpy(&rows->rows[i], row, sizeof(KdbRow));
-                free(row);
-            }
-        }
-    }
+    KdbFindCtx ctx = { .rows = rows, .skip = offset, .limit = limit, .status = KDB_OK };
+    KdbStatus  st  = kdb_query_each(tbl, &q, kdb__find_cb, &ctx);
+    kdb_query_free(&q);
+    if (st == KDB_OK) st = ctx.status;
+    if (st != KDB_OK) { kdb_rows_free(rows); return NULL; }
 
-    kdb_result_free(&res);
     return rows;
 }
 
+static KdbRow *kdb__find_first(KdbTable *tbl, const KdbQuery *q) {
+    KdbRows    rows = { .rows = (KdbRow *)malloc(sizeof(KdbRow)), .count = 0 };
+    if (!rows.rows) { kdb_err_oom("KdbRow"); return NULL; }
+
+    KdbFindCtx ctx = { .rows = &rows, .capacity = 1, .limit = 1, .status = KDB_OK };
+    KdbStatus  st  = kdb_query_each(tbl, q, kdb__find_cb, &ctx);
+    if (st == KDB_OK) st = ctx.status;
+    if (st == KDB_OK && rows.count == 0) {
+        kdb_set_error(KDB_ERR_NOT_FOUND,
+            "No record matched your query. It either doesn't exist or you got the filters wrong.");
+        st = KDB_ERR_NOT_FOUND;
+    }
+    if (st != KDB_OK) { free(rows.rows); return NULL; }
+    return rows.rows;
+}
+
 KdbRow *kdb_find_one(KumDB *db, const char *table_name, const char **filters) {
     if (!db || !table_name) {
         kdb_err_null_arg("db/table_name", "kdb_find_one");
@@ -460,26 +650,121 @@ KdbRow *kdb_find_one(KumDB *db, const char *table_name, const char **filters) {
     if (!tbl) return NULL;
 
     KdbQuery q;
-    if (kdb__build_query(filters, &q) != KDB_OK) return NULL;
+    if (kdb__build_query(tbl, filters, &q) != KDB_OK) return NULL;
 
-    KdbResult res;
-    KdbStatus st = kdb_query_execute_one(tbl, &q, &res);
+    KdbRow *row = kdb__find_first(tbl, &q);
     kdb_query_free(&q);
-    if (st != KDB_OK || res.count == 0) { kdb_result_free(&res); return NULL; }
-
-    KdbRow *row = kdb__record_to_row(&res.rows[0]);
-    kdb_result_free(&res);
     return row;
 }
 
 KdbRow *kdb_find_by_id(KumDB *db, const char *table_name, uint64_t id) {
-    char id_str[32];
-    snprintf(id_str, sizeof(id_str), "%llu", (unsigned long long)id);
-    const char *filters[] = { NULL, NULL };
-    char filter_str[64];
-    snprintf(filter_str, sizeof(filter_str), "id=%llu", (unsigned long long)id);
-    filters[0] = filter_str;
-    return kdb_find_one(db, table_name, filters);
+    if (!db || !table_name) {
+        kdb_err_null_arg("db/table_name", "kdb_find_by_id");
+        return NULL;
+    }
+
+    KdbTable *tbl = kdb__get_table(db, table_name);
+    if (!tbl) return NULL;
+
+    
+    KdbQuery         q;
+    KdbStatus        st;
+    const KdbColumn *col = kdb_table_get_column(tbl, "id");
+    kdb_query_init(&q);
+    if (col && col->type != KDB_TYPE_INT) {
+        char id_str[32];
+        snprintf(id_str, sizeof(id_str), "%llu", (unsigned long long)id);
+        st = kdb_query_add_filter_op(&q, "id", KDB_OP_EQ, id_str, NULL, (KdbType)col->type);
+    } else {
+        KdbValue value;
+        kdb_value_from_int((int64_t)id, &value);
+        st = kdb_query_add_filter_value(&q, "id", KDB_OP_EQ, &value, NULL);
+    }
+    if (st != KDB_OK) { kdb_query_free(&q); return NULL; }
+
+    KdbRow *row = kdb__find_first(tbl, &q);
+    kdb_query_free(&q);
+    return row;
+}
+
+KdbRows *kdb_find_text(KumDB      *db,
+                       const char *table_name,
+                       const char *col_name,
+                       const char *needle,
+                       size_t      limit) {
+    if (!db || !table_name || !col_name || !needle) {
+        kdb_err_null_arg("db/table_name/col_name/needle", "kdb_find_text");
+        return NULL;
+    }
+
+    KdbTable *tbl = kdb__get_table(db, table_name);
+    if (!tbl) return NULL;
+
+    size_t    max_candidates = limit > SIZE_MAX / KDB_TEXT_CANDIDATE_MUL
+                             ? SIZE_MAX : limit * KDB_TEXT_CANDIDATE_MUL;
+    KdbResult res = { .rows = NULL, .count = 0, .capacity = 0 };
+    KdbStatus st  = kdb_query_text(tbl, col_name, needle, limit, max_candidates, &res);
+    KdbRows *rows = NULL;
+    if (st == KDB_OK) {
+        rows = (KdbRows *)calloc(1, sizeof(KdbRows));
+        if (!rows) { kdb_err_oom("KdbRows"); st = KDB_ERR_OOM; }
+    }
+
+    KdbFindCtx ctx = { .rows = rows, .limit = SIZE_MAX, .status = KDB_OK };
+    for (size_t i = 0; st == KDB_OK && i < res.count; i++) {
+        if (!kdb__find_cb(&res.rows[i], &ctx)) st = ctx.status;
+    }
+    kdb_result_free(&res);
+    if (st != KDB_OK) { kdb_rows_free(rows); return NULL; }
+    return rows;
+}
+
+static int kdb__count_key(const char **filters, char *key, uint32_t *len_out) {
+    size_t len = 0;
+    for (int i = 0; filters && filters[i] != NULL; i++) {
+        size_t n = strlen(filters[i]) + 1;
+        if (len + n > KDB_COUNT_CACHE_KEY) return 0;
+        memcpy(key + len, filters[i], n);
+        len += n;
+    }
+    *len_out = (uint32_t)len;
+    return 1;
+}
+
+static KdbCountCacheEntry *kdb__count_cache_find(KdbTable *tbl, const char *key, uint32_t len) {
+    for (uint32_t i = 0; i < KDB_COUNT_CACHE_SLOTS; i++) {
+        KdbCountCacheEntry *e = &tbl->count_cache[i];
+        if (e->valid && e->key_len == len && memcmp(e->key, key, len) == 0) {
+            e->last_used = ++tbl->count_cache_tick;
+            return e;
+        }
+    }
+    return NULL;
+}
+
+static void kdb__count_cache_store(KdbTable           *tbl,
+                                   KdbCountCacheEntry *e,
+                                   const char         *key,
+                                   uint32_t            len,
+                                   uint64_t            data_end,
+                                   uint64_t            count) {
+    
+    if (!e) {
+        e = &tbl->count_cache[0];
+        for (uint32_t i = 1; i < KDB_COUNT_CACHE_SLOTS && e->valid; i++) {
+            KdbCountCacheEntry *slot = &tbl->count_cache[i];
+            if (!slot->valid || slot->last_used < e->last_used) e = slot;
+        }
+        e->key_len = len;
+        memcpy(e->key, key, len);
+    }
+
+    e->version   = tbl->version;
+    e->mutations = tbl->mutations;
+    e->data_end  = data_end;
+    e->last_used = ++tbl->count_cache_tick;
+    e->count     = count;
+    e->valid     = 1;
 }
 
 int64_t kdb_count(KumDB *db, const char *table_name, const char **filters) {
@@ -490,13 +775,71 @@ int64_t kdb_count(KumDB *db, const char *table_name, const char **filters) {
     KdbTable *tbl = kdb__get_table(db, table_name);
     if (!tbl) return -1;
 
+    
+    char                key[KDB_COUNT_CACHE_KEY];
+    uint32_t            key_len   = 0;
+    int                 cacheable = kdb__count_key(filters, key, &key_len);
+    KdbCountCacheEntry *hit       = cacheable ? kdb__count_cache_find(tbl, key, key_len) : NULL;
+    if (hit && hit->version == tbl->version) return (int64_t)hit->count;
+
     KdbQuery q;
-    if (kdb__build_query(filters, &q) != KDB_OK) return -1;
+    if (kdb__build_query(tbl, filters, &q) != KDB_OK) return -1;
 
-    size_t    count = 0;
-    KdbStatus st    = kdb_query_count(tbl, &q, &count);
+    uint64_t  version  = tbl->version;
+    uint64_t  data_end = 0;
+    size_t    count    = 0;
+    KdbStatus st       = cacheable ? kdb_storage_data_end(tbl, &data_end) : KDB_OK;
+    if (st == KDB_OK && hit && hit->mutations == tbl->mutations && hit->data_end <= data_end) {
+        
+        st     = kdb_query_count_from(tbl, &q, hit->data_end, &count);
+        count += (size_t)hit->count;
+    } else if (st == KDB_OK) {
+        st = kdb_query_count(tbl, &q, &count);
+    }
     kdb_query_free(&q);
-    return (st == KDB_OK) ? (int64_t)count : -1;
+    if (st != KDB_OK) return -1;
+
+    if (cacheable && version == tbl->version)
+        kdb__count_cache_store(tbl, hit, key, key_len, data_end, count);
+    return (int64_t)count;
+}
+
+typedef struct {
+    KdbRowCallback callback;
+    void          *user_data;
+    KdbStatus      status;
+} KdbForeachCtx;
+
+static int kdb__foreach_cb(const KdbRecord *r, void *ud) {
+    KdbForeachCtx *ctx = (KdbForeachCtx *)ud;
+    KdbRow row;
+    ctx->status = kdb__record_fill_row(r, &row, NULL);
+    if (ctx->status != KDB_OK) return 0;
+    int cont = ctx->callback(&row, ctx->user_data);
+    free(row.fields);
+    return cont;
+}
+
+KdbStatus kdb_foreach(KumDB          *db,
+                      const char     *table_name,
+                      const char    **filters,
+                      KdbRowCallback  callback,
+                      void           *user_data) {
+    if (!db || !table_name || !callback) {
+        kdb_err_null_arg("db/table_name/callback", "kdb_foreach");
+        return KDB_ERR_BAD_ARG;
+    }
+    KdbTable *tbl = kdb__get_table(db, table_name);
+    if (!tbl) return kdb_last_status();
+
+    KdbQuery q;
+    KdbStatus st = kdb__build_query(tbl, filters, &q);
+    if (st != KDB_OK) return st;
+
+    KdbForeachCtx ctx = { .callback = callback, .user_data = user_data, .status = KDB_OK };
+    st = kdb_query_each(tbl, &q, kdb__foreach_cb, &ctx);
+    kdb_query_free(&q);
+    return (st != KDB_OK) ? st : ctx.status;
 }
 
 KdbStatus kdb_update(KumDB            *db,
@@ -517,7 +860,7 @@ KdbStatus kdb_update(KumDB            *db,
     if (!tbl) return kdb_last_status();
 
     KdbQuery q;
-    KdbStatus st = kdb__build_query(where_filters, &q);
+    KdbStatus st = kdb__build_query(tbl, where_filters, &q);
     if (st != KDB_OK) return st;
 
     KdbRecord *patch = kdb__fields_to_record(set_fields);
@@ -548,7 +891,7 @@ KdbStatus kdb_delete(KumDB       *db,
     if (!tbl) return kdb_last_status();
 
     KdbQuery q;
-    KdbStatus st = kdb__build_query(filters, &q);
+    KdbStatus st = kdb__build_query(tbl, filters, &q);
     if (st != KDB_OK) return st;
 
     if (deleted_out) *deleted_out = 0;
@@ -558,6 +901,35 @@ KdbStatus kdb_delete(KumDB       *db,
 }
 
 
+KdbStatus kdb_create_index(KumDB *db, const char *table_name, const char *col_name) {
+    if (!db || !table_name || !col_name) {
+        kdb_err_null_arg("db/table_name/col_name", "kdb_create_index");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (db->read_only) {
+        kdb_err_table_read_only(table_name);
+        return KDB_ERR_READ_ONLY;
+    }
+    KdbTable *tbl = kdb__get_table(db, table_name);
+    if (!tbl) return kdb_last_status();
+    return kdb_table_create_index(tbl, col_name, 1);
+}
+
+KdbStatus kdb_create_text_index(KumDB *db, const char *table_name, const char *col_name) {
+    if (!db || !table_name || !col_name) {
+        kdb_err_null_arg("db/table_name/col_name", "kdb_create_text_index");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (db->read_only) {
+        kdb_err_table_read_only(table_name);
+        return KDB_ERR_READ_ONLY;
+    }
+    KdbTable *tbl = kdb__get_table(db, table_name);
+    if (!tbl) return kdb_last_status();
+    return kdb_table_create_index_kind(tbl, col_name, KDB_INDEX_TRIGRAM, 1);
+}
+
+
 KdbStatus kdb_drop_table(KumDB *db, const char *table_name) {
     if (!db || !table_name) {
         kdb_err_null_arg("db/table_name", "kdb_drop_table");
@@ -587,6 +959,47 @@ KdbStatus kdb_compact(KumDB *db, const char *table_name) {
     return kdb_table_compact(tbl);
 }
 
+KdbStatus kdb_backup(KumDB *db, const char *dest_dir) {
+    if (!db || !dest_dir) {
+        kdb_err_null_arg("db/dest_dir", "kdb_backup");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (strcmp(dest_dir, db->data_dir) == 0) {
+        kdb_err_bad_arg("dest_dir", "backup destination is the database directory itself");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    struct stat st_dir;
+    if (stat(dest_dir, &st_dir) != 0 && mkdir(dest_dir, 0755) != 0) {
+        kdb_err_io(dest_dir, "mkdir backup");
+        return KDB_ERR_IO;
+    }
+
+    char     names[KDB_MAX_TABLES][KDB_MAX_NAME_LEN];
+    uint32_t found = 0;
+    KdbStatus st = kdb_storage_list_tables(db->data_dir, names, &found);
+    if (st != KDB_OK) return st;
+
+    for (uint32_t i = 0; i < found; i++) {
+        KdbTable *tbl = kdb__get_table(db, names[i]);
+        if (!tbl) return kdb_last_status();
+
+        char dest_path[4096];
+        kdb_storage_path(dest_dir, names[i], dest_path, sizeof(dest_path));
+
+        
+        KdbLock lock = { .fd = -1 };
+        if (!db->read_only) {
+            st = kdb_lock_acquire_cached(&lock, &tbl->lock_fd, tbl->path, 1);
+            if (st != KDB_OK) return st;
+        }
+        st = kdb_storage_backup(tbl, dest_path);
+        kdb_lock_release(&lock);
+        if (st != KDB_OK) return st;
+    }
+    return KDB_OK;
+}
+
 int kdb_table_exists(KumDB *db, const char *table_name) {
     if (!db || !table_name) return 0;
     return kdb_storage_exists(db->data_dir, table_name);
@@ -633,13 +1046,7 @@ void kdb_row_free(KdbRow *row) {
 
 void kdb_row_free_internal(KdbRow *row) {
     if (!row || !row->fields) return;
-    for (uint32_t i = 0; i < row->field_count; i++) {
-        free((void *)row->fields[i].name);
-        if (row->fields[i].type == KDB_TYPE_STRING)
-            free((void *)row->fields[i].v.as_string);
-        else if (row->fields[i].type == KDB_TYPE_BLOB)
-            free((void *)row->fields[i].v.as_blob.data);
-    }
+    
     free(row->fields);
     row->fields      = NULL;
     row->field_count = 0;
@@ -687,6 +1094,15 @@ KdbStatus kdb_row_get_string(const KdbRow *row, const char *col, const char **ou
     return KDB_OK;
 }
 
+KdbStatus kdb_row_get_blob(const KdbRow *row, const char *col, const void **data, size_t *len) {
+    const KdbField *f = kdb_row_get(row, col);
+    if (!f)                          { kdb_err_field_not_found(col, "row"); return KDB_ERR_NOT_FOUND; }
+    if (f->type != KDB_TYPE_BLOB)    { kdb_err_bad_type(col, KDB_TYPE_BLOB, (KdbType)f->type); return KDB_ERR_BAD_TYPE; }
+    *data = f->v.as_blob.data;
+    *len  = f->v.as_blob.len;
+    return KDB_OK;
+}
+
 
 void kdb_row_print(const KdbRow *row, FILE *fp) {
     if (!row || !fp) return;
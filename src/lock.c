@@ -14,22 +14,7 @@ void kdb_lock_path(const char *table_path, char *out_buf, size_t out_size) {
 }
 
 
-KdbStatus kdb_lock_acquire(KdbLock *lock, const char *table_path, int wait) {
-    if (!lock || !table_path) {
-        kdb_err_null_arg("lock/table_path", "kdb_lock_acquire");
-        return KDB_ERR_BAD_ARG;
-    }
-
-    kdb_lock_path(table_path, lock->path, sizeof(lock->path));
-
-    
-    int fd = open(lock->path, O_RDWR | O_CREAT, 0600);
-    if (fd < 0) {
-        kdb_err_io(lock->path, "open lock file");
-        return KDB_ERR_IO;
-    }
-
-    
+static KdbStatus kdb__lock_fd(KdbLock *lock, int fd, const char *table_path, int wait) {
     struct flock fl;
     memset(&fl, 0, sizeof(fl));
     fl.l_type   = F_WRLCK;
@@ -39,9 +24,11 @@ KdbStatus kdb_lock_acquire(KdbLock *lock, const char *table_path, int wait) {
 
     int cmd = wait ? F_SETLKW : F_SETLK;
     if (fcntl(fd, cmd, &fl) < 0) {
-        close(fd);
+        int err = errno;
+        if (!lock->keep_open) close(fd);
         lock->fd = -1;
-        if (errno == EACCES || errno == EAGAIN) {
+        kdb_lock_path(table_path, lock->path, sizeof(lock->path));
+        if (err == EACCES || err == EAGAIN) {
             kdb_err_io_locked(lock->path);
             return KDB_ERR_LOCKED;
         }
@@ -53,6 +40,49 @@ KdbStatus kdb_lock_acquire(KdbLock *lock, const char *table_path, int wait) {
     return KDB_OK;
 }
 
+KdbStatus kdb_lock_acquire(KdbLock *lock, const char *table_path, int wait) {
+    if (!lock || !table_path) {
+        kdb_err_null_arg("lock/table_path", "kdb_lock_acquire");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    kdb_lock_path(table_path, lock->path, sizeof(lock->path));
+    lock->keep_open = 0;
+
+    
+    int fd = open(lock->path, O_RDWR | O_CREAT, 0600);
+    if (fd < 0) {
+        kdb_err_io(lock->path, "open lock file");
+        return KDB_ERR_IO;
+    }
+
+    return kdb__lock_fd(lock, fd, table_path, wait);
+}
+
+KdbStatus kdb_lock_acquire_cached(KdbLock    *lock,
+                                  int        *fd_cache,
+                                  const char *table_path,
+                                  int         wait) {
+    if (!lock || !fd_cache || !table_path) {
+        kdb_err_null_arg("lock/fd_cache/table_path", "kdb_lock_acquire_cached");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    
+    if (*fd_cache < 0) {
+        kdb_lock_path(table_path, lock->path, sizeof(lock->path));
+        int fd = open(lock->path, O_RDWR | O_CREAT | O_CLOEXEC, 0600);
+        if (fd < 0) {
+            kdb_err_io(lock->path, "open lock file");
+            return KDB_ERR_IO;
+        }
+        *fd_cache = fd;
+    }
+
+    lock->keep_open = 1;
+    return kdb__lock_fd(lock, *fd_cache, table_path, wait);
+}
+
 void kdb_lock_release(KdbLock *lock) {
     if (!lock || lock->fd < 0) return;
 
@@ -64,7 +94,7 @@ void kdb_lock_release(KdbLock *lock) {
     fl.l_len    = 0;
 
     fcntl(lock->fd, F_SETLK, &fl);
-    close(lock->fd);
+    if (!lock->keep_open) close(lock->fd);
     lock->fd = -1;
 }
 
@@ -73,6 +103,28 @@ int kdb_lock_is_held(const KdbLock *lock) {
 }
 
 
+void kdb_temp_path(const char *dest_path, char *out_buf, size_t out_size) {
+    snprintf(out_buf, out_size, "%s.%ld.tmp", dest_path, (long)getpid());
+}
+
+void kdb_fsync_parent_dir(const char *path) {
+    char dir_path[4096];
+    KDB_STRLCPY(dir_path, path, sizeof(dir_path));
+    
+    char *last_slash = strrchr(dir_path, '/');
+    if (last_slash) {
+        *last_slash = '\0';
+    } else {
+        dir_path[0] = '.'; dir_path[1] = '\0';
+    }
+
+    int dir_fd = open(dir_path, O_RDONLY);
+    if (dir_fd >= 0) {
+        fsync(dir_fd);   
+        close(dir_fd);
+    }
+}
+
 KdbStatus kdb_atomic_write(const char    *dest_path,
                            const uint8_t *data,
                            size_t         len) {
@@ -83,30 +135,37 @@ KdbStatus kdb_atomic_write(const char    *dest_path,
 
     
     char tmp_path[4096];
-    snprintf(tmp_path, sizeof(tmp_path), "%s.tmp", dest_path);
+    kdb_temp_path(dest_path, tmp_path, sizeof(tmp_path));
 
     
-    FILE *fp = fopen(tmp_path, "wb");
-    if (!fp) {
-        kdb_err_io(tmp_path, "fopen");
+    int fd = open(tmp_path, O_WRONLY | O_CREAT | O_TRUNC, 0644);
+    if (fd < 0) {
+        kdb_err_io(tmp_path, "open");
         return KDB_ERR_IO;
     }
 
-    if (fwrite(data, 1, len, fp) != len) {
-        fclose(fp);
-        unlink(tmp_path);
-        kdb_err_io(tmp_path, "fwrite");
-        return KDB_ERR_IO;
+    
+    size_t done = 0;
+    while (done < len) {
+        ssize_t n = write(fd, data + done, len - done);
+        if (n < 0 && errno == EINTR) continue;
+        if (n <= 0) {
+            close(fd);
+            unlink(tmp_path);
+            kdb_err_io(tmp_path, "write");
+            return KDB_ERR_IO;
+        }
+        done += (size_t)n;
     }
 
     
-    if (fflush(fp) != 0 || fsync(fileno(fp)) != 0) {
-        fclose(fp);
+    if (fsync(fd) != 0) {
+        close(fd);
         unlink(tmp_path);
         kdb_err_io(tmp_path, "fsync");
         return KDB_ERR_IO;
     }
-    fclose(fp);
+    close(fd);
 
     
     if (rename(tmp_path, dest_path) != 0) {
@@ -115,22 +174,6 @@ KdbStatus kdb_atomic_write(const char    *dest_path,
         return KDB_ERR_IO;
     }
 
-    
-    char dir_path[4096];
-    KDB_STRLCPY(dir_path, dest_path, sizeof(dir_path));
-    
-    char *last_slash = strrchr(dir_path, '/');
-    if (last_slash) {
-        *last_slash = '\0';
-    } else {
-        dir_path[0] = '.'; dir_path[1] = '\0';
-    }
-
-    int dir_fd = open(dir_path, O_RDONLY);
-    if (dir_fd >= 0) {
-        fsync(dir_fd);   
-        close(dir_fd);
-    }
-
+    kdb_fsync_parent_dir(dest_path);
     return KDB_OK;
 }
\ No newline at end of file
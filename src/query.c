@@ -13,12 +13,100 @@ void kdb_query_init(KdbQuery *q) {
     memset(q, 0, sizeof(*q));
 }
 
+static KdbStatus kdb__filter_value(const char  *raw,
+                                   KdbOperator  op,
+                                   KdbType      col_type,
+                                   KdbValue    *out) {
+    if (op == KDB_OP_CONTAINS || op == KDB_OP_STARTSWITH || op == KDB_OP_ENDSWITH)
+        return kdb_value_from_string(raw, KDB_TYPE_STRING, out);
+
+    
+    KdbType want = kdb_type_infer(raw);
+    if (want != KDB_TYPE_NULL) {
+        switch (col_type) {
+            case KDB_TYPE_STRING:
+                want = KDB_TYPE_STRING;
+                break;
+            case KDB_TYPE_INT:
+                if (want == KDB_TYPE_BOOL && kdb_str_is_int(raw)) want = KDB_TYPE_INT;
+                break;
+            case KDB_TYPE_FLOAT:
+                if (want == KDB_TYPE_INT || (want == KDB_TYPE_BOOL && kdb_str_is_int(raw)))
+                    want = KDB_TYPE_FLOAT;
+                break;
+            default:
+                break;
+        }
+    }
+    return kdb_value_from_string(raw, want, out);
+}
+
+static int kdb__op_cost(KdbOperator op) {
+    switch (op) {
+        case KDB_OP_EQ:
+        case KDB_OP_IN:
+        case KDB_OP_IS_NULL:
+        case KDB_OP_IS_NOT_NULL: return 0;
+        case KDB_OP_NEQ:
+        case KDB_OP_GT:
+        case KDB_OP_GTE:
+        case KDB_OP_LT:
+        case KDB_OP_LTE:
+        case KDB_OP_BETWEEN:     return 1;
+        case KDB_OP_STARTSWITH:
+        case KDB_OP_ENDSWITH:    return 2;
+        default:                 return 3;
+    }
+}
+
+
+static void kdb__query_place_last(KdbQuery *q) {
+    uint32_t  pos  = q->count;
+    int       cost = kdb__op_cost(q->filters[pos].op);
+    while (pos > 0 && kdb__op_cost(q->filters[pos - 1].op) > cost) pos--;
+
+    if (pos < q->count) {
+        KdbFilter f = q->filters[q->count];
+        memmove(&q->filters[pos + 1], &q->filters[pos],
+                (q->count - pos) * sizeof(KdbFilter));
+        q->filters[pos] = f;
+    }
+    q->count++;
+}
+
 KdbStatus kdb_query_add_filter(KdbQuery   *q,
                                const char *key,
                                const char *raw_value,
                                const char *raw_value2) {
+    return kdb_query_add_filter_typed(q, key, raw_value, raw_value2, KDB_TYPE_UNKNOWN);
+}
+
+KdbStatus kdb_query_add_filter_typed(KdbQuery   *q,
+                                     const char *key,
+                                     const char *raw_value,
+                                     const char *raw_value2,
+                                     KdbType     col_type) {
     if (!q || !key) {
-        kdb_err_null_arg("q/key", "kdb_query_add_filter");
+        kdb_err_null_arg("q/key", "kdb_query_add_filter_typed");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    char        col_name[KDB_MAX_NAME_LEN];
+    KdbOperator op;
+    KdbStatus   st = kdb_parse_filter_key(key, col_name, &op);
+    if (st != KDB_OK) return st;
+
+    return kdb_query_add_filter_op(q, col_name, op, raw_value, raw_value2, col_type);
+}
+
+KdbStatus kdb_query_add_filter_op(KdbQuery    *q,
+                                  const char  *col_name,
+                                  KdbOperator  op,
+                                  const char  *raw_value,
+                                  const char  *raw_value2,
+                                  KdbType      col_type) {
+    if (!q || !col_name) {
+        kdb_err_null_arg("q/col_name", "kdb_query_add_filter_op");
         return KDB_ERR_BAD_ARG;
     }
     if (q->count >= KDB_MAX_FILTER_KEYS) {
@@ -31,14 +119,12 @@ KdbStatus kdb_query_add_filter(KdbQuery   *q,
 
     KdbFilter *f = &q->filters[q->count];
     memset(f, 0, sizeof(*f));
-
-    KdbStatus st = kdb_parse_filter_key(key, f->col_name, &f->op);
-    if (st != KDB_OK) return st;
+    KDB_STRLCPY(f->col_name, col_name, KDB_MAX_NAME_LEN);
+    f->op = op;
 
     
     if (raw_value) {
-        KdbType hint = kdb_type_infer(raw_value);
-        st = kdb_value_from_string(raw_value, hint, &f->value);
+        KdbStatus st = kdb__filter_value(raw_value, f->op, col_type, &f->value);
         if (st != KDB_OK) return st;
     } else {
         kdb_value_from_null(&f->value);
@@ -46,8 +132,7 @@ KdbStatus kdb_query_add_filter(KdbQuery   *q,
 
     
     if (raw_value2 && f->op == KDB_OP_BETWEEN) {
-        KdbType hint2 = kdb_type_infer(raw_value2);
-        st = kdb_value_from_string(raw_value2, hint2, &f->value2);
+        KdbStatus st = kdb__filter_value(raw_value2, f->op, col_type, &f->value2);
         if (st != KDB_OK) {
             kdb_value_free(&f->value);
             return st;
@@ -56,7 +141,7 @@ KdbStatus kdb_query_add_filter(KdbQuery   *q,
         kdb_value_from_null(&f->value2);
     }
 
-    q->count++;
+    kdb__query_place_last(q);
     return KDB_OK;
 }
 
@@ -93,7 +178,7 @@ KdbStatus kdb_query_add_filter_value(KdbQuery       *q,
         kdb_value_from_null(&f->value2);
     }
 
-    q->count++;
+    kdb__query_place_last(q);
     return KDB_OK;
 }
 
@@ -111,28 +196,181 @@ int kdb_query_is_empty(const KdbQuery *q) {
 }
 
 
-int kdb_query_matches(const KdbQuery *q, const KdbRecord *r) {
-    if (!q || !r) return 0;
+static int kdb__predicate_range(const KdbFilter *f, int64_t *lo_out, int64_t *hi_out) {
+    if (f->value.type != KDB_TYPE_INT) return 0;
+    int64_t v  = f->value.v.as_int;
+    int64_t lo = INT64_MIN;
+    int64_t hi = INT64_MAX;
+
+    switch (f->op) {
+        case KDB_OP_GT:
+            if (v == INT64_MAX) { lo = INT64_MAX; hi = INT64_MIN; }
+            else                lo = v + 1;
+            break;
+        case KDB_OP_GTE:
+            lo = v;
+            break;
+        case KDB_OP_LT:
+            if (v == INT64_MIN) { lo = INT64_MAX; hi = INT64_MIN; }
+            else                hi = v - 1;
+            break;
+        case KDB_OP_LTE:
+            hi = v;
+            break;
+        case KDB_OP_BETWEEN:
+            if (f->value2.type != KDB_TYPE_INT) return 0;
+            lo = v;
+            hi = f->value2.v.as_int;
+            break;
+        default:
+            return 0;
+    }
+    *lo_out = lo;
+    *hi_out = hi;
+    return 1;
+}
+
+void kdb_predicate_init(KdbPredicate *p, const KdbQuery *q, const KdbTable *tbl) {
+    if (!p) return;
+    p->query         = q;
+    p->literal_count = 0;
+    memset(p->slots, 0, sizeof(p->slots));
+    int builtin_id = !tbl || !kdb_table_get_column(tbl, "id");
+    for (uint32_t i = 0; q && i < q->count; i++) {
+        const KdbFilter *f = &q->filters[i];
+        p->name_lens[i]  = (uint8_t)strlen(f->col_name);
+        p->ranged[i]     = (uint8_t)kdb__predicate_range(f, &p->range_lo[i], &p->range_hi[i]);
+        p->builtin_id[i] = (uint8_t)(builtin_id && strcmp(f->col_name, "id") == 0);
+        if (p->builtin_id[i]) continue;
+
+        
+        if (f->value.type == KDB_TYPE_STRING && f->value.v.as_string.len > 0 &&
+            (f->op == KDB_OP_EQ || f->op == KDB_OP_CONTAINS ||
+             f->op == KDB_OP_STARTSWITH || f->op == KDB_OP_ENDSWITH))
+            p->literals[p->literal_count++] = (uint8_t)i;
+    }
+}
+
+int kdb_predicate_may_match_raw(const KdbPredicate *p, const uint8_t *body, size_t size) {
+    if (!p || !p->query || size < KDB_RECORD_FIXED_SIZE) return 1;
+    if (body[KDB_RECORD_DELETED_AT + 1] != KDB_RECORD_FORMAT_COMPACT) return 1;
+
+    const uint8_t *fields = body + KDB_RECORD_FIXED_SIZE;
+    size_t         len    = size - KDB_RECORD_FIXED_SIZE;
+    for (uint32_t i = 0; i < p->literal_count; i++) {
+        const KdbValue *v = &p->query->filters[p->literals[i]].value;
+        if (!memmem(fields, len, v->v.as_string.data, v->v.as_string.len)) return 0;
+    }
+    return 1;
+}
+
+
+static int kdb__builtin_id_matches(const KdbFilter *f, uint64_t id) {
+    KdbValue id_value;
+    kdb_value_from_int((int64_t)id, &id_value);
+    return kdb_value_matches(&id_value, f->op, &f->value, &f->value2);
+}
+
+
+int kdb_predicate_matches(KdbPredicate *p, const KdbRecord *r) {
+    if (!p || !p->query || !r) return 0;
     if (r->deleted) return 0;
-    if (q->count == 0) return 1; 
 
+    const KdbQuery *q = p->query;
     for (uint32_t i = 0; i < q->count; i++) {
-        const KdbFilter *f     = &q->filters[i];
-        const KdbRecordField  *field = kdb_record_get_field(r, f->col_name);
+        const KdbFilter      *f     = &q->filters[i];
+        const KdbRecordField *field = NULL;
 
         
+        if (p->builtin_id[i]) {
+            if (!kdb__builtin_id_matches(f, r->id)) return 0;
+            continue;
+        }
+
+        
+        uint32_t slot = p->slots[i];
+        if (slot < r->field_count && strcmp(r->fields[slot].col_name, f->col_name) == 0) {
+            field = &r->fields[slot];
+        } else {
+            for (uint32_t j = 0; j < r->field_count; j++) {
+                if (strcmp(r->fields[j].col_name, f->col_name) == 0) {
+                    field       = &r->fields[j];
+                    p->slots[i] = j;
+                    break;
+                }
+            }
+        }
+
         if (!field) {
-            if (f->op == KDB_OP_IS_NULL)     { continue; }
-            if (f->op == KDB_OP_IS_NOT_NULL) { return 0; }
-            return 0; 
+            if (f->op != KDB_OP_IS_NULL) return 0;
+            continue;
         }
 
+        if (p->ranged[i] && field->value.type == KDB_TYPE_INT) {
+            int64_t v = field->value.v.as_int;
+            if (v < p->range_lo[i] || v > p->range_hi[i]) return 0;
+            continue;
+        }
         if (!kdb_value_matches(&field->value, f->op, &f->value, &f->value2))
             return 0;
     }
     return 1;
 }
 
+int kdb_predicate_matches_view(KdbPredicate       *p,
+                               uint64_t            id,
+                               const KdbFieldView *fields,
+                               uint32_t            count) {
+    if (!p || !p->query || (!fields && count > 0)) return 0;
+
+    const KdbQuery *q = p->query;
+    for (uint32_t i = 0; i < q->count; i++) {
+        const KdbFilter    *f     = &q->filters[i];
+        const KdbFieldView *field = NULL;
+        uint32_t            len   = p->name_lens[i];
+
+        if (p->builtin_id[i]) {
+            if (!kdb__builtin_id_matches(f, id)) return 0;
+            continue;
+        }
+
+        uint32_t slot = p->slots[i];
+        if (slot < count && fields[slot].name_len == len &&
+            memcmp(fields[slot].name, f->col_name, len) == 0) {
+            field = &fields[slot];
+        } else {
+            for (uint32_t j = 0; j < count; j++) {
+                if (fields[j].name_len == len && memcmp(fields[j].name, f->col_name, len) == 0) {
+                    field       = &fields[j];
+                    p->slots[i] = j;
+                    break;
+                }
+            }
+        }
+
+        if (!field) {
+            if (f->op != KDB_OP_IS_NULL) return 0;
+            continue;
+        }
+
+        if (p->ranged[i] && field->value.type == KDB_TYPE_INT) {
+            int64_t v = field->value.v.as_int;
+            if (v < p->range_lo[i] || v > p->range_hi[i]) return 0;
+            continue;
+        }
+        if (!kdb_value_matches(&field->value, f->op, &f->value, &f->value2))
+            return 0;
+    }
+    return 1;
+}
+
+int kdb_query_matches(const KdbQuery *q, const KdbRecord *r) {
+    if (!q || !r) return 0;
+    KdbPredicate p;
+    kdb_predicate_init(&p, q, NULL);
+    return kdb_predicate_matches(&p, r);
+}
+
 
 KdbStatus kdb_result_init(KdbResult *res, size_t initial_capacity) {
     if (!res) return KDB_ERR_BAD_ARG;
@@ -170,6 +408,7 @@ KdbStatus kdb_result_append(KdbResult *res, const KdbRecord *r) {
     if (r->field_count > 0) {
         dst->fields = (KdbRecordField *)calloc(r->field_count, sizeof(KdbRecordField));
         if (!dst->fields) { kdb_err_oom("result record fields"); return KDB_ERR_OOM; }
+        dst->field_capacity = (uint16_t)KDB_MIN(r->field_count, (uint32_t)UINT16_MAX);
 
         for (uint32_t i = 0; i < r->field_count; i++) {
             KDB_STRLCPY(dst->fields[i].col_name, r->fields[i].col_name, KDB_MAX_NAME_LEN);
@@ -200,22 +439,28 @@ void kdb_result_free(KdbResult *res) {
 }
 
 
-static const char *kdb__sort_col    = NULL;
-static int         kdb__sort_asc    = 1;
+typedef struct {
+    const KdbValue *value;
+    size_t          pos;
+} KdbSortKey;
 
-static int kdb__sort_cmp(const void *a, const void *b) {
-    const KdbRecord *ra = (const KdbRecord *)a;
-    const KdbRecord *rb = (const KdbRecord *)b;
+static int kdb__sort_key_cmp(const KdbSortKey *ka, const KdbSortKey *kb, int asc) {
+    int cmp;
+    if (!ka->value && !kb->value) cmp = 0;
+    else if (!ka->value)          cmp = -1;
+    else if (!kb->value)          cmp = 1;
+    else                          cmp = kdb_value_compare(ka->value, kb->value);
 
-    const KdbRecordField *fa = kdb_record_get_field(ra, kdb__sort_col);
-    const KdbRecordField *fb = kdb_record_get_field(rb, kdb__sort_col);
+    if (cmp != 0) return asc ? cmp : -cmp;
+    return (ka->pos > kb->pos) - (ka->pos < kb->pos);
+}
 
-    if (!fa && !fb) return 0;
-    if (!fa)        return kdb__sort_asc ? -1 :  1;
-    if (!fb)        return kdb__sort_asc ?  1 : -1;
+static int kdb__sort_asc_cmp(const void *a, const void *b) {
+    return kdb__sort_key_cmp((const KdbSortKey *)a, (const KdbSortKey *)b, 1);
+}
 
-    int cmp = kdb_value_compare(&fa->value, &fb->value);
-    return kdb__sort_asc ? cmp : -cmp;
+static int kdb__sort_desc_cmp(const void *a, const void *b) {
+    return kdb__sort_key_cmp((const KdbSortKey *)a, (const KdbSortKey *)b, 0);
 }
 
 KdbStatus kdb_result_sort(KdbResult  *res,
@@ -224,10 +469,28 @@ KdbStatus kdb_result_sort(KdbResult  *res,
     if (!res || !col_name) return KDB_ERR_BAD_ARG;
     if (res->count == 0)   return KDB_OK;
 
-    kdb__sort_col = col_name;
-    kdb__sort_asc = ascending;
-    qsort(res->rows, res->count, sizeof(KdbRecord), kdb__sort_cmp);
-    kdb__sort_col = NULL;
+    
+    KdbSortKey *keys   = (KdbSortKey *)malloc(res->count * sizeof(KdbSortKey));
+    KdbRecord  *sorted = (KdbRecord *)malloc(KDB_MAX(res->capacity, res->count) * sizeof(KdbRecord));
+    if (!keys || !sorted) {
+        free(keys);
+        free(sorted);
+        kdb_err_oom("sort keys");
+        return KDB_ERR_OOM;
+    }
+    for (size_t i = 0; i < res->count; i++) {
+        const KdbRecordField *f = kdb_record_get_field(&res->rows[i], col_name);
+        keys[i].value = f ? &f->value : NULL;
+        keys[i].pos   = i;
+    }
+    qsort(keys, res->count, sizeof(KdbSortKey), ascending ? kdb__sort_asc_cmp : kdb__sort_desc_cmp);
+
+    for (size_t i = 0; i < res->count; i++)
+        sorted[i] = res->rows[keys[i].pos];
+    free(keys);
+    free(res->rows);
+    res->rows     = sorted;
+    res->capacity = KDB_MAX(res->capacity, res->count);
     return KDB_OK;
 }
 
@@ -283,17 +546,215 @@ void kdb_result_print(const KdbResult *res, FILE *fp) {
 
 
 typedef struct {
-    const KdbQuery *query;
-    KdbResult      *result;
-    int             stop_after_one;
+    KdbPredicate    pred;
+    KdbScanCallback callback;
+    void           *user_data;
+    size_t         *count_only;
+    KdbStatus       status;
+    KdbRecordField  borrowed[KDB_MAX_COLUMNS];
+} KdbEachCtx;
+
+static int kdb__each_candidate_cb(const KdbRecord *r, uint64_t offset, void *ud) {
+    KdbEachCtx *ctx = (KdbEachCtx *)ud;
+    KDB_UNUSED(offset);
+    return ctx->callback(r, ctx->user_data);
+}
+
+static int kdb__each_raw_cb(const uint8_t *body, uint32_t size, uint64_t offset, void *ud) {
+    KdbEachCtx *ctx = (KdbEachCtx *)ud;
+    KDB_UNUSED(offset);
+
+    if (!kdb_predicate_may_match_raw(&ctx->pred, body, size)) return 1;
+
+    
+    KdbFieldView view[KDB_MAX_COLUMNS];
+    uint64_t     id      = 0;
+    uint8_t      deleted = 0;
+    int          n       = kdb_record_view_fields(body, size, view, KDB_MAX_COLUMNS);
+    if (n >= 0) {
+        kdb_record_peek_header(body, size, &id, &deleted, NULL);
+        if (deleted || !kdb_predicate_matches_view(&ctx->pred, id, view, (uint32_t)n))
+            return 1;
+        if (ctx->count_only) {
+            (*ctx->count_only)++;
+            return 1;
+        }
+
+        
+        KdbRecord r;
+        kdb_record_borrow_view(body, view, (uint32_t)n, ctx->borrowed, &r);
+        return ctx->callback(&r, ctx->user_data);
+    }
+
+    KdbRecord *r = kdb_record_deserialize(body, size, NULL);
+    if (!r) {
+        if (kdb_last_status() == KDB_ERR_CORRUPT) return 1;
+        ctx->status = kdb_last_status();
+        return 0;
+    }
+
+    int cont = 1;
+    if (!r->deleted && kdb_predicate_matches(&ctx->pred, r))
+        cont = ctx->callback(r, ctx->user_data);
+    kdb_record_free(r);
+    return cont;
+}
+
+static int kdb__id_filter(const KdbTable *tbl, const KdbFilter *f) {
+    return f->op == KDB_OP_EQ && f->value.type == KDB_TYPE_INT &&
+           strcmp(f->col_name, "id") == 0 && !kdb_table_get_column(tbl, "id");
+}
+
+static KdbIndex *kdb__filter_index(const KdbTable *tbl, const KdbFilter *f) {
+    switch (f->op) {
+        case KDB_OP_EQ:
+            return kdb_index_find(tbl->indices, tbl->index_count, f->col_name);
+        case KDB_OP_CONTAINS:
+        case KDB_OP_STARTSWITH:
+        case KDB_OP_ENDSWITH:
+            if (f->value.type != KDB_TYPE_STRING ||
+                f->value.v.as_string.len < KDB_TRIGRAM_MIN_LEN)
+                return NULL;
+            return kdb_index_find_kind(tbl->indices, tbl->index_count,
+                                       f->col_name, KDB_INDEX_TRIGRAM);
+        default:
+            return NULL;
+    }
+}
+
+KdbStatus kdb_query_each_candidate(KdbTable             *tbl,
+                                   const KdbQuery       *q,
+                                   KdbScanOffsetCallback callback,
+                                   void                 *user_data,
+                                   int                  *handled) {
+    if (!tbl || !q || !callback || !handled) {
+        kdb_err_null_arg("tbl/q/callback/handled", "kdb_query_each_candidate");
+        return KDB_ERR_BAD_ARG;
+    }
+    *handled = 0;
+
+    
+    uint64_t *best       = NULL;
+    size_t    best_count = 0;
+    int       have_best  = 0;
+    for (uint32_t i = 0; i < q->count; i++) {
+        const KdbFilter *f = &q->filters[i];
+
+        uint64_t *offsets = NULL;
+        size_t    found   = 0;
+        if (kdb__id_filter(tbl, f)) {
+            uint64_t  offset = 0;
+            KdbStatus st     = (f->value.v.as_int < 0)
+                ? KDB_ERR_NOT_FOUND
+                : kdb_storage_offset_of(tbl, (uint64_t)f->value.v.as_int, &offset);
+            if (st == KDB_OK) {
+                offsets = (uint64_t *)malloc(sizeof(uint64_t));
+                if (!offsets) st = KDB_ERR_OOM;
+                else { offsets[0] = offset; found = 1; }
+            }
+            if (st != KDB_OK && st != KDB_ERR_NOT_FOUND) { free(best); return st; }
+        } else {
+            KdbIndex *idx = kdb__filter_index(tbl, f);
+            if (!idx) continue;
+            KdbStatus st = kdb_index_candidates(idx, &f->value, &offsets, &found);
+            if (st != KDB_OK) { free(best); return st; }
+        }
+
+        if (!have_best || found < best_count) {
+            free(best);
+            best       = offsets;
+            best_count = found;
+            have_best  = 1;
+        } else {
+            free(offsets);
+        }
+        if (best_count == 0) break;
+    }
+
+    
+    if (!have_best || best_count * 4 > tbl->header.record_count) {
+        free(best);
+        return KDB_OK;
+    }
+
+    *handled = 1;
+    KdbPredicate pred;
+    kdb_predicate_init(&pred, q, tbl);
+    for (size_t i = 0; i < best_count; i++) {
+        KdbRecord *r = kdb_storage_read_at(tbl, best[i]);
+        if (!r) {
+            if (kdb_last_status() == KDB_ERR_CORRUPT) continue;
+            free(best);
+            return kdb_last_status();
+        }
+        int cont = 1;
+        if (kdb_predicate_matches(&pred, r))
+            cont = callback(r, best[i], user_data);
+        kdb_record_free(r);
+        if (!cont) break;
+    }
+    free(best);
+    return KDB_OK;
+}
+
+
+static KdbStatus kdb__query_each(KdbTable       *tbl,
+                                 const KdbQuery *q,
+                                 KdbEachCtx     *ctx) {
+    int       handled = 0;
+    KdbStatus st      = kdb_query_each_candidate(tbl, q, kdb__each_candidate_cb, ctx, &handled);
+    if (handled || st != KDB_OK) return st;
+
+    kdb_predicate_init(&ctx->pred, q, tbl);
+    st = kdb_storage_scan_raw(tbl, kdb__each_raw_cb, ctx);
+    return st != KDB_OK ? st : ctx->status;
+}
+
+KdbStatus kdb_query_each(KdbTable       *tbl,
+                         const KdbQuery *q,
+                         KdbScanCallback callback,
+                         void           *user_data) {
+    if (!tbl || !q || !callback) {
+        kdb_err_null_arg("tbl/q/callback", "kdb_query_each");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    
+    if (q->count == 0)
+        return kdb_storage_scan(tbl, callback, user_data);
+
+    KdbEachCtx ctx = { .callback = callback, .user_data = user_data };
+    return kdb__query_each(tbl, q, &ctx);
+}
+
+static int kdb__first_hit_cb(const KdbRecord *r, uint64_t offset, void *ud) {
+    KDB_UNUSED(r);
+    KDB_UNUSED(offset);
+    *(int *)ud = 1;
+    return 0;
+}
+
+int kdb_query_may_match(KdbTable *tbl, const KdbQuery *q) {
+    if (!tbl || !q) return 1;
+
+    int       hit     = 0;
+    int       handled = 0;
+    KdbStatus st      = kdb_query_each_candidate(tbl, q, kdb__first_hit_cb, &hit, &handled);
+    return st != KDB_OK || !handled || hit;
+}
+
+
+typedef struct {
+    KdbResult *result;
+    KdbStatus  status;
+    int        stop_after_one;
 } KdbExecCtx;
 
-static int kdb__exec_scan_cb(const KdbRecord *r, void *ud) {
+static int kdb__exec_cb(const KdbRecord *r, void *ud) {
     KdbExecCtx *ctx = (KdbExecCtx *)ud;
-    if (!kdb_query_matches(ctx->query, r)) return 1;
-    kdb_result_append(ctx->result, r);
-    if (ctx->stop_after_one) return 0;
-    return 1;
+    ctx->status = kdb_result_append(ctx->result, r);
+    if (ctx->status != KDB_OK) return 0;
+    return !ctx->stop_after_one;
 }
 
 KdbStatus kdb_query_execute(KdbTable       *tbl,
@@ -307,32 +768,9 @@ KdbStatus kdb_query_execute(KdbTable       *tbl,
     KdbStatus st = kdb_result_init(res_out, 16);
     if (st != KDB_OK) return st;
 
-    
-
-    if (q->count == 1 && q->filters[0].op == KDB_OP_EQ && tbl->index_count > 0) {
-        const KdbFilter *f   = &q->filters[0];
-        KdbIndex        *idx = kdb_index_find(tbl->indices, tbl->index_count, f->col_name);
-        if (idx) {
-            uint64_t offsets[KDB_INDEX_BUCKETS];
-            size_t   found = 0;
-            KdbStatus ist = kdb_index_lookup(idx, &f->value, offsets, KDB_INDEX_BUCKETS, &found);
-            if (ist == KDB_OK) {
-                for (size_t i = 0; i < found; i++) {
-                    KdbRecord *r = kdb_storage_read_at(tbl, offsets[i]);
-                    if (!r) continue;
-                    if (kdb_query_matches(q, r))
-                        kdb_result_append(res_out, r);
-                    kdb_record_free(r);
-                }
-                return KDB_OK;
-            }
-            
-        }
-    }
-
-    
-    KdbExecCtx ctx = { .query = q, .result = res_out, .stop_after_one = 0 };
-    return kdb_storage_scan(tbl, kdb__exec_scan_cb, &ctx);
+    KdbExecCtx ctx = { .result = res_out, .status = KDB_OK, .stop_after_one = 0 };
+    st = kdb_query_each(tbl, q, kdb__exec_cb, &ctx);
+    return (st != KDB_OK) ? st : ctx.status;
 }
 
 KdbStatus kdb_query_execute_one(KdbTable       *tbl,
@@ -346,8 +784,9 @@ KdbStatus kdb_query_execute_one(KdbTable       *tbl,
     KdbStatus st = kdb_result_init(res_out, 1);
     if (st != KDB_OK) return st;
 
-    KdbExecCtx ctx = { .query = q, .result = res_out, .stop_after_one = 1 };
-    st = kdb_storage_scan(tbl, kdb__exec_scan_cb, &ctx);
+    KdbExecCtx ctx = { .result = res_out, .status = KDB_OK, .stop_after_one = 1 };
+    st = kdb_query_each(tbl, q, kdb__exec_cb, &ctx);
+    if (st == KDB_OK) st = ctx.status;
     if (st != KDB_OK) return st;
 
     if (res_out->count == 0) {
@@ -358,11 +797,9 @@ KdbStatus kdb_query_execute_one(KdbTable       *tbl,
     return KDB_OK;
 }
 
-typedef struct { const KdbQuery *q; size_t count; } KdbCountCtx;
-
 static int kdb__count_cb(const KdbRecord *r, void *ud) {
-    KdbCountCtx *ctx = (KdbCountCtx *)ud;
-    if (kdb_query_matches(ctx->q, r)) ctx->count++;
+    KDB_UNUSED(r);
+    (*(size_t *)ud)++;
     return 1;
 }
 
@@ -374,9 +811,203 @@ KdbStatus kdb_query_count(KdbTable       *tbl,
         return KDB_ERR_BAD_ARG;
     }
     *count_out = 0;
-    KdbCountCtx ctx = { .q = q, .count = 0 };
-    KdbStatus st = kdb_storage_scan(tbl, kdb__count_cb, &ctx);
-    if (st == KDB_OK) *count_out = ctx.count;
+    size_t     count = 0;
+    KdbEachCtx ctx   = { .callback = kdb__count_cb, .user_data = &count, .count_only = &count };
+    KdbStatus  st    = kdb__query_each(tbl, q, &ctx);
+    if (st == KDB_OK) *count_out = count;
+    return st;
+}
+
+KdbStatus kdb_query_count_from(KdbTable       *tbl,
+                               const KdbQuery *q,
+                               uint64_t        start,
+                               size_t         *count_out) {
+    if (!tbl || !q || !count_out) {
+        kdb_err_null_arg("tbl/q/count_out", "kdb_query_count_from");
+        return KDB_ERR_BAD_ARG;
+    }
+    *count_out = 0;
+    size_t     count = 0;
+    KdbEachCtx ctx   = { .callback = kdb__count_cb, .user_data = &count, .count_only = &count };
+    kdb_predicate_init(&ctx.pred, q, tbl);
+    KdbStatus  st    = kdb_storage_scan_raw_from(tbl, start, kdb__each_raw_cb, &ctx);
+    if (st == KDB_OK) st = ctx.status;
+    if (st == KDB_OK) *count_out = count;
+    return st;
+}
+
+
+typedef struct {
+    const char *col_name;
+    size_t      col_len;
+    const char *needle;
+    size_t      needle_len;
+    uint64_t   *ring;
+    size_t      ring_cap;
+    size_t      seen;
+} KdbTextScanCtx;
+
+static size_t kdb__text_score(const KdbRecord *r, const char *col_name,
+                              const char *needle, size_t needle_len) {
+    const KdbRecordField *f = kdb_record_get_field(r, col_name);
+    if (!f || f->value.type != KDB_TYPE_STRING || !f->value.v.as_string.data) return 0;
+
+    const char *hay = f->value.v.as_string.data;
+    size_t      len = f->value.v.as_string.len;
+    if (needle_len == 0) return 1;
+
+    size_t      score = 0;
+    const char *p     = hay;
+    const char *end   = hay + len;
+    while ((size_t)(end - p) >= needle_len) {
+        const char *hit = memmem(p, (size_t)(end - p), needle, needle_len);
+        if (!hit) break;
+        score++;
+        p = hit + needle_len;
+    }
+    return score;
+}
+
+static int kdb__text_column_has(const KdbTextScanCtx *ctx, const uint8_t *body, uint32_t size) {
+    KdbFieldView view[KDB_MAX_COLUMNS];
+    int          n = kdb_record_view_fields(body, size, view, KDB_MAX_COLUMNS);
+    if (n < 0) {
+        KdbRecord *r = kdb_record_deserialize(body, size, NULL);
+        if (!r) return 0;
+        int has = kdb__text_score(r, ctx->col_name, ctx->needle, ctx->needle_len) > 0;
+        kdb_record_free(r);
+        return has;
+    }
+
+    for (int i = 0; i < n; i++) {
+        if (view[i].name_len != ctx->col_len ||
+            memcmp(view[i].name, ctx->col_name, ctx->col_len) != 0)
+            continue;
+        const KdbValue *v = &view[i].value;
+        if (v->type != KDB_TYPE_STRING || !v->v.as_string.data) return 0;
+        return ctx->needle_len == 0 ||
+               memmem(v->v.as_string.data, v->v.as_string.len, ctx->needle, ctx->needle_len) != NULL;
+    }
+    return 0;
+}
+
+static int kdb__text_scan_cb(const uint8_t *body, uint32_t size, uint64_t offset, void *ud) {
+    KdbTextScanCtx *ctx = (KdbTextScanCtx *)ud;
+    if (size < KDB_RECORD_FIXED_SIZE || body[KDB_RECORD_DELETED_AT]) return 1;
+
+    
+    if (ctx->needle_len > 0 &&
+        !memmem(body + KDB_RECORD_FIXED_SIZE, size - KDB_RECORD_FIXED_SIZE,
+                ctx->needle, ctx->needle_len))
+        return 1;
+    if (!kdb__text_column_has(ctx, body, size)) return 1;
+
+    ctx->ring[ctx->seen % ctx->ring_cap] = offset;
+    ctx->seen++;
+    return 1;
+}
+
+static KdbStatus kdb__text_collect(KdbTable *tbl, const char *col_name, KdbTextScanCtx *ctx) {
+    KdbIndex *idx = NULL;
+    if (ctx->needle_len >= KDB_TRIGRAM_MIN_LEN)
+        idx = kdb_index_find_kind(tbl->indices, tbl->index_count, col_name, KDB_INDEX_TRIGRAM);
+    if (!idx) return kdb_storage_scan_raw(tbl, kdb__text_scan_cb, ctx);
+
+    
+    KdbValue needle;
+    kdb_value_from_null(&needle);
+    needle.type             = KDB_TYPE_STRING;
+    needle.v.as_string.data = (char *)ctx->needle;
+    needle.v.as_string.len  = ctx->needle_len;
+
+    uint64_t *offsets = NULL;
+    size_t    found   = 0;
+    KdbStatus st      = kdb_index_candidates(idx, &needle, &offsets, &found);
+    for (size_t i = 0; st == KDB_OK && i < found; i++) {
+        ctx->ring[ctx->seen % ctx->ring_cap] = offsets[i];
+        ctx->seen++;
+    }
+    free(offsets);
+    return st;
+}
+
+typedef struct {
+    KdbRecord *record;
+    size_t     score;
+} KdbTextHit;
+
+static int kdb__text_hit_cmp(const void *a, const void *b) {
+    const KdbTextHit *ha = (const KdbTextHit *)a;
+    const KdbTextHit *hb = (const KdbTextHit *)b;
+    if (ha->score != hb->score) return ha->score > hb->score ? -1 : 1;
+    if (ha->record->id != hb->record->id) return ha->record->id > hb->record->id ? -1 : 1;
+    return 0;
+}
+
+KdbStatus kdb_query_text(KdbTable   *tbl,
+                         const char *col_name,
+                         const char *needle,
+                         size_t      limit,
+                         size_t      max_candidates,
+                         KdbResult  *res_out) {
+    if (!tbl || !col_name || !needle || !res_out) {
+        kdb_err_null_arg("tbl/col_name/needle/res_out", "kdb_query_text");
+        return KDB_ERR_BAD_ARG;
+    }
+    
+    size_t rows = (size_t)KDB_MIN(tbl->header.record_count, (uint64_t)SIZE_MAX);
+    if (limit > rows)          limit          = rows;
+    if (max_candidates > rows) max_candidates = rows;
+    if (max_candidates < limit) max_candidates = limit;
+
+    KdbStatus st = kdb_result_init(res_out, limit ? limit : 1);
+    if (st != KDB_OK) return st;
+    if (limit == 0) return KDB_OK;
+
+    
+    KdbTextScanCtx ctx = {
+        .col_name   = col_name,
+        .col_len    = strlen(col_name),
+        .needle     = needle,
+        .needle_len = strlen(needle),
+        .ring       = (uint64_t *)malloc(max_candidates * sizeof(uint64_t)),
+        .ring_cap   = max_candidates,
+        .seen       = 0
+    };
+    if (!ctx.ring) { kdb_err_oom("text candidate ring"); return KDB_ERR_OOM; }
+
+    st = kdb__text_collect(tbl, col_name, &ctx);
+    size_t kept = KDB_MIN(ctx.seen, ctx.ring_cap);
+    KdbTextHit *hits = NULL;
+    if (st == KDB_OK && kept > 0) {
+        hits = (KdbTextHit *)calloc(kept, sizeof(KdbTextHit));
+        if (!hits) { kdb_err_oom("text hits"); st = KDB_ERR_OOM; }
+    }
+
+    
+    size_t nhits = 0;
+    for (size_t i = 0; hits && i < kept; i++) {
+        uint64_t   off = ctx.ring[(ctx.seen - 1 - i) % ctx.ring_cap];
+        KdbRecord *r   = kdb_storage_read_at(tbl, off);
+        if (!r) {
+            st = kdb_last_status() != KDB_OK ? kdb_last_status() : KDB_ERR_IO;
+            break;
+        }
+        size_t score = r->deleted ? 0 : kdb__text_score(r, col_name, needle, ctx.needle_len);
+        if (score == 0) { kdb_record_free(r); continue; }
+        hits[nhits].record = r;
+        hits[nhits].score  = score;
+        nhits++;
+    }
+    free(ctx.ring);
+
+    if (st == KDB_OK && nhits > 1)
+        qsort(hits, nhits, sizeof(KdbTextHit), kdb__text_hit_cmp);
+    for (size_t i = 0; st == KDB_OK && i < nhits && i < limit; i++)
+        st = kdb_result_append(res_out, hits[i].record);
+
+    for (size_t i = 0; i < nhits; i++) kdb_record_free(hits[i].record);
+    free(hits);
     return st;
 }
 
@@ -19,6 +19,7 @@ KdbRecord *kdb_record_new(uint32_t field_count) {
             free(r);
             return NULL;
         }
+        r->field_capacity = (uint16_t)KDB_MIN(field_count, (uint32_t)UINT16_MAX);
     }
 
     r->field_count = 0;           
@@ -77,38 +78,78 @@ void kdb_record_free_array(KdbRecord *arr, size_t count) {
 }
 
 
-KdbStatus kdb_record_set_field(KdbRecord      *r,
-                               const char     *col_name,
-                               const KdbValue *value) {
-    if (!r || !col_name || !value) {
-        kdb_err_null_arg("r/col_name/value", "kdb_record_set_field");
-        return KDB_ERR_BAD_ARG;
-    }
+static KdbStatus kdb__record_slot(KdbRecord  *r,
+                                  const char *col_name,
+                                  KdbValue  **slot_out,
+                                  int        *added) {
+    *added = 0;
 
     
     for (uint32_t i = 0; i < r->field_count; i++) {
         if (strcmp(r->fields[i].col_name, col_name) == 0) {
             kdb_value_free(&r->fields[i].value);
-            return kdb_value_copy(value, &r->fields[i].value);
+            *slot_out = &r->fields[i].value;
+            return KDB_OK;
         }
     }
 
     
-    KdbRecordField *new_fields = realloc(r->fields,
-                                   (r->field_count + 1) * sizeof(KdbRecordField));
-    if (!new_fields) {
-        kdb_err_oom("KdbRecordField resize");
-        return KDB_ERR_OOM;
+    if (r->field_count >= r->field_capacity) {
+        if (r->field_count >= UINT16_MAX) {
+            kdb_err_bad_arg("col_name", "record has too many fields");
+            return KDB_ERR_FULL;
+        }
+        uint32_t new_cap = KDB_MAX(r->field_count * 2, 4u);
+        new_cap = KDB_MIN(new_cap, (uint32_t)UINT16_MAX);
+        KdbRecordField *new_fields = realloc(r->fields, new_cap * sizeof(KdbRecordField));
+        if (!new_fields) {
+            kdb_err_oom("KdbRecordField resize");
+            return KDB_ERR_OOM;
+        }
+        r->fields         = new_fields;
+        r->field_capacity = (uint16_t)new_cap;
     }
-    r->fields = new_fields;
     memset(&r->fields[r->field_count], 0, sizeof(KdbRecordField));
     KDB_STRLCPY(r->fields[r->field_count].col_name, col_name, KDB_MAX_NAME_LEN);
+    *added    = 1;
+    *slot_out = &r->fields[r->field_count++].value;
+    return KDB_OK;
+}
 
-    KdbStatus st = kdb_value_copy(value, &r->fields[r->field_count].value);
+KdbStatus kdb_record_set_field(KdbRecord      *r,
+                               const char     *col_name,
+                               const KdbValue *value) {
+    if (!r || !col_name || !value) {
+        kdb_err_null_arg("r/col_name/value", "kdb_record_set_field");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    KdbValue *slot  = NULL;
+    int       added = 0;
+    KdbStatus st    = kdb__record_slot(r, col_name, &slot, &added);
     if (st != KDB_OK) return st;
 
-    r->field_count++;
-    r->updated_at = (uint64_t)time(NULL);
+    st = kdb_value_copy(value, slot);
+    if (st != KDB_OK && added) r->field_count--;
+    return st;
+}
+
+KdbStatus kdb_record_take_field(KdbRecord  *r,
+                                const char *col_name,
+                                KdbValue   *value) {
+    if (!r || !col_name || !value) {
+        kdb_err_null_arg("r/col_name/value", "kdb_record_take_field");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    KdbValue *slot  = NULL;
+    int       added = 0;
+    KdbStatus st    = kdb__record_slot(r, col_name, &slot, &added);
+    if (st != KDB_OK) return st;
+
+    *slot = *value;
+    memset(value, 0, sizeof(*value));
+    value->type = KDB_TYPE_NULL;
     return KDB_OK;
 }
 
@@ -131,7 +172,7 @@ KdbStatus kdb_record_set_string(KdbRecord *r, const char *col, const char *v) {
     KdbValue val;
     KdbStatus st = kdb_value_from_string(v, KDB_TYPE_STRING, &val);
     if (st != KDB_OK) return st;
-    st = kdb_record_set_field(r, col, &val);
+    st = kdb_record_take_field(r, col, &val);
     kdb_value_free(&val);
     return st;
 }
@@ -170,6 +211,41 @@ const KdbRecordField *kdb_record_get_field(const KdbRecord *r, const char *col_n
     return NULL;
 }
 
+void kdb_record_order_fields(KdbRecord       *r,
+                             const KdbColumn *columns,
+                             uint32_t         column_count) {
+    if (!r || !columns || column_count == 0) return;
+    if (r->field_count < 2 || r->field_count > KDB_MAX_COLUMNS) return;
+
+    uint32_t rank[KDB_MAX_COLUMNS];
+    int      in_order = 1;
+    for (uint32_t i = 0; i < r->field_count; i++) {
+        rank[i] = column_count + i;
+        for (uint32_t n = 0; n < column_count; n++) {
+            uint32_t c = (i + n) % column_count;
+            if (strcmp(r->fields[i].col_name, columns[c].name) == 0) {
+                rank[i] = c;
+                break;
+            }
+        }
+        if (i > 0 && rank[i] < rank[i - 1]) in_order = 0;
+    }
+    if (in_order) return;
+
+    for (uint32_t i = 1; i < r->field_count; i++) {
+        KdbRecordField f = r->fields[i];
+        uint32_t       k = rank[i];
+        uint32_t       j = i;
+        while (j > 0 && rank[j - 1] > k) {
+            r->fields[j] = r->fields[j - 1];
+            rank[j]      = rank[j - 1];
+            j--;
+        }
+        r->fields[j] = f;
+        rank[j]      = k;
+    }
+}
+
 KdbStatus kdb_record_get_int(const KdbRecord *r, const char *col, int64_t *out) {
     const KdbRecordField *f = kdb_record_get_field(r, col);
     if (!f) { kdb_err_field_not_found(col, "record"); return KDB_ERR_NOT_FOUND; }
@@ -276,7 +352,7 @@ size_t kdb_record_serial_size(const KdbRecord *r) {
 
     for (uint32_t i = 0; i < r->field_count; i++) {
         
-        size += KDB_FIELD_HEADER_SIZE;
+        size += 1 + strlen(r->fields[i].col_name) + 1;
         const KdbValue *v = &r->fields[i].value;
         switch (v->type) {
             case KDB_TYPE_INT:    size += 8; break;
@@ -302,21 +378,17 @@ size_t kdb_record_serialize(const KdbRecord *r, uint8_t *buf, size_t buf_size) {
     write_u64(&p, r->updated_at);
     write_u32(&p, r->field_count);
     write_u8 (&p, r->deleted);
-    write_u8 (&p, 0); write_u8(&p, 0); write_u8(&p, 0); 
+    write_u8 (&p, KDB_RECORD_FORMAT_COMPACT);
+    write_u8 (&p, 0); write_u8(&p, 0);
 
     for (uint32_t i = 0; i < r->field_count; i++) {
         const KdbRecordField *f = &r->fields[i];
 
         
-        uint8_t name_buf[KDB_MAX_NAME_LEN];
-        memset(name_buf, 0, KDB_MAX_NAME_LEN);
-        strncpy((char *)name_buf, f->col_name, KDB_MAX_NAME_LEN - 1);
-        write_bytes(&p, name_buf, KDB_MAX_NAME_LEN);
-
-        
+        size_t name_len = strlen(f->col_name);
+        write_u8(&p, (uint8_t)name_len);
+        write_bytes(&p, f->col_name, name_len);
         write_u8(&p, (uint8_t)f->value.type);
-        write_u8(&p, 0); write_u8(&p, 0); write_u8(&p, 0);
-        write_u8(&p, 0); write_u8(&p, 0); write_u8(&p, 0); write_u8(&p, 0);
 
         
         switch (f->value.type) {
@@ -359,8 +431,12 @@ size_t kdb_record_serialize(const KdbRecord *r, uint8_t *buf, size_t buf_size) {
 KdbRecord *kdb_record_deserialize(const uint8_t *buf,
                                   size_t         buf_size,
                                   size_t        *bytes_read) {
-    if (!buf || buf_size < KDB_RECORD_FIXED_SIZE) {
-        kdb_err_bad_arg("buf", "buffer too small to contain a record");
+    if (!buf) {
+        kdb_err_null_arg("buf", "kdb_record_deserialize");
+        return NULL;
+    }
+    if (buf_size < KDB_RECORD_FIXED_SIZE) {
+        kdb_err_io_corrupt("record: buffer too small to contain a record");
         return NULL;
     }
 
@@ -380,7 +456,14 @@ KdbRecord *kdb_record_deserialize(const uint8_t *buf,
     r->updated_at  = read_u64(&p);
     r->field_count = read_u32(&p);
     r->deleted     = read_u8(&p);
-    p += 3; 
+    uint8_t format = read_u8(&p);
+    p += 2; 
+
+    if (format != KDB_RECORD_FORMAT_LEGACY && format != KDB_RECORD_FORMAT_COMPACT) {
+        kdb_err_io_corrupt("record: unknown record format");
+        kdb_record_free(r);
+        return NULL;
+    }
 
     if (r->field_count > KDB_MAX_COLUMNS) {
         kdb_err_io_corrupt("record: field_count exceeds KDB_MAX_COLUMNS");
@@ -394,18 +477,34 @@ KdbRecord *kdb_record_deserialize(const uint8_t *buf,
         kdb_record_free(r);
         return NULL;
     }
+    r->field_capacity = (uint16_t)r->field_count;
 
     for (uint32_t i = 0; i < r->field_count; i++) {
         KdbRecordField *f = &r->fields[i];
 
-        NEED(KDB_MAX_NAME_LEN);
-        memcpy(f->col_name, p, KDB_MAX_NAME_LEN);
-        f->col_name[KDB_MAX_NAME_LEN - 1] = '\0';
-        p += KDB_MAX_NAME_LEN;
-
-        NEED(8);
-        f->value.type = (KdbType)read_u8(&p);
-        p += 7; 
+        if (format == KDB_RECORD_FORMAT_COMPACT) {
+            NEED(1);
+            size_t name_len = read_u8(&p);
+            if (name_len >= KDB_MAX_NAME_LEN) {
+                kdb_err_io_corrupt("record: field name too long");
+                kdb_record_free(r);
+                return NULL;
+            }
+            NEED(name_len + 1);
+            memcpy(f->col_name, p, name_len);
+            f->col_name[name_len] = '\0';
+            p += name_len;
+            f->value.type = (KdbType)read_u8(&p);
+        } else {
+            NEED(KDB_MAX_NAME_LEN);
+            memcpy(f->col_name, p, KDB_MAX_NAME_LEN);
+            f->col_name[KDB_MAX_NAME_LEN - 1] = '\0';
+            p += KDB_MAX_NAME_LEN;
+
+            NEED(8);
+            f->value.type = (KdbType)read_u8(&p);
+            p += 7; 
+        }
 
         switch (f->value.type) {
             case KDB_TYPE_INT:
@@ -443,9 +542,14 @@ KdbRecord *kdb_record_deserialize(const uint8_t *buf,
             case KDB_TYPE_BLOB: {
                 NEED(4);
                 uint32_t blen = read_u32(&p);
+                if (blen > KDB_MAX_STRING_LEN) {
+                    kdb_err_io_corrupt("record: blob field too long");
+                    kdb_record_free(r);
+                    return NULL;
+                }
                 NEED(blen);
-                uint8_t *blob = malloc(blen);
-                if (!blob && blen > 0) { kdb_err_oom("blob field"); kdb_record_free(r); return NULL; }
+                uint8_t *blob = malloc(blen ? blen : 1);
+                if (!blob) { kdb_err_oom("blob field"); kdb_record_free(r); return NULL; }
                 if (blen > 0) memcpy(blob, p, blen);
                 p += blen;
                 f->value.v.as_blob.data = blob;
@@ -465,34 +569,143 @@ KdbRecord *kdb_record_deserialize(const uint8_t *buf,
 }
 
 
+KdbStatus kdb_record_peek_header(const uint8_t *buf,
+                                 size_t         buf_size,
+                                 uint64_t      *id_out,
+                                 uint8_t       *deleted_out,
+                                 uint8_t       *format_out) {
+    if (!buf || buf_size < KDB_RECORD_FIXED_SIZE) {
+        kdb_err_io_corrupt("record: truncated header");
+        return KDB_ERR_CORRUPT;
+    }
+
+    const uint8_t *p = buf;
+    uint64_t id = read_u64(&p);
+    p += 8 + 8 + 4;
+    if (id_out)      *id_out      = id;
+    if (deleted_out) *deleted_out = p[0];
+    if (format_out)  *format_out  = p[1];
+    return KDB_OK;
+}
+
+void kdb_record_borrow_view(const uint8_t      *buf,
+                            const KdbFieldView *fields,
+                            uint32_t            count,
+                            KdbRecordField     *slots,
+                            KdbRecord          *r_out) {
+    const uint8_t *p = buf;
+    memset(r_out, 0, sizeof(*r_out));
+    r_out->id          = read_u64(&p);
+    r_out->created_at  = read_u64(&p);
+    r_out->updated_at  = read_u64(&p);
+    r_out->field_count = count;
+    r_out->deleted     = buf[KDB_RECORD_DELETED_AT];
+    r_out->fields      = count ? slots : NULL;
+
+    
+    for (uint32_t i = 0; i < count; i++) {
+        memcpy(slots[i].col_name, fields[i].name, fields[i].name_len);
+        slots[i].col_name[fields[i].name_len] = '\0';
+        slots[i].value = fields[i].value;
+    }
+}
+
+int kdb_record_view_fields(const uint8_t *buf,
+                           size_t         buf_size,
+                           KdbFieldView  *fields_out,
+                           uint32_t       max_fields) {
+    if (!buf || !fields_out || buf_size < KDB_RECORD_FIXED_SIZE) return -1;
+
+    const uint8_t *p     = buf + 8 + 8 + 8;
+    const uint8_t *p_end = buf + buf_size;
+    uint32_t       count = read_u32(&p);
+    if (p[1] != KDB_RECORD_FORMAT_COMPACT || count > max_fields) return -1;
+    p += 4;
+
+    
+    for (uint32_t i = 0; i < count; i++) {
+        KdbFieldView *f = &fields_out[i];
+        if (p_end - p < 2) return -1;
+        uint32_t name_len = read_u8(&p);
+        if (name_len >= KDB_MAX_NAME_LEN || (size_t)(p_end - p) < name_len + 1) return -1;
+        f->name     = (const char *)p;
+        f->name_len = name_len;
+        p += name_len;
+
+        memset(&f->value, 0, sizeof(f->value));
+        f->value.type = (KdbType)read_u8(&p);
+        size_t left = (size_t)(p_end - p);
+        switch (f->value.type) {
+            case KDB_TYPE_INT:
+                if (left < 8) return -1;
+                f->value.v.as_int = (int64_t)read_u64(&p);
+                break;
+            case KDB_TYPE_FLOAT: {
+                if (left < 8) return -1;
+                uint64_t bits = read_u64(&p);
+                memcpy(&f->value.v.as_float, &bits, 8);
+                break;
+            }
+            case KDB_TYPE_BOOL:
+                if (left < 1) return -1;
+                f->value.v.as_bool = read_u8(&p);
+                break;
+            case KDB_TYPE_STRING: {
+                if (left < 4) return -1;
+                uint32_t slen = read_u32(&p);
+                if (slen > KDB_MAX_STRING_LEN || left - 4 < (size_t)slen + 1 || p[slen] != 0)
+                    return -1;
+                f->value.v.as_string.data = (char *)p;
+                f->value.v.as_string.len  = slen;
+                p += slen + 1;
+                break;
+            }
+            case KDB_TYPE_BLOB: {
+                if (left < 4) return -1;
+                uint32_t blen = read_u32(&p);
+                if (blen > KDB_MAX_STRING_LEN || left - 4 < blen) return -1;
+                f->value.v.as_blob.data = (uint8_t *)p;
+                f->value.v.as_blob.len  = blen;
+                p += blen;
+                break;
+            }
+            case KDB_TYPE_NULL:
+                break;
+            default:
+                return -1;
+        }
+    }
+    return (int)count;
+}
+
 KdbStatus kdb_record_write(const KdbRecord *r, FILE *fp) {
     if (!r || !fp) {
         kdb_err_null_arg("r/fp", "kdb_record_write");
         return KDB_ERR_BAD_ARG;
     }
 
-    size_t  size = kdb_record_serial_size(r);
-    uint8_t *buf  = malloc(size);
+    
+    uint8_t  stack_buf[KDB_PAGE_SIZE];
+    size_t   size  = kdb_record_serial_size(r);
+    size_t   total = size + 4;
+    uint8_t *buf   = (total <= sizeof(stack_buf)) ? stack_buf : malloc(total);
     if (!buf) { kdb_err_oom("record write buffer"); return KDB_ERR_OOM; }
 
-    size_t written_bytes = kdb_record_serialize(r, buf, size);
+    KdbStatus st = KDB_OK;
+    size_t written_bytes = kdb_record_serialize(r, buf + 4, size);
+    uint32_t sz32 = (uint32_t)written_bytes;
+    memcpy(buf, &sz32, 4);
+
     if (written_bytes == 0) {
-        free(buf);
         kdb_err_io("record", "serialize");
-        return KDB_ERR_IO;
-    }
-
-    
-    uint32_t sz32 = (uint32_t)written_bytes;
-    if (fwrite(&sz32, 4, 1, fp) != 1) {
-        free(buf); kdb_err_io("record", "write size prefix"); return KDB_ERR_IO;
-    }
-    if (fwrite(buf, 1, written_bytes, fp) != written_bytes) {
-        free(buf); kdb_err_io("record", "fwrite"); return KDB_ERR_IO;
+        st = KDB_ERR_IO;
+    } else if (fwrite(buf, 1, written_bytes + 4, fp) != written_bytes + 4) {
+        kdb_err_io("record", "fwrite");
+        st = KDB_ERR_IO;
     }
 
-    free(buf);
-    return KDB_OK;
+    if (buf != stack_buf) free(buf);
+    return st;
 }
 
 KdbRecord *kdb_record_read(FILE *fp) {
@@ -502,7 +715,7 @@ KdbRecord *kdb_record_read(FILE *fp) {
     uint32_t sz32 = 0;
     if (fread(&sz32, 4, 1, fp) != 1) return NULL; 
 
-    if (sz32 == 0 || sz32 > (KDB_MAX_COLUMNS * (KDB_FIELD_HEADER_SIZE + KDB_MAX_STRING_LEN) + KDB_RECORD_FIXED_SIZE)) {
+    if (sz32 == 0 || sz32 > KDB_MAX_RECORD_SIZE) {
         kdb_err_io_corrupt("record: implausible size prefix");
         return NULL;
     }
@@ -2,9 +2,11 @@
 #include <stdlib.h>
 #include <string.h>
 #include <unistd.h>
+#include <fcntl.h>
 #include <errno.h>
 #include <time.h>
 #include <sys/stat.h>
+#include <sys/mman.h>
 #include <dirent.h>
 
 #include "../include/storage.h"
@@ -27,9 +29,9 @@ static void kdb__ensure_dir(const char *path) {
 }
 
 
-static KdbStatus kdb__write_header(FILE *fp, const KdbTableHeader *hdr) {
+static KdbStatus kdb__write_header(FILE *fp, const KdbTableHeader *hdr, size_t len) {
     rewind(fp);
-    if (fwrite(hdr, sizeof(*hdr), 1, fp) != 1) return KDB_ERR_IO;
+    if (fwrite(hdr, len, 1, fp) != 1) return KDB_ERR_IO;
     if (fflush(fp) != 0) return KDB_ERR_IO;
     return KDB_OK;
 }
@@ -88,9 +90,6 @@ KdbStatus kdb_storage_create(const char      *data_dir,
         return KDB_ERR_EXISTS;
     }
 
-    FILE *fp = fopen(path, "wb");
-    if (!fp) { kdb_err_io(path, "fopen create"); return KDB_ERR_IO; }
-
     KdbTableHeader hdr;
     memset(&hdr, 0, sizeof(hdr));
     hdr.magic         = KDB_MAGIC;
@@ -109,15 +108,26 @@ KdbStatus kdb_storage_create(const char      *data_dir,
     if (columns && column_count > 0)
         memcpy(hdr.columns, columns, column_count * sizeof(KdbColumn));
 
-    if (fwrite(&hdr, sizeof(hdr), 1, fp) != 1) {
-        fclose(fp);
-        unlink(path);
-        kdb_err_io(path, "write header");
-        return KDB_ERR_IO;
-    }
+    
+    return kdb_atomic_write(path, (const uint8_t *)&hdr, sizeof(hdr));
+}
 
-    fclose(fp);
-    return KDB_OK;
+static void kdb__disk_state(const struct stat *sb, uint64_t out[3]) {
+    out[0] = (uint64_t)sb->st_ino;
+    out[1] = (uint64_t)sb->st_size;
+    out[2] = (uint64_t)sb->st_mtim.tv_sec * 1000000000ull + (uint64_t)sb->st_mtim.tv_nsec;
+}
+
+static void kdb__note_disk_state(KdbTable *tbl) {
+    struct stat sb;
+    uint64_t    state[3] = { 0, 0, 0 };
+    if (fflush(tbl->fp) == 0 && fstat(fileno(tbl->fp), &sb) == 0) {
+        kdb__disk_state(&sb, state);
+        tbl->data_end = state[1];
+    }
+    tbl->disk_ino      = state[0];
+    tbl->disk_size     = state[1];
+    tbl->disk_mtime_ns = state[2];
 }
 
 KdbStatus kdb_storage_open(KdbTable   *tbl,
@@ -158,25 +168,96 @@ KdbStatus kdb_storage_open(KdbTable   *tbl,
     }
 
     KDB_STRLCPY(tbl->name, table_name, KDB_MAX_NAME_LEN);
+    kdb__note_disk_state(tbl);
     return KDB_OK;
 }
 
 KdbStatus kdb_storage_flush_header(KdbTable *tbl) {
+    if (!tbl || !tbl->fp) return KDB_ERR_BAD_ARG;
+    if (tbl->defer_header) {
+        tbl->header.updated_at = (uint64_t)time(NULL);
+        tbl->dirty = 1;
+        tbl->version++;
+        return KDB_OK;
+    }
+    return kdb_storage_sync_header(tbl);
+}
+
+KdbStatus kdb_storage_sync_header(KdbTable *tbl) {
     if (!tbl || !tbl->fp) return KDB_ERR_BAD_ARG;
     tbl->header.updated_at = (uint64_t)time(NULL);
-    KdbStatus st = kdb__write_header(tbl->fp, &tbl->header);
-    if (st == KDB_OK) tbl->dirty = 0;
+    
+    size_t    len = tbl->schema_dirty ? sizeof(tbl->header) : offsetof(KdbTableHeader, columns);
+    KdbStatus st  = kdb__write_header(tbl->fp, &tbl->header, len);
+    tbl->version++;
+    if (st == KDB_OK) { tbl->dirty = 0; tbl->schema_dirty = 0; }
     else kdb_err_io(tbl->path, "flush header");
+    kdb__note_disk_state(tbl);
     return st;
 }
 
+KdbStatus kdb_storage_refresh(KdbTable *tbl, int *changed_out) {
+    if (changed_out) *changed_out = 0;
+    if (!tbl || !tbl->fp) {
+        kdb_err_null_arg("tbl", "kdb_storage_refresh");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    
+    if (tbl->defer_header || tbl->dirty) return KDB_OK;
+
+    struct stat sb;
+    if (stat(tbl->path, &sb) != 0) {
+        kdb_err_table_not_found(tbl->name);
+        return KDB_ERR_NOT_FOUND;
+    }
+    uint64_t state[3];
+    kdb__disk_state(&sb, state);
+    if (state[0] == tbl->disk_ino && state[1] == tbl->disk_size && state[2] == tbl->disk_mtime_ns)
+        return KDB_OK;
+
+    
+    if (state[0] != tbl->disk_ino) {
+        FILE *fp = fopen(tbl->path, "r+b");
+        if (!fp) {
+            kdb_err_io(tbl->path, "fopen");
+            return KDB_ERR_IO;
+        }
+        fclose(tbl->fp);
+        tbl->fp = fp;
+    }
+
+    KdbTableHeader hdr;
+    if (kdb__read_header(tbl->fp, &hdr) != KDB_OK) {
+        kdb_err_io(tbl->path, "read header");
+        return KDB_ERR_IO;
+    }
+    KdbStatus st = kdb_storage_validate_header(&hdr, tbl->path);
+    if (st != KDB_OK) return st;
+
+    memcpy(&tbl->header, &hdr, sizeof(hdr));
+    tbl->version++;
+    tbl->mutations++;
+    kdb__note_disk_state(tbl);
+    if (changed_out) *changed_out = 1;
+    return KDB_OK;
+}
+
 void kdb_storage_close(KdbTable *tbl) {
     if (!tbl) return;
     if (tbl->fp) {
-        if (tbl->dirty) kdb_storage_flush_header(tbl);
+        if (tbl->dirty) kdb_storage_sync_header(tbl);
         fclose(tbl->fp);
         tbl->fp = NULL;
     }
+    if (tbl->lock_fd >= 0) {
+        close(tbl->lock_fd);
+        tbl->lock_fd = -1;
+    }
+    KDB_FREE(tbl->scan_buf);
+    KDB_FREE(tbl->id_map);
+    tbl->id_map_count    = 0;
+    tbl->id_map_capacity = 0;
 }
 
 KdbStatus kdb_storage_drop(const char *data_dir, const char *table_name) {
@@ -193,7 +274,28 @@ KdbStatus kdb_storage_drop(const char *data_dir, const char *table_name) {
 }
 
 
-KdbStatus kdb_storage_append(KdbTable *tbl, KdbRecord *r) {
+static int kdb__id_map_push(KdbTable *tbl, uint64_t id, uint64_t offset) {
+    if (tbl->id_map_count >= tbl->id_map_capacity) {
+        size_t     new_cap = tbl->id_map_capacity ? tbl->id_map_capacity * 2 : 1024;
+        KdbIdSlot *grown   = realloc(tbl->id_map, new_cap * sizeof(KdbIdSlot));
+        if (!grown) return 0;
+        tbl->id_map          = grown;
+        tbl->id_map_capacity = new_cap;
+    }
+    if (tbl->id_map_count > 0 && tbl->id_map[tbl->id_map_count - 1].id >= id)
+        tbl->id_map_sorted = 0;
+    tbl->id_map[tbl->id_map_count].id     = id;
+    tbl->id_map[tbl->id_map_count].offset = offset;
+    tbl->id_map_count++;
+    return 1;
+}
+
+
+static int kdb__id_map_current(const KdbTable *tbl) {
+    return tbl->id_map != NULL && tbl->id_map_version == tbl->version;
+}
+
+KdbStatus kdb_storage_append(KdbTable *tbl, KdbRecord *r, uint64_t *offset_out) {
     if (!tbl || !r) {
         kdb_err_null_arg("tbl/r", "kdb_storage_append");
         return KDB_ERR_BAD_ARG;
@@ -215,98 +317,531 @@ KdbStatus kdb_storage_append(KdbTable *tbl, KdbRecord *r) {
         kdb_err_io(tbl->path, "fseek end");
         return KDB_ERR_IO;
     }
+    long end = ftell(tbl->fp);
+    if (end < 0) {
+        kdb_err_io(tbl->path, "ftell end");
+        return KDB_ERR_IO;
+    }
+    int      track  = kdb__id_map_current(tbl);
+    uint64_t offset = (uint64_t)end;
+    if (offset_out) *offset_out = offset;
 
     KdbStatus st = kdb_record_write(r, tbl->fp);
-    if (st != KDB_OK) return st;
+    if (st != KDB_OK) {
+        kdb__note_disk_state(tbl);
+        return st;
+    }
+    end = ftell(tbl->fp);
+    if (end >= 0) tbl->data_end = (uint64_t)end;
+    else          kdb__note_disk_state(tbl);
 
     tbl->header.record_count++;
     tbl->dirty = 1;
+    tbl->version++;
+    if (track && kdb__id_map_push(tbl, r->id, offset))
+        tbl->id_map_version = tbl->version;
     return KDB_OK;
 }
 
+static int kdb__pread_full(int fd, uint8_t *buf, size_t len, uint64_t offset, size_t *got_out) {
+    size_t got = 0;
+    while (got < len) {
+        ssize_t n = pread(fd, buf + got, len - got, (off_t)(offset + got));
+        if (n < 0) {
+            if (errno == EINTR) continue;
+            return 0;
+        }
+        if (n == 0) break;
+        got += (size_t)n;
+    }
+    *got_out = got;
+    return 1;
+}
+
 KdbRecord *kdb_storage_read_at(KdbTable *tbl, uint64_t file_offset) {
-    if (!tbl || !tbl->fp) return NULL;
-    if (fseek(tbl->fp, (long)file_offset, SEEK_SET) != 0) {
-        kdb_err_io(tbl->path, "fseek read_at");
+    if (!tbl || !tbl->fp) {
+        kdb_err_null_arg("tbl", "kdb_storage_read_at");
+        return NULL;
+    }
+    if (fflush(tbl->fp) != 0) {
+        kdb_err_io(tbl->path, "fflush read_at");
         return NULL;
     }
-    return kdb_record_read(tbl->fp);
+
+    
+    int     fd = fileno(tbl->fp);
+    uint8_t head[KDB_PAGE_SIZE];
+    size_t  got = 0;
+    if (!kdb__pread_full(fd, head, sizeof(head), file_offset, &got)) {
+        kdb_err_io(tbl->path, "pread read_at");
+        return NULL;
+    }
+    if (got < 4) {
+        kdb_err_io_corrupt("record: truncated size prefix");
+        return NULL;
+    }
+
+    uint32_t sz32 = 0;
+    memcpy(&sz32, head, 4);
+    if (sz32 == 0 || sz32 > KDB_MAX_RECORD_SIZE) {
+        kdb_err_io_corrupt("record: implausible size prefix");
+        return NULL;
+    }
+    if (4 + (size_t)sz32 <= got)
+        return kdb_record_deserialize(head + 4, sz32, NULL);
+
+    
+    uint8_t *body = malloc(sz32);
+    if (!body) { kdb_err_oom("record read buffer"); return NULL; }
+    size_t have = got - 4;
+    size_t rest = 0;
+    memcpy(body, head + 4, have);
+    if (!kdb__pread_full(fd, body + have, sz32 - have, file_offset + got, &rest) ||
+        rest != sz32 - have) {
+        free(body);
+        kdb_err_io(tbl->path, "pread read_at");
+        return NULL;
+    }
+    KdbRecord *r = kdb_record_deserialize(body, sz32, NULL);
+    free(body);
+    return r;
 }
 
 
-KdbStatus kdb_storage_scan(KdbTable       *tbl,
-                           KdbScanCallback callback,
-                           void           *user_data) {
-    if (!tbl || !tbl->fp || !callback) {
-        kdb_err_null_arg("tbl/callback", "kdb_storage_scan");
-        return KDB_ERR_BAD_ARG;
+static void kdb__release_scan_buf(KdbTable *tbl, uint8_t *buf) {
+    if (tbl->scan_buf) free(buf);
+    else               tbl->scan_buf = buf;
+}
+
+static void kdb__scan_mapped(const uint8_t     *map,
+                             size_t             size,
+                             uint64_t           pos,
+                             KdbScanRawCallback callback,
+                             void              *user_data) {
+    while (pos + 4 <= size) {
+        uint32_t sz32 = 0;
+        memcpy(&sz32, map + pos, 4);
+        if (sz32 == 0 || sz32 > KDB_MAX_RECORD_SIZE) {
+            kdb_err_io_corrupt("record: implausible size prefix");
+            break;
+        }
+        if (pos + 4 + sz32 > size) break;
+
+        uint64_t offset = pos;
+        pos += 4 + (uint64_t)sz32;
+        if (!callback(map + offset + 4, sz32, offset, user_data)) break;
     }
+}
+
+static KdbStatus kdb__scan_blocks(KdbTable          *tbl,
+                                  int                fd,
+                                  uint64_t           start,
+                                  KdbScanRawCallback callback,
+                                  void              *user_data) {
+    
+    uint8_t *buf = tbl->scan_buf;
+    tbl->scan_buf = NULL;
+    if (!buf) buf = malloc(KDB_SCAN_BLOCK_SIZE);
+    if (!buf) { kdb_err_oom("scan block buffer"); return KDB_ERR_OOM; }
+
+    size_t   len  = 0;
+    size_t   pos  = 0;
+    uint64_t base = start;
+    int      eof  = 0;
+
+    for (;;) {
+        size_t   avail = len - pos;
+        uint32_t sz32  = 0;
+        size_t   need  = 4;
+
+        if (avail >= 4) {
+            memcpy(&sz32, buf + pos, 4);
+            if (sz32 == 0 || sz32 > KDB_MAX_RECORD_SIZE) {
+                kdb_err_io_corrupt("record: implausible size prefix");
+                break;
+            }
+            need += sz32;
+        }
+
+        if (avail < need) {
+            if (eof) break;
+
+            
+            if (pos > 0) {
+                memmove(buf, buf + pos, avail);
+                base += pos;
+                len   = avail;
+                pos   = 0;
+            }
+            ssize_t got = pread(fd, buf + len, KDB_SCAN_BLOCK_SIZE - len, (off_t)(base + len));
+            if (got < 0) {
+                if (errno == EINTR) continue;
+                kdb__release_scan_buf(tbl, buf);
+                kdb_err_io(tbl->path, "pread scan block");
+                return KDB_ERR_IO;
+            }
+            if (got == 0) eof = 1;
+            len += (size_t)got;
+            continue;
+        }
 
-    if (fseek(tbl->fp, (long)tbl->header.data_offset, SEEK_SET) != 0) {
-        kdb_err_io(tbl->path, "fseek scan start");
+        uint64_t offset = base + pos;
+        size_t   body   = pos + 4;
+        pos += need;
+        if (!callback(buf + body, sz32, offset, user_data)) break;
+    }
+
+    kdb__release_scan_buf(tbl, buf);
+    return KDB_OK;
+}
+
+static KdbStatus kdb__scan_raw(KdbTable          *tbl,
+                               uint64_t           start,
+                               KdbScanRawCallback callback,
+                               void              *user_data) {
+    if (start < tbl->header.data_offset) start = tbl->header.data_offset;
+    if (tbl->data_end <= start) return KDB_OK;
+    if (fflush(tbl->fp) != 0) {
+        kdb_err_io(tbl->path, "fflush before scan");
+        return KDB_ERR_IO;
+    }
+
+    int         fd = fileno(tbl->fp);
+    struct stat st;
+    if (fstat(fd, &st) != 0) {
+        kdb_err_io(tbl->path, "fstat scan");
         return KDB_ERR_IO;
     }
+    if ((uint64_t)st.st_size <= start) return KDB_OK;
 
-    KdbRecord *r;
-    while ((r = kdb_record_read(tbl->fp)) != NULL) {
-        int cont = 1;
-        if (!r->deleted) {
-            cont = callback(r, user_data);
+    
+#ifdef POSIX_FADV_SEQUENTIAL
+    posix_fadvise(fd, (off_t)start, 0, POSIX_FADV_SEQUENTIAL);
+#endif
+
+    
+    if ((uint64_t)st.st_size >= KDB_SCAN_BLOCK_SIZE) {
+        size_t size = (size_t)st.st_size;
+        void  *map  = mmap(NULL, size, PROT_READ, MAP_SHARED, fd, 0);
+        if (map != MAP_FAILED) {
+            madvise(map, size, MADV_SEQUENTIAL);
+            kdb__scan_mapped((const uint8_t *)map, size, start, callback, user_data);
+            munmap(map, size);
+            return KDB_OK;
         }
-        kdb_record_free(r);
-        if (!cont) break;
     }
 
+    return kdb__scan_blocks(tbl, fd, start, callback, user_data);
+}
+
+
+typedef struct {
+    KdbScanOffsetCallback callback;
+    void                 *user_data;
+    KdbStatus             status;
+} KdbScanDecodeCtx;
+
+static int kdb__scan_decode_cb(const uint8_t *body, uint32_t size, uint64_t offset, void *ud) {
+    KdbScanDecodeCtx *ctx = (KdbScanDecodeCtx *)ud;
+    KdbRecord        *r   = kdb_record_deserialize(body, size, NULL);
+    if (!r) {
+        
+        if (kdb_last_status() == KDB_ERR_CORRUPT) return 1;
+        ctx->status = kdb_last_status();
+        return 0;
+    }
+
+    int cont = 1;
+    if (!r->deleted) {
+        cont = ctx->callback(r, offset, ctx->user_data);
+    }
+    kdb_record_free(r);
+    return cont;
+}
+
+KdbStatus kdb_storage_scan_offsets(KdbTable             *tbl,
+                                   KdbScanOffsetCallback callback,
+                                   void                 *user_data) {
+    if (!tbl || !tbl->fp || !callback) {
+        kdb_err_null_arg("tbl/callback", "kdb_storage_scan_offsets");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    KdbScanDecodeCtx ctx = { .callback = callback, .user_data = user_data, .status = KDB_OK };
+    KdbStatus        st  = kdb__scan_raw(tbl, 0, kdb__scan_decode_cb, &ctx);
+    return st != KDB_OK ? st : ctx.status;
+}
+
+KdbStatus kdb_storage_scan_raw(KdbTable          *tbl,
+                               KdbScanRawCallback callback,
+                               void              *user_data) {
+    if (!tbl || !tbl->fp || !callback) {
+        kdb_err_null_arg("tbl/callback", "kdb_storage_scan_raw");
+        return KDB_ERR_BAD_ARG;
+    }
+    return kdb__scan_raw(tbl, 0, callback, user_data);
+}
+
+KdbStatus kdb_storage_scan_raw_from(KdbTable          *tbl,
+                                    uint64_t           start,
+                                    KdbScanRawCallback callback,
+                                    void              *user_data) {
+    if (!tbl || !tbl->fp || !callback) {
+        kdb_err_null_arg("tbl/callback", "kdb_storage_scan_raw_from");
+        return KDB_ERR_BAD_ARG;
+    }
+    return kdb__scan_raw(tbl, start, callback, user_data);
+}
+
+KdbStatus kdb_storage_data_end(KdbTable *tbl, uint64_t *end_out) {
+    if (!tbl || !tbl->fp || !end_out) {
+        kdb_err_null_arg("tbl/end_out", "kdb_storage_data_end");
+        return KDB_ERR_BAD_ARG;
+    }
+    *end_out = tbl->data_end;
     return KDB_OK;
 }
 
 
+typedef struct {
+    KdbTable *tbl;
+    int       oom;
+} KdbIdMapCtx;
+
+static int kdb__id_map_cb(const uint8_t *body, uint32_t size, uint64_t offset, void *ud) {
+    KdbIdMapCtx *ctx     = (KdbIdMapCtx *)ud;
+    uint64_t     id      = 0;
+    uint8_t      deleted = 0;
+    if (kdb_record_peek_header(body, size, &id, &deleted, NULL) != KDB_OK) return 1;
+    if (deleted) return 1;
+    if (!kdb__id_map_push(ctx->tbl, id, offset)) { ctx->oom = 1; return 0; }
+    return 1;
+}
+
+static KdbStatus kdb__id_map_build(KdbTable *tbl) {
+    tbl->id_map_count  = 0;
+    tbl->id_map_sorted = 1;
+
+    KdbIdMapCtx ctx = { .tbl = tbl, .oom = 0 };
+    KdbStatus   st  = kdb__scan_raw(tbl, 0, kdb__id_map_cb, &ctx);
+    if (st != KDB_OK) return st;
+    if (ctx.oom) { kdb_err_oom("id map"); return KDB_ERR_OOM; }
+
+    tbl->id_map_version = tbl->version;
+    return KDB_OK;
+}
+
+KdbStatus kdb_storage_offset_of(KdbTable *tbl, uint64_t id, uint64_t *offset_out) {
+    if (!tbl || !tbl->fp || !offset_out) {
+        kdb_err_null_arg("tbl/offset_out", "kdb_storage_offset_of");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (!kdb__id_map_current(tbl)) {
+        KdbStatus st = kdb__id_map_build(tbl);
+        if (st != KDB_OK) return st;
+    }
+
+    
+    if (tbl->id_map_sorted) {
+        size_t lo = 0, hi = tbl->id_map_count;
+        while (lo < hi) {
+            size_t mid = lo + (hi - lo) / 2;
+            if (tbl->id_map[mid].id < id) lo = mid + 1;
+            else                          hi = mid;
+        }
+        if (lo < tbl->id_map_count && tbl->id_map[lo].id == id) {
+            *offset_out = tbl->id_map[lo].offset;
+            return KDB_OK;
+        }
+        return KDB_ERR_NOT_FOUND;
+    }
+
+    for (size_t i = 0; i < tbl->id_map_count; i++) {
+        if (tbl->id_map[i].id == id) {
+            *offset_out = tbl->id_map[i].offset;
+            return KDB_OK;
+        }
+    }
+    return KDB_ERR_NOT_FOUND;
+}
+
+KdbStatus kdb_storage_tombstone(KdbTable       *tbl,
+                                const uint64_t *offsets,
+                                size_t          count) {
+    if (!tbl || !tbl->fp || (!offsets && count > 0)) {
+        kdb_err_null_arg("tbl/offsets", "kdb_storage_tombstone");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (tbl->read_only) {
+        kdb_err_table_read_only(tbl->name);
+        return KDB_ERR_READ_ONLY;
+    }
+    if (count == 0) return KDB_OK;
+
+    
+    KdbStatus st = KDB_OK;
+    size_t    i  = 0;
+    for (; i < count; i++) {
+        if (fseek(tbl->fp, (long)(offsets[i] + 4 + KDB_RECORD_DELETED_AT), SEEK_SET) != 0 ||
+            fputc(1, tbl->fp) == EOF) {
+            kdb_err_io(tbl->path, "write tombstone");
+            st = KDB_ERR_IO;
+            break;
+        }
+    }
+    if (fflush(tbl->fp) != 0 && st == KDB_OK) {
+        kdb_err_io(tbl->path, "fflush tombstone");
+        st = KDB_ERR_IO;
+    }
+    kdb__note_disk_state(tbl);
+
+    tbl->header.record_count -= KDB_MIN((uint64_t)i, tbl->header.record_count);
+    tbl->dirty = 1;
+    tbl->version++;
+    tbl->mutations++;
+    return st;
+}
+
+
+typedef struct {
+    KdbScanCallback callback;
+    void           *user_data;
+} KdbScanAdapter;
+
+static int kdb__scan_adapter_cb(const KdbRecord *r, uint64_t offset, void *ud) {
+    KdbScanAdapter *ad = (KdbScanAdapter *)ud;
+    KDB_UNUSED(offset);
+    return ad->callback(r, ad->user_data);
+}
+
+KdbStatus kdb_storage_scan(KdbTable       *tbl,
+                           KdbScanCallback callback,
+                           void           *user_data) {
+    if (!tbl || !tbl->fp || !callback) {
+        kdb_err_null_arg("tbl/callback", "kdb_storage_scan");
+        return KDB_ERR_BAD_ARG;
+    }
+    KdbScanAdapter ad = { .callback = callback, .user_data = user_data };
+    return kdb_storage_scan_offsets(tbl, kdb__scan_adapter_cb, &ad);
+}
+
+
 typedef struct {
     FILE          *out_fp;
+    uint8_t       *out_buf;
+    size_t         out_used;
     KdbTransformFn transform_fn;
     void          *user_data;
     uint64_t       record_count;
     uint64_t       next_id;
+    uint64_t       end;
+    uint64_t       bad_offset;
+    KdbStatus      status;
 } KdbRewriteCtx;
 
-static int kdb__rewrite_scan_cb(const KdbRecord *r_const, void *ud) {
+static int kdb__rewrite_flush(KdbRewriteCtx *ctx) {
+    if (ctx->out_used > 0 &&
+        fwrite(ctx->out_buf, 1, ctx->out_used, ctx->out_fp) != ctx->out_used) {
+        ctx->status = KDB_ERR_IO;
+        return 0;
+    }
+    ctx->out_used = 0;
+    return 1;
+}
+
+static uint8_t *kdb__rewrite_reserve(KdbRewriteCtx *ctx, size_t size) {
+    if (ctx->out_used + 4 + size > KDB_SCAN_BLOCK_SIZE && !kdb__rewrite_flush(ctx))
+        return NULL;
+    if (4 + size > KDB_SCAN_BLOCK_SIZE) {
+        ctx->status = KDB_ERR_CORRUPT;
+        return NULL;
+    }
+    return ctx->out_buf + ctx->out_used + 4;
+}
+
+static void kdb__rewrite_commit(KdbRewriteCtx *ctx, uint32_t size, uint64_t id) {
+    memcpy(ctx->out_buf + ctx->out_used, &size, 4);
+    ctx->out_used += 4 + (size_t)size;
+    ctx->record_count++;
+    if (id >= ctx->next_id) ctx->next_id = id + 1;
+}
+
+static int kdb__rewrite_stopped_early(KdbTable *tbl, uint64_t end) {
+    if (tbl->data_end < end + 4) return 0;
+
+    
+    uint32_t sz32 = 0;
+    if (pread(fileno(tbl->fp), &sz32, 4, (off_t)end) != 4) return 0;
+    return sz32 == 0 || sz32 > KDB_MAX_RECORD_SIZE;
+}
+
+static int kdb__rewrite_corrupt(KdbRewriteCtx *ctx, uint64_t offset) {
+    ctx->status     = KDB_ERR_CORRUPT;
+    ctx->bad_offset = offset;
+    return 0;
+}
+
+static int kdb__rewrite_raw_cb(const uint8_t *body, uint32_t size, uint64_t offset, void *ud) {
     KdbRewriteCtx *ctx = (KdbRewriteCtx *)ud;
+    ctx->end = offset + 4 + (uint64_t)size;
 
     
-    KdbRecord *r = kdb_record_copy(r_const);
-    if (!r) return 0; 
+    uint64_t id      = 0;
+    uint8_t  deleted = 0;
+    uint8_t  format  = 0;
+    if (kdb_record_peek_header(body, size, &id, &deleted, &format) != KDB_OK)
+        return kdb__rewrite_corrupt(ctx, offset);
+    if (deleted) return 1;
+
+    if (!ctx->transform_fn && format == KDB_RECORD_FORMAT_COMPACT) {
+        uint8_t *dst = kdb__rewrite_reserve(ctx, size);
+        if (!dst) return 0;
+        memcpy(dst, body, size);
+        kdb__rewrite_commit(ctx, size, id);
+        return 1;
+    }
+
+    KdbRecord *r = kdb_record_deserialize(body, size, NULL);
+    if (!r) return kdb__rewrite_corrupt(ctx, offset);
 
-    int keep = ctx->transform_fn(r, ctx->user_data);
+    int keep = ctx->transform_fn ? ctx->transform_fn(r, ctx->user_data) : 1;
     if (keep && !r->deleted) {
-        kdb_record_write(r, ctx->out_fp);
-        ctx->record_count++;
-        if (r->id >= ctx->next_id) ctx->next_id = r->id + 1;
+        size_t   need    = kdb_record_serial_size(r);
+        uint8_t *dst     = kdb__rewrite_reserve(ctx, need);
+        size_t   written = dst ? kdb_record_serialize(r, dst, need) : 0;
+        if (written == 0) {
+            if (ctx->status == KDB_OK) ctx->status = KDB_ERR_IO;
+            kdb_record_free(r);
+            return 0;
+        }
+        kdb__rewrite_commit(ctx, (uint32_t)written, r->id);
     }
     kdb_record_free(r);
-    return 1; 
+    return 1;
 }
 
-KdbStatus kdb_storage_rewrite(KdbTable      *tbl,
+static KdbStatus kdb__rewrite(KdbTable      *tbl,
                               KdbTransformFn transform_fn,
                               void          *user_data) {
-    if (!tbl || !transform_fn) {
-        kdb_err_null_arg("tbl/transform_fn", "kdb_storage_rewrite");
-        return KDB_ERR_BAD_ARG;
-    }
     if (tbl->read_only) {
         kdb_err_table_read_only(tbl->name);
         return KDB_ERR_READ_ONLY;
     }
-
     
     char tmp_path[4096];
-    snprintf(tmp_path, sizeof(tmp_path), "%s.tmp", tbl->path);
+    kdb_temp_path(tbl->path, tmp_path, sizeof(tmp_path));
 
-    FILE *out_fp = fopen(tmp_path, "wb");
+    FILE *out_fp = fopen(tmp_path, "w+b");
     if (!out_fp) {
         kdb_err_io(tmp_path, "fopen rewrite temp");
         return KDB_ERR_IO;
     }
+    uint8_t *out_buf = (uint8_t *)malloc(KDB_SCAN_BLOCK_SIZE);
+    if (!out_buf) {
+        fclose(out_fp); unlink(tmp_path);
+        kdb_err_oom("rewrite buffer");
+        return KDB_ERR_OOM;
+    }
 
     
     KdbTableHeader new_hdr;
@@ -314,6 +849,7 @@ KdbStatus kdb_storage_rewrite(KdbTable      *tbl,
     new_hdr.record_count = 0;
     new_hdr.updated_at   = (uint64_t)time(NULL);
     if (fwrite(&new_hdr, sizeof(new_hdr), 1, out_fp) != 1) {
+        free(out_buf);
         fclose(out_fp); unlink(tmp_path);
         kdb_err_io(tmp_path, "write header placeholder");
         return KDB_ERR_IO;
@@ -322,13 +858,31 @@ KdbStatus kdb_storage_rewrite(KdbTable      *tbl,
     
     KdbRewriteCtx ctx = {
         .out_fp       = out_fp,
+        .out_buf      = out_buf,
+        .out_used     = 0,
         .transform_fn = transform_fn,
         .user_data    = user_data,
         .record_count = 0,
-        .next_id      = tbl->header.next_id
+        .next_id      = tbl->header.next_id,
+        .end          = tbl->header.data_offset,
+        .status       = KDB_OK
     };
 
-    KdbStatus scan_st = kdb_storage_scan(tbl, kdb__rewrite_scan_cb, &ctx);
+    KdbStatus scan_st = kdb__scan_raw(tbl, 0, kdb__rewrite_raw_cb, &ctx);
+    if (scan_st == KDB_OK && ctx.status == KDB_OK && kdb__rewrite_stopped_early(tbl, ctx.end))
+        kdb__rewrite_corrupt(&ctx, ctx.end);
+    if (scan_st == KDB_OK && ctx.status == KDB_OK) kdb__rewrite_flush(&ctx);
+    free(out_buf);
+    if (scan_st == KDB_OK && ctx.status == KDB_ERR_CORRUPT) {
+        kdb_set_error(KDB_ERR_CORRUPT,
+            "Record at offset %llu in '%s' is unreadable. Refusing to rewrite the table "
+            "and drop everything after it.",
+            (unsigned long long)ctx.bad_offset, tbl->path);
+        scan_st = ctx.status;
+    } else if (scan_st == KDB_OK && ctx.status != KDB_OK) {
+        kdb_err_io(tmp_path, "write rewrite record");
+        scan_st = ctx.status;
+    }
     if (scan_st != KDB_OK) {
         fclose(out_fp); unlink(tmp_path);
         return scan_st;
@@ -350,68 +904,257 @@ KdbStatus kdb_storage_rewrite(KdbTable      *tbl,
         kdb_err_io(tmp_path, "fsync rewrite");
         return KDB_ERR_IO;
     }
-    fclose(out_fp);
-
-    
-    fclose(tbl->fp);
-    tbl->fp = NULL;
 
     
     if (rename(tmp_path, tbl->path) != 0) {
-        unlink(tmp_path);
+        fclose(out_fp); unlink(tmp_path);
         kdb_err_io(tbl->path, "rename rewrite");
         return KDB_ERR_IO;
     }
+    kdb_fsync_parent_dir(tbl->path);
 
     
-    tbl->fp = fopen(tbl->path, "r+b");
-    if (!tbl->fp) {
-        kdb_err_io(tbl->path, "reopen after rewrite");
-        return KDB_ERR_IO;
-    }
+    fclose(tbl->fp);
+    tbl->fp = out_fp;
 
     memcpy(&tbl->header, &new_hdr, sizeof(new_hdr));
-    tbl->dirty = 0;
+    tbl->dirty        = 0;
+    tbl->schema_dirty = 0;
+    tbl->version++;
+    tbl->mutations++;
+    kdb__note_disk_state(tbl);
     return KDB_OK;
 }
 
 
-static int kdb__identity_transform(KdbRecord *r, void *ud) {
-    KDB_UNUSED(ud);
-    return !r->deleted;
+KdbStatus kdb_storage_rewrite(KdbTable      *tbl,
+                              KdbTransformFn transform_fn,
+                              void          *user_data) {
+    if (!tbl || !transform_fn) {
+        kdb_err_null_arg("tbl/transform_fn", "kdb_storage_rewrite");
+        return KDB_ERR_BAD_ARG;
+    }
+    return kdb__rewrite(tbl, transform_fn, user_data);
 }
 
 KdbStatus kdb_storage_compact(KdbTable *tbl) {
-    return kdb_storage_rewrite(tbl, kdb__identity_transform, NULL);
+    if (!tbl || !tbl->fp) {
+        kdb_err_null_arg("tbl", "kdb_storage_compact");
+        return KDB_ERR_BAD_ARG;
+    }
+    return kdb__rewrite(tbl, NULL, NULL);
+}
+
+
+static int kdb__write_all(int fd, const uint8_t *data, size_t len) {
+    size_t done = 0;
+    while (done < len) {
+        ssize_t n = write(fd, data + done, len - done);
+        if (n < 0 && errno == EINTR) continue;
+        if (n <= 0) return 0;
+        done += (size_t)n;
+    }
+    return 1;
+}
+
+static int kdb__copy_kernel(int in, int out, off_t *pos) {
+#ifdef __linux__
+    for (;;) {
+        off64_t off = (off64_t)*pos;
+        ssize_t got = copy_file_range(in, &off, out, NULL, (size_t)1 << 30, 0);
+        if (got < 0 && errno == EINTR) continue;
+        if (got < 0) {
+            
+            if (errno == EXDEV || errno == ENOSYS || errno == EINVAL || errno == EOPNOTSUPP)
+                return 0;
+            return -1;
+        }
+        if (got == 0) return 1;
+        *pos += got;
+    }
+#else
+    KDB_UNUSED(in);
+    KDB_UNUSED(out);
+    KDB_UNUSED(pos);
+    return 0;
+#endif
+}
+
+static KdbStatus kdb__copy_buffered(KdbTable   *tbl,
+                                    int         in,
+                                    int         out,
+                                    off_t       pos,
+                                    const char *out_path) {
+    
+    uint8_t *buf = tbl->scan_buf;
+    tbl->scan_buf = NULL;
+    if (!buf) buf = malloc(KDB_SCAN_BLOCK_SIZE);
+    if (!buf) {
+        kdb_err_oom("backup buffer");
+        return KDB_ERR_OOM;
+    }
+
+    KdbStatus st = KDB_OK;
+    for (;;) {
+        ssize_t got = pread(in, buf, KDB_SCAN_BLOCK_SIZE, pos);
+        if (got < 0 && errno == EINTR) continue;
+        if (got < 0) {
+            kdb_err_io(tbl->path, "pread backup");
+            st = KDB_ERR_IO;
+            break;
+        }
+        if (got == 0) break;
+        if (!kdb__write_all(out, buf, (size_t)got)) {
+            kdb_err_io(out_path, "write backup");
+            st = KDB_ERR_IO;
+            break;
+        }
+        pos += got;
+    }
+    kdb__release_scan_buf(tbl, buf);
+    return st;
+}
+
+KdbStatus kdb_storage_backup(KdbTable *tbl, const char *dest_path) {
+    if (!tbl || !tbl->fp || !dest_path) {
+        kdb_err_null_arg("tbl/dest_path", "kdb_storage_backup");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    
+    if (tbl->dirty && !tbl->read_only) {
+        KdbStatus st = kdb_storage_sync_header(tbl);
+        if (st != KDB_OK) return st;
+    }
+    if (fflush(tbl->fp) != 0) {
+        kdb_err_io(tbl->path, "fflush before backup");
+        return KDB_ERR_IO;
+    }
+
+    char tmp_path[4096];
+    kdb_temp_path(dest_path, tmp_path, sizeof(tmp_path));
+
+    int out = open(tmp_path, O_WRONLY | O_CREAT | O_TRUNC, 0644);
+    if (out < 0) {
+        kdb_err_io(tmp_path, "open backup");
+        return KDB_ERR_IO;
+    }
+
+    
+    int       in     = fileno(tbl->fp);
+    off_t     pos    = 0;
+    KdbStatus st     = KDB_OK;
+    int       copied = kdb__copy_kernel(in, out, &pos);
+    if (copied < 0) {
+        kdb_err_io(tbl->path, "copy_file_range backup");
+        st = KDB_ERR_IO;
+    } else if (!copied) {
+        st = kdb__copy_buffered(tbl, in, out, pos, tmp_path);
+    }
+
+    if (st == KDB_OK && fsync(out) != 0) {
+        kdb_err_io(tmp_path, "fsync backup");
+        st = KDB_ERR_IO;
+    }
+    close(out);
+
+    if (st == KDB_OK && rename(tmp_path, dest_path) != 0) {
+        kdb_err_io(dest_path, "rename backup");
+        st = KDB_ERR_IO;
+    }
+    if (st == KDB_OK) kdb_fsync_parent_dir(dest_path);
+    if (st != KDB_OK) unlink(tmp_path);
+    return st;
 }
 
 
 KdbStatus kdb_storage_append_batch(KdbTable  *tbl,
                                    KdbRecord *records,
-                                   size_t     count) {
+                                   size_t     count,
+                                   uint64_t  *offsets_out) {
     if (!tbl || !records) {
         kdb_err_null_arg("tbl/records", "kdb_storage_append_batch");
         return KDB_ERR_BAD_ARG;
     }
+    if (tbl->read_only) {
+        kdb_err_table_read_only(tbl->name);
+        return KDB_ERR_READ_ONLY;
+    }
     if (count > KDB_MAX_BATCH_SIZE) {
         kdb_err_batch_too_large(count, KDB_MAX_BATCH_SIZE);
         return KDB_ERR_FULL;
     }
+    if (tbl->header.record_count + count > KDB_MAX_RECORDS) {
+        kdb_err_table_full(tbl->name);
+        return KDB_ERR_FULL;
+    }
 
     if (fseek(tbl->fp, 0, SEEK_END) != 0) {
         kdb_err_io(tbl->path, "fseek batch end");
         return KDB_ERR_IO;
     }
+    long end = ftell(tbl->fp);
+    if (end < 0) {
+        kdb_err_io(tbl->path, "ftell batch end");
+        return KDB_ERR_IO;
+    }
+
+    
+    uint8_t *buf = (uint8_t *)malloc(KDB_SCAN_BLOCK_SIZE);
+    if (!buf) { kdb_err_oom("batch write buffer"); return KDB_ERR_OOM; }
+
+    uint64_t  offset = (uint64_t)end;
+    size_t    used   = 0;
+    size_t    queued = 0;
+    KdbStatus st     = KDB_OK;
+    int       track  = kdb__id_map_current(tbl);
+
+    for (size_t i = 0; i < count && st == KDB_OK; i++) {
+        size_t size = kdb_record_serial_size(&records[i]);
+        if (used + 4 + size > KDB_SCAN_BLOCK_SIZE) {
+            if (fwrite(buf, 1, used, tbl->fp) != used) {
+                kdb_err_io(tbl->path, "fwrite batch");
+                st = KDB_ERR_IO;
+                break;
+            }
+            tbl->header.record_count += queued;
+            used   = 0;
+            queued = 0;
+        }
 
-    for (size_t i = 0; i < count; i++) {
         records[i].id = tbl->header.next_id++;
-        KdbStatus st = kdb_record_write(&records[i], tbl->fp);
-        if (st != KDB_OK) return st;
-        tbl->header.record_count++;
+        size_t written = kdb_record_serialize(&records[i], buf + used + 4, KDB_SCAN_BLOCK_SIZE - used - 4);
+        if (written == 0) {
+            kdb_err_io("record", "serialize");
+            st = KDB_ERR_IO;
+            break;
+        }
+        uint32_t sz32 = (uint32_t)written;
+        memcpy(buf + used, &sz32, 4);
+
+        if (offsets_out) offsets_out[i] = offset;
+        if (track && !kdb__id_map_push(tbl, records[i].id, offset)) track = 0;
+        offset += 4 + written;
+        used   += 4 + written;
+        queued++;
     }
 
+    if (st == KDB_OK && used > 0) {
+        if (fwrite(buf, 1, used, tbl->fp) != used) {
+            kdb_err_io(tbl->path, "fwrite batch");
+            st = KDB_ERR_IO;
+        } else {
+            tbl->header.record_count += queued;
+        }
+    }
+
+    free(buf);
+    if (st == KDB_OK) tbl->data_end = offset;
+    else              kdb__note_disk_state(tbl);
     tbl->dirty = 1;
-    return KDB_OK;
+    tbl->version++;
+    if (track && st == KDB_OK) tbl->id_map_version = tbl->version;
+    return st;
 }
 
 
@@ -450,16 +1193,20 @@ KdbStatus kdb_storage_list_tables(const char *data_dir,
 }
 
 
-typedef struct { uint64_t deleted; } KdbCountDeletedCtx;
+static int kdb__stats_cb(const uint8_t *body, uint32_t size, uint64_t offset, void *ud) {
+    KdbStorageStats *out = (KdbStorageStats *)ud;
+    KDB_UNUSED(offset);
 
-static int kdb__count_deleted_cb(const KdbRecord *r, void *ud) {
-    KDB_UNUSED(r);
-    KDB_UNUSED(ud);
-    return 1; 
+    
+    uint8_t deleted = 0;
+    if (kdb_record_peek_header(body, size, NULL, &deleted, NULL) != KDB_OK) return 1;
+    if (deleted) out->deleted_count++;
+    else         out->live_count++;
+    return 1;
 }
 
 KdbStatus kdb_storage_stats(KdbTable *tbl, KdbStorageStats *out) {
-    if (!tbl || !out) {
+    if (!tbl || !tbl->fp || !out) {
         kdb_err_null_arg("tbl/out", "kdb_storage_stats");
         return KDB_ERR_BAD_ARG;
     }
@@ -467,28 +1214,16 @@ KdbStatus kdb_storage_stats(KdbTable *tbl, KdbStorageStats *out) {
     memset(out, 0, sizeof(*out));
 
     struct stat st;
-    if (stat(tbl->path, &st) == 0) {
+    if (fstat(fileno(tbl->fp), &st) == 0) {
         out->file_size_bytes = (uint64_t)st.st_size;
     }
 
-    
-    if (fseek(tbl->fp, (long)tbl->header.data_offset, SEEK_SET) == 0) {
-        KdbRecord *r;
-        while ((r = kdb_record_read(tbl->fp)) != NULL) {
-            if (r->deleted) out->deleted_count++;
-            else            out->live_count++;
-            kdb_record_free(r);
-        }
-    }
+    KdbStatus scan_st = kdb__scan_raw(tbl, 0, kdb__stats_cb, out);
+    if (scan_st != KDB_OK) return scan_st;
 
     out->record_count = out->live_count + out->deleted_count;
     out->fragmentation_ratio = (out->record_count > 0)
         ? (double)out->deleted_count / (double)out->record_count
         : 0.0;
-
-    
-    fseek(tbl->fp, (long)tbl->header.data_offset, SEEK_SET);
-
-    KDB_UNUSED(kdb__count_deleted_cb);
     return KDB_OK;
 }
\ No newline at end of file
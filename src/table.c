@@ -20,6 +20,44 @@ KdbStatus kdb_table_create(const char      *data_dir,
     return kdb_storage_create(data_dir, table_name, columns, column_count);
 }
 
+static void kdb__table_drop_indices(KdbTable *tbl) {
+    kdb_index_free_array(tbl->indices, tbl->index_count);
+    tbl->indices     = NULL;
+    tbl->index_count = 0;
+}
+
+static KdbStatus kdb__table_rebuild_indices(KdbTable *tbl) {
+    KdbStatus st = kdb_index_rebuild_all(tbl->indices, tbl->index_count, tbl);
+    if (st != KDB_OK) kdb__table_drop_indices(tbl);
+    return st;
+}
+
+static KdbStatus kdb__table_load_indices(KdbTable *tbl) {
+    if (tbl->header.column_count == 0) return KDB_OK;
+
+    KdbIndex *idx_arr[KDB_MAX_COLUMNS * 2];
+    memset(idx_arr, 0, sizeof(idx_arr));
+    uint32_t idx_count = 0;
+
+    KdbStatus st = kdb_index_build_for_table(tbl->header.columns,
+                                             tbl->header.column_count,
+                                             idx_arr, &idx_count);
+    if (st != KDB_OK) return st;
+    if (idx_count == 0) return KDB_OK;
+
+    tbl->indices = (KdbIndex **)calloc(idx_count, sizeof(KdbIndex *));
+    if (!tbl->indices) {
+        for (uint32_t i = 0; i < idx_count; i++) kdb_index_free(idx_arr[i]);
+        kdb_err_oom("index array");
+        return KDB_ERR_OOM;
+    }
+    memcpy(tbl->indices, idx_arr, idx_count * sizeof(KdbIndex *));
+    tbl->index_count = idx_count;
+
+    
+    return kdb__table_rebuild_indices(tbl);
+}
+
 KdbStatus kdb_table_open(KdbTable   *tbl,
                          const char *data_dir,
                          const char *table_name) {
@@ -27,54 +65,26 @@ KdbStatus kdb_table_open(KdbTable   *tbl,
     if (st != KDB_OK) return st;
 
     
-    if (tbl->header.column_count > 0) {
-        KdbIndex *idx_arr[KDB_MAX_COLUMNS];
-        memset(idx_arr, 0, sizeof(idx_arr));
-        uint32_t idx_count = 0;
-
-        st = kdb_index_build_for_table(tbl->header.columns,
-                                       tbl->header.column_count,
-                                       idx_arr, &idx_count);
-        if (st != KDB_OK) {
-            kdb_storage_close(tbl);
-            return st;
-        }
+    st = kdb__table_load_indices(tbl);
+    if (st != KDB_OK) kdb_storage_close(tbl);
+    return st;
+}
 
-        if (idx_count > 0) {
-            tbl->indices = (KdbIndex **)calloc(idx_count, sizeof(KdbIndex *));
-            if (!tbl->indices) {
-                for (uint32_t i = 0; i < idx_count; i++) kdb_index_free(idx_arr[i]);
-                kdb_storage_close(tbl);
-                kdb_err_oom("index array");
-                return KDB_ERR_OOM;
-            }
-            memcpy(tbl->indices, idx_arr, idx_count * sizeof(KdbIndex *));
-            tbl->index_count = idx_count;
-
-            
-            for (uint32_t i = 0; i < idx_count; i++) {
-                st = kdb_index_rebuild(tbl->indices[i], tbl);
-                if (st != KDB_OK) {
-                    kdb_index_free_array(tbl->indices, tbl->index_count);
-                    tbl->indices     = NULL;
-                    tbl->index_count = 0;
-                    kdb_storage_close(tbl);
-                    return st;
-                }
-            }
-        }
-    }
+KdbStatus kdb_table_refresh(KdbTable *tbl) {
+    if (!tbl) { kdb_err_null_arg("tbl", "kdb_table_refresh"); return KDB_ERR_BAD_ARG; }
 
-    return KDB_OK;
+    int       changed = 0;
+    KdbStatus st      = kdb_storage_refresh(tbl, &changed);
+    if (st != KDB_OK || !changed) return st;
+
+    
+    if (tbl->indices) kdb__table_drop_indices(tbl);
+    return kdb__table_load_indices(tbl);
 }
 
 void kdb_table_close(KdbTable *tbl) {
     if (!tbl) return;
-    if (tbl->indices) {
-        kdb_index_free_array(tbl->indices, tbl->index_count);
-        tbl->indices     = NULL;
-        tbl->index_count = 0;
-    }
+    if (tbl->indices) kdb__table_drop_indices(tbl);
     kdb_storage_close(tbl);
 }
 
@@ -103,6 +113,30 @@ int kdb_table_has_column(const KdbTable *tbl, const char *col_name) {
     return kdb_table_get_column(tbl, col_name) != NULL;
 }
 
+static KdbStatus kdb__table_attach_index(KdbTable *tbl, const char *col_name, uint8_t kind) {
+    KdbIndex *idx = kdb_index_new_kind(col_name, kind);
+    if (!idx) return KDB_ERR_OOM;
+
+    KdbIndex **new_indices = realloc(tbl->indices,
+                                     (tbl->index_count + 1) * sizeof(KdbIndex *));
+    if (!new_indices) {
+        kdb_index_free(idx);
+        kdb_err_oom("index array grow");
+        return KDB_ERR_OOM;
+    }
+    new_indices[tbl->index_count] = idx;
+    tbl->indices     = new_indices;
+    tbl->index_count++;
+
+    
+    KdbStatus st = kdb_index_rebuild(idx, tbl);
+    if (st != KDB_OK) {
+        tbl->index_count--;
+        kdb_index_free(idx);
+    }
+    return st;
+}
+
 KdbStatus kdb_table_add_column(KdbTable   *tbl,
                                const char *col_name,
                                KdbType     type,
@@ -128,27 +162,66 @@ KdbStatus kdb_table_add_column(KdbTable   *tbl,
     col->nullable = nullable;
     col->indexed  = indexed;
     tbl->header.column_count++;
-    tbl->dirty = 1;
+    tbl->dirty        = 1;
+    tbl->schema_dirty = 1;
+    tbl->mutations++;
+
+    if (indexed & KDB_INDEX_HASH) {
+        KdbStatus st = kdb__table_attach_index(tbl, col_name, KDB_INDEX_HASH);
+        if (st != KDB_OK) return st;
+    }
+    if (indexed & KDB_INDEX_TRIGRAM) {
+        KdbStatus st = kdb__table_attach_index(tbl, col_name, KDB_INDEX_TRIGRAM);
+        if (st != KDB_OK) return st;
+    }
+
+    return kdb_storage_flush_header(tbl);
+}
 
-    if (indexed) {
-        KdbIndex *idx = kdb_index_new(col_name);
-        if (!idx) return KDB_ERR_OOM;
+KdbStatus kdb_table_create_index(KdbTable   *tbl,
+                                 const char *col_name,
+                                 uint8_t     persist) {
+    return kdb_table_create_index_kind(tbl, col_name, KDB_INDEX_HASH, persist);
+}
 
-        KdbIndex **new_indices = realloc(tbl->indices,
-                                         (tbl->index_count + 1) * sizeof(KdbIndex *));
-        if (!new_indices) {
-            kdb_index_free(idx);
-            kdb_err_oom("index array grow");
-            return KDB_ERR_OOM;
+KdbStatus kdb_table_create_index_kind(KdbTable   *tbl,
+                                      const char *col_name,
+                                      uint8_t     kind,
+                                      uint8_t     persist) {
+    if (!tbl || !col_name) {
+        kdb_err_null_arg("tbl/col_name", "kdb_table_create_index_kind");
+        return KDB_ERR_BAD_ARG;
+    }
+    if (kind != KDB_INDEX_HASH && kind != KDB_INDEX_TRIGRAM) {
+        kdb_err_bad_arg("kind", "unknown index kind");
+        return KDB_ERR_BAD_ARG;
+    }
+
+    KdbColumn *col = NULL;
+    for (uint32_t i = 0; i < tbl->header.column_count; i++) {
+        if (strcmp(tbl->header.columns[i].name, col_name) == 0) {
+            col = &tbl->header.columns[i];
+            break;
         }
-        new_indices[tbl->index_count] = idx;
-        tbl->indices     = new_indices;
-        tbl->index_count++;
+    }
+    if (!col) {
+        kdb_err_field_not_found(col_name, tbl->name);
+        return KDB_ERR_NOT_FOUND;
+    }
+    if (persist && tbl->read_only) {
+        kdb_err_table_read_only(tbl->name);
+        return KDB_ERR_READ_ONLY;
+    }
 
-        
-        kdb_index_rebuild(idx, tbl);
+    if (!kdb_index_find_kind(tbl->indices, tbl->index_count, col_name, kind)) {
+        KdbStatus st = kdb__table_attach_index(tbl, col_name, kind);
+        if (st != KDB_OK) return st;
     }
 
+    if (!persist || (col->indexed & kind)) return KDB_OK;
+    col->indexed     |= kind;
+    tbl->dirty        = 1;
+    tbl->schema_dirty = 1;
     return kdb_storage_flush_header(tbl);
 }
 
@@ -170,19 +243,22 @@ KdbStatus kdb_table_drop_column(KdbTable   *tbl,
                     &tbl->header.columns[i + 1],
                     (tbl->header.column_count - i - 1) * sizeof(KdbColumn));
             tbl->header.column_count--;
+            tbl->schema_dirty = 1;
+            tbl->mutations++;
             break;
         }
     }
 
     
-    for (uint32_t i = 0; i < tbl->index_count; i++) {
+    for (uint32_t i = 0; i < tbl->index_count; ) {
         if (tbl->indices[i] && strcmp(tbl->indices[i]->col_name, col_name) == 0) {
             kdb_index_free(tbl->indices[i]);
             memmove(&tbl->indices[i], &tbl->indices[i + 1],
                     (tbl->index_count - i - 1) * sizeof(KdbIndex *));
             tbl->index_count--;
-            break;
+            continue;
         }
+        i++;
     }
 
     
@@ -235,6 +311,8 @@ KdbStatus kdb_table_infer_schema(KdbTable *tbl, const KdbRecord *r) {
         col->nullable = 1;
         col->indexed  = 0;
         tbl->header.column_count++;
+        tbl->schema_dirty = 1;
+        tbl->mutations++;
     }
 
     tbl->dirty = 1;
@@ -253,29 +331,28 @@ KdbStatus kdb_table_insert(KdbTable *tbl, KdbRecord *r) {
     }
 
     KdbLock lock = { .fd = -1 };
-    KdbStatus st = kdb_lock_acquire(&lock, tbl->path, 1);
+    KdbStatus st = kdb_lock_acquire_cached(&lock, &tbl->lock_fd, tbl->path, 1);
     if (st != KDB_OK) return st;
+    st = kdb_table_refresh(tbl);
+    if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
 
     
     if (tbl->header.column_count == 0) {
         st = kdb_table_infer_schema(tbl, r);
         if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
     }
+    kdb_record_order_fields(r, tbl->header.columns, tbl->header.column_count);
 
-    
-    if (fseek(tbl->fp, 0, SEEK_END) != 0) {
-        kdb_lock_release(&lock);
-        kdb_err_io(tbl->path, "fseek before insert");
-        return KDB_ERR_IO;
-    }
-    uint64_t file_offset = (uint64_t)ftell(tbl->fp);
-
-    st = kdb_storage_append(tbl, r);
+    uint64_t file_offset = 0;
+    st = kdb_storage_append(tbl, r, tbl->index_count > 0 ? &file_offset : NULL);
     if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
 
     
     for (uint32_t i = 0; i < tbl->index_count; i++) {
-        kdb_index_insert(tbl->indices[i], r, file_offset);
+        if (kdb_index_insert(tbl->indices[i], r, file_offset) != KDB_OK) {
+            kdb__table_drop_indices(tbl);
+            break;
+        }
     }
 
     kdb_storage_flush_header(tbl);
@@ -294,29 +371,46 @@ KdbStatus kdb_table_insert_batch(KdbTable  *tbl,
     if (inserted_out) *inserted_out = 0;
 
     KdbLock lock = { .fd = -1 };
-    KdbStatus st = kdb_lock_acquire(&lock, tbl->path, 1);
+    KdbStatus st = kdb_lock_acquire_cached(&lock, &tbl->lock_fd, tbl->path, 1);
     if (st != KDB_OK) return st;
+    st = kdb_table_refresh(tbl);
+    if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
 
     if (tbl->header.column_count == 0 && count > 0) {
         st = kdb_table_infer_schema(tbl, &records[0]);
         if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
     }
+    for (size_t i = 0; i < count; i++)
+        kdb_record_order_fields(&records[i], tbl->header.columns, tbl->header.column_count);
 
-    for (size_t i = 0; i < count; i++) {
-        if (fseek(tbl->fp, 0, SEEK_END) != 0) {
+    uint64_t *offsets = NULL;
+    if (tbl->index_count > 0) {
+        offsets = (uint64_t *)malloc(KDB_MIN(count, (size_t)KDB_MAX_BATCH_SIZE) * sizeof(uint64_t));
+        if (!offsets) { kdb_lock_release(&lock); kdb_err_oom("batch offsets"); return KDB_ERR_OOM; }
+    }
+
+    
+    for (size_t done = 0; done < count; ) {
+        size_t chunk = KDB_MIN(count - done, (size_t)KDB_MAX_BATCH_SIZE);
+        st = kdb_storage_append_batch(tbl, records + done, chunk, offsets);
+        if (st != KDB_OK) {
+            free(offsets);
+            kdb_storage_flush_header(tbl);
             kdb_lock_release(&lock);
-            return KDB_ERR_IO;
+            return st;
         }
-        uint64_t file_offset = (uint64_t)ftell(tbl->fp);
-
-        st = kdb_storage_append(tbl, &records[i]);
-        if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
 
-        for (uint32_t j = 0; j < tbl->index_count; j++)
-            kdb_index_insert(tbl->indices[j], &records[i], file_offset);
+        for (uint32_t j = 0; offsets && j < tbl->index_count; j++) {
+            if (kdb_index_insert_batch(tbl->indices[j], records + done, chunk, offsets) != KDB_OK) {
+                kdb__table_drop_indices(tbl);
+                break;
+            }
+        }
 
-        if (inserted_out) (*inserted_out)++;
+        done += chunk;
+        if (inserted_out) *inserted_out = done;
     }
+    free(offsets);
 
     kdb_storage_flush_header(tbl);
     kdb_lock_release(&lock);
@@ -325,7 +419,7 @@ KdbStatus kdb_table_insert_batch(KdbTable  *tbl,
 
 
 typedef struct {
-    const KdbQuery  *query;
+    KdbPredicate     pred;
     const KdbRecord *patch;
     size_t          *updated_out;
 } KdbUpdateCtx;
@@ -336,7 +430,7 @@ static int kdb__update_transform(KdbRecord *r, void *ud) {
 
     
 
-    if (!kdb_query_matches(ctx->query, r)) return 1;
+    if (!kdb_predicate_matches(&ctx->pred, r)) return 1;
 
     
     for (uint32_t i = 0; i < ctx->patch->field_count; i++) {
@@ -364,17 +458,21 @@ KdbStatus kdb_table_update(KdbTable        *tbl,
     if (updated_out) *updated_out = 0;
 
     KdbLock lock = { .fd = -1 };
-    KdbStatus st = kdb_lock_acquire(&lock, tbl->path, 1);
+    KdbStatus st = kdb_lock_acquire_cached(&lock, &tbl->lock_fd, tbl->path, 1);
     if (st != KDB_OK) return st;
+    st = kdb_table_refresh(tbl);
+    if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
+    if (!kdb_query_may_match(tbl, query)) {
+        kdb_lock_release(&lock);
+        return KDB_OK;
+    }
 
-    KdbUpdateCtx ctx = { .query = query, .patch = patch, .updated_out = updated_out };
+    KdbUpdateCtx ctx = { .patch = patch, .updated_out = updated_out };
+    kdb_predicate_init(&ctx.pred, query, tbl);
     st = kdb_storage_rewrite(tbl, kdb__update_transform, &ctx);
 
-    if (st == KDB_OK && tbl->index_count > 0) {
-        
-        for (uint32_t i = 0; i < tbl->index_count; i++)
-            kdb_index_rebuild(tbl->indices[i], tbl);
-    }
+    if (st == KDB_OK && tbl->index_count > 0)
+        kdb__table_rebuild_indices(tbl);
 
     kdb_lock_release(&lock);
     return st;
@@ -382,20 +480,72 @@ KdbStatus kdb_table_update(KdbTable        *tbl,
 
 
 typedef struct {
-    const KdbQuery *query;
-    size_t         *deleted_out;
+    KdbPredicate pred;
+    size_t      *deleted_out;
 } KdbDeleteCtx;
 
 static int kdb__delete_transform(KdbRecord *r, void *ud) {
     KdbDeleteCtx *ctx = (KdbDeleteCtx *)ud;
     if (r->deleted) return 1;
-    if (kdb_query_matches(ctx->query, r)) {
+    if (kdb_predicate_matches(&ctx->pred, r)) {
         r->deleted = 1;
         if (ctx->deleted_out) (*ctx->deleted_out)++;
     }
     return 1;
 }
 
+typedef struct {
+    KdbTable  *tbl;
+    uint64_t  *offsets;
+    size_t     count;
+    size_t     capacity;
+    KdbStatus  status;
+} KdbTombstoneCtx;
+
+static int kdb__tombstone_collect_cb(const KdbRecord *r, uint64_t offset, void *ud) {
+    KdbTombstoneCtx *ctx = (KdbTombstoneCtx *)ud;
+    if (ctx->count >= ctx->capacity) {
+        size_t    new_cap = ctx->capacity ? ctx->capacity * 2 : 16;
+        uint64_t *grown   = realloc(ctx->offsets, new_cap * sizeof(uint64_t));
+        if (!grown) {
+            kdb_err_oom("tombstone offsets");
+            ctx->status = KDB_ERR_OOM;
+            return 0;
+        }
+        ctx->offsets  = grown;
+        ctx->capacity = new_cap;
+    }
+    ctx->offsets[ctx->count++] = offset;
+
+    for (uint32_t i = 0; i < ctx->tbl->index_count; i++) {
+        KdbIndex             *idx   = ctx->tbl->indices[i];
+        const KdbRecordField *field = kdb_record_get_field(r, idx->col_name);
+        if (field) kdb_index_remove(idx, &field->value, r->id);
+    }
+    return 1;
+}
+
+
+static KdbStatus kdb__delete_in_place(KdbTable       *tbl,
+                                      const KdbQuery *query,
+                                      size_t         *deleted_out,
+                                      int            *handled) {
+    KdbTombstoneCtx ctx = { .tbl = tbl, .status = KDB_OK };
+    KdbStatus st = kdb_query_each_candidate(tbl, query, kdb__tombstone_collect_cb, &ctx, handled);
+    if (st == KDB_OK) st = ctx.status;
+    if (st == KDB_OK && *handled && ctx.count > 0) {
+        st = kdb_storage_tombstone(tbl, ctx.offsets, ctx.count);
+        if (st == KDB_OK) st = kdb_storage_flush_header(tbl);
+    }
+    if (st == KDB_OK && *handled && deleted_out) *deleted_out = ctx.count;
+
+    
+    if (st != KDB_OK && ctx.count > 0)
+        kdb__table_rebuild_indices(tbl);
+    free(ctx.offsets);
+    return st;
+}
+
 KdbStatus kdb_table_delete(KdbTable       *tbl,
                            const KdbQuery *query,
                            size_t         *deleted_out) {
@@ -410,16 +560,25 @@ KdbStatus kdb_table_delete(KdbTable       *tbl,
     if (deleted_out) *deleted_out = 0;
 
     KdbLock lock = { .fd = -1 };
-    KdbStatus st = kdb_lock_acquire(&lock, tbl->path, 1);
+    KdbStatus st = kdb_lock_acquire_cached(&lock, &tbl->lock_fd, tbl->path, 1);
     if (st != KDB_OK) return st;
+    st = kdb_table_refresh(tbl);
+    if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
 
-    KdbDeleteCtx ctx = { .query = query, .deleted_out = deleted_out };
+    
+    int handled = 0;
+    st = kdb__delete_in_place(tbl, query, deleted_out, &handled);
+    if (handled || st != KDB_OK) {
+        kdb_lock_release(&lock);
+        return st;
+    }
+
+    KdbDeleteCtx ctx = { .deleted_out = deleted_out };
+    kdb_predicate_init(&ctx.pred, query, tbl);
     st = kdb_storage_rewrite(tbl, kdb__delete_transform, &ctx);
 
-    if (st == KDB_OK && tbl->index_count > 0) {
-        for (uint32_t i = 0; i < tbl->index_count; i++)
-            kdb_index_rebuild(tbl->indices[i], tbl);
-    }
+    if (st == KDB_OK && tbl->index_count > 0)
+        kdb__table_rebuild_indices(tbl);
 
     kdb_lock_release(&lock);
     return st;
@@ -430,15 +589,15 @@ KdbStatus kdb_table_compact(KdbTable *tbl) {
     if (!tbl) { kdb_err_null_arg("tbl", "kdb_table_compact"); return KDB_ERR_BAD_ARG; }
 
     KdbLock lock = { .fd = -1 };
-    KdbStatus st = kdb_lock_acquire(&lock, tbl->path, 1);
+    KdbStatus st = kdb_lock_acquire_cached(&lock, &tbl->lock_fd, tbl->path, 1);
     if (st != KDB_OK) return st;
+    st = kdb_table_refresh(tbl);
+    if (st != KDB_OK) { kdb_lock_release(&lock); return st; }
 
     st = kdb_storage_compact(tbl);
 
-    if (st == KDB_OK && tbl->index_count > 0) {
-        for (uint32_t i = 0; i < tbl->index_count; i++)
-            kdb_index_rebuild(tbl->indices[i], tbl);
-    }
+    if (st == KDB_OK && tbl->index_count > 0)
+        kdb__table_rebuild_indices(tbl);
 
     kdb_lock_release(&lock);
     return st;
@@ -449,11 +608,12 @@ void kdb_table_print_schema(const KdbTable *tbl, FILE *fp) {
     fprintf(fp, "Table: %s (%u columns)\n", tbl->name, tbl->header.column_count);
     for (uint32_t i = 0; i < tbl->header.column_count; i++) {
         const KdbColumn *c = &tbl->header.columns[i];
-        fprintf(fp, "  %-24s %s%s%s\n",
+        fprintf(fp, "  %-24s %s%s%s%s\n",
                 c->name,
                 kdb_type_name(c->type),
                 c->nullable ? "" : " NOT NULL",
-                c->indexed  ? " INDEXED" : "");
+                (c->indexed & KDB_INDEX_HASH)    ? " INDEXED" : "",
+                (c->indexed & KDB_INDEX_TRIGRAM) ? " TEXT INDEXED" : "");
     }
 }
 
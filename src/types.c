@@ -22,6 +22,24 @@ static const char *kdb__skip_ws(const char *s) {
     return s;
 }
 
+static int kdb__parse_int_fast(const char *s, int64_t *out) {
+    int neg = 0;
+    if (*s == '-' || *s == '+') neg = (*s++ == '-');
+
+    const char *digits = s;
+    uint64_t    v      = 0;
+    while (*s >= '0' && *s <= '9') {
+        v = v * 10 + (uint64_t)(*s - '0');
+        s++;
+    }
+
+    
+    size_t n = (size_t)(s - digits);
+    if (n == 0 || n > 18 || *s != '\0') return 0;
+    *out = neg ? -(int64_t)v : (int64_t)v;
+    return 1;
+}
+
 
 int kdb_str_is_null(const char *s) {
     if (!s) return 1;
@@ -79,10 +97,54 @@ int kdb_str_is_float(const char *s) {
 
 KdbType kdb_type_infer(const char *raw) {
     if (!raw) return KDB_TYPE_NULL;
-    if (kdb_str_is_null(raw))  return KDB_TYPE_NULL;
-    if (kdb_str_is_bool(raw))  return KDB_TYPE_BOOL;
-    if (kdb_str_is_int(raw))   return KDB_TYPE_INT;
-    if (kdb_str_is_float(raw)) return KDB_TYPE_FLOAT;
+    const char *s = kdb__skip_ws(raw);
+
+    
+    switch (*s) {
+        case '\0':
+            return KDB_TYPE_NULL;
+        case 'n': case 'N':
+            if (strcasecmp(s, "null") == 0 || strcasecmp(s, "nil") == 0) return KDB_TYPE_NULL;
+            if (strcasecmp(s, "no") == 0) return KDB_TYPE_BOOL;
+            return KDB_TYPE_STRING;
+        case 't': case 'T':
+            return strcasecmp(s, "true")  == 0 ? KDB_TYPE_BOOL : KDB_TYPE_STRING;
+        case 'f': case 'F':
+            return strcasecmp(s, "false") == 0 ? KDB_TYPE_BOOL : KDB_TYPE_STRING;
+        case 'y': case 'Y':
+            return strcasecmp(s, "yes")   == 0 ? KDB_TYPE_BOOL : KDB_TYPE_STRING;
+        case '0': case '1':
+            if (s[1] == '\0') return KDB_TYPE_BOOL;
+            break;
+        default:
+            break;
+    }
+
+    
+    const char *p = s;
+    if (*p == '-' || *p == '+') p++;
+    const char *digits = p;
+    while (isdigit((unsigned char)*p)) p++;
+    int has_digit = p > digits;
+    if (*p == '\0') return has_digit ? KDB_TYPE_INT : KDB_TYPE_STRING;
+
+    int has_dot = 0;
+    if (*p == '.') {
+        has_dot = 1;
+        const char *frac = ++p;
+        while (isdigit((unsigned char)*p)) p++;
+        if (p > frac) has_digit = 1;
+    }
+    if (!has_digit) return KDB_TYPE_STRING;
+    if (*p == '\0') return has_dot ? KDB_TYPE_FLOAT : KDB_TYPE_STRING;
+
+    if (*p == 'e' || *p == 'E') {
+        p++;
+        if (*p == '-' || *p == '+') p++;
+        if (!isdigit((unsigned char)*p)) return KDB_TYPE_STRING;
+        while (isdigit((unsigned char)*p)) p++;
+        return (*p == '\0') ? KDB_TYPE_FLOAT : KDB_TYPE_STRING;
+    }
     return KDB_TYPE_STRING;
 }
 
@@ -111,6 +173,23 @@ KdbStatus kdb_value_from_bool(uint8_t v, KdbValue *out) {
     return KDB_OK;
 }
 
+KdbStatus kdb_value_from_blob(const void *data, size_t len, KdbValue *out) {
+    if (!out || (!data && len > 0)) return KDB_ERR_BAD_ARG;
+    if (len > KDB_MAX_STRING_LEN) {
+        kdb_err_bad_arg("blob", "longer than KDB_MAX_STRING_LEN bytes");
+        return KDB_ERR_BAD_ARG;
+    }
+    memset(out, 0, sizeof(*out));
+
+    uint8_t *copy = malloc(len ? len : 1);
+    if (!copy) { kdb_err_oom("blob value"); return KDB_ERR_OOM; }
+    if (len > 0) memcpy(copy, data, len);
+    out->type           = KDB_TYPE_BLOB;
+    out->v.as_blob.data = copy;
+    out->v.as_blob.len  = len;
+    return KDB_OK;
+}
+
 KdbStatus kdb_value_from_null(KdbValue *out) {
     if (!out) return KDB_ERR_BAD_ARG;
     memset(out, 0, sizeof(*out));
@@ -139,6 +218,9 @@ KdbStatus kdb_value_from_string(const char *raw, KdbType hint, KdbValue *out) {
         }
 
         case KDB_TYPE_INT: {
+            int64_t fast = 0;
+            if (kdb__parse_int_fast(raw, &fast)) return kdb_value_from_int(fast, out);
+
             char *end = NULL;
             errno = 0;
             int64_t v = (int64_t)strtoll(raw, &end, 10);
@@ -193,9 +275,10 @@ KdbStatus kdb_value_copy(const KdbValue *src, KdbValue *dst) {
             break;
         }
         case KDB_TYPE_BLOB: {
-            uint8_t *copy = malloc(src->v.as_blob.len);
+            uint8_t *copy = malloc(src->v.as_blob.len ? src->v.as_blob.len : 1);
             if (!copy) { kdb_err_oom("blob copy"); return KDB_ERR_OOM; }
-            memcpy(copy, src->v.as_blob.data, src->v.as_blob.len);
+            if (src->v.as_blob.len > 0)
+                memcpy(copy, src->v.as_blob.data, src->v.as_blob.len);
             dst->v.as_blob.data = copy;
             dst->v.as_blob.len  = src->v.as_blob.len;
             break;
@@ -241,6 +324,10 @@ int kdb_value_compare(const KdbValue *a, const KdbValue *b) {
     if (b->type == KDB_TYPE_NULL) return  1;
 
     
+    if (a->type == KDB_TYPE_INT && b->type == KDB_TYPE_INT)
+        return (a->v.as_int > b->v.as_int) - (a->v.as_int < b->v.as_int);
+
+    
     int a_num = (a->type == KDB_TYPE_INT || a->type == KDB_TYPE_FLOAT);
     int b_num = (b->type == KDB_TYPE_INT || b->type == KDB_TYPE_FLOAT);
     if (a_num && b_num) {
@@ -264,19 +351,34 @@ int kdb_value_compare(const KdbValue *a, const KdbValue *b) {
 }
 
 
+static int kdb__string_op(const char  *hay,
+                          size_t       hay_len,
+                          const char  *needle,
+                          size_t       needle_len,
+                          KdbOperator  op) {
+    
+    if (needle_len > hay_len) return 0;
+    if (needle_len == 0)      return 1;
+
+    switch (op) {
+        case KDB_OP_STARTSWITH: return memcmp(hay, needle, needle_len) == 0;
+        case KDB_OP_ENDSWITH:   return memcmp(hay + (hay_len - needle_len), needle, needle_len) == 0;
+        default:                return memmem(hay, hay_len, needle, needle_len) != NULL;
+    }
+}
+
 int kdb_value_matches(const KdbValue *field,
                       KdbOperator     op,
                       const KdbValue *fv,
                       const KdbValue *fv2) {
     if (!field) return 0;
+    if (op == KDB_OP_IS_NULL)     return field->type == KDB_TYPE_NULL;
+    if (op == KDB_OP_IS_NOT_NULL) return field->type != KDB_TYPE_NULL;
 
-    switch (op) {
-        case KDB_OP_IS_NULL:
-            return field->type == KDB_TYPE_NULL;
-
-        case KDB_OP_IS_NOT_NULL:
-            return field->type != KDB_TYPE_NULL;
+    
+    if (field->type == KDB_TYPE_NULL && fv && fv->type != KDB_TYPE_NULL) return 0;
 
+    switch (op) {
         case KDB_OP_EQ: {
             int cmp = kdb_value_compare(field, fv);
             return cmp != INT32_MIN && cmp == 0;
@@ -302,26 +404,12 @@ int kdb_value_matches(const KdbValue *field,
             return cmp != INT32_MIN && cmp <= 0;
         }
         case KDB_OP_CONTAINS:
-            if (field->type != KDB_TYPE_STRING || fv->type != KDB_TYPE_STRING)
-                return 0;
-            return strstr(field->v.as_string.data, fv->v.as_string.data) != NULL;
-
         case KDB_OP_STARTSWITH:
+        case KDB_OP_ENDSWITH:
             if (field->type != KDB_TYPE_STRING || fv->type != KDB_TYPE_STRING)
                 return 0;
-            return strncmp(field->v.as_string.data,
-                           fv->v.as_string.data,
-                           fv->v.as_string.len) == 0;
-
-        case KDB_OP_ENDSWITH: {
-            if (field->type != KDB_TYPE_STRING || fv->type != KDB_TYPE_STRING)
-                return 0;
-            size_t flen = field->v.as_string.len;
-            size_t slen = fv->v.as_string.len;
-            if (slen > flen) return 0;
-            return strcmp(field->v.as_string.data + (flen - slen),
-                          fv->v.as_string.data) == 0;
-        }
+            return kdb__string_op(field->v.as_string.data, field->v.as_string.len,
+                                  fv->v.as_string.data, fv->v.as_string.len, op);
 
         case KDB_OP_BETWEEN: {
             if (!fv2) return 0;
@@ -352,23 +440,30 @@ const char *kdb_type_name(KdbType type) {
     }
 }
 
+typedef struct {
+    const char *name;
+    uint8_t     len;
+} KdbOpName;
+
+static const KdbOpName kdb__op_names[] = {
+    [KDB_OP_EQ]          = { "eq",         2 },
+    [KDB_OP_NEQ]         = { "neq",        3 },
+    [KDB_OP_GT]          = { "gt",         2 },
+    [KDB_OP_GTE]         = { "gte",        3 },
+    [KDB_OP_LT]          = { "lt",         2 },
+    [KDB_OP_LTE]         = { "lte",        3 },
+    [KDB_OP_CONTAINS]    = { "contains",   8 },
+    [KDB_OP_STARTSWITH]  = { "startswith", 10 },
+    [KDB_OP_ENDSWITH]    = { "endswith",   8 },
+    [KDB_OP_IN]          = { "in",         2 },
+    [KDB_OP_BETWEEN]     = { "between",    7 },
+    [KDB_OP_IS_NULL]     = { "isnull",     6 },
+    [KDB_OP_IS_NOT_NULL] = { "isnotnull",  9 },
+};
+
 const char *kdb_op_name(KdbOperator op) {
-    switch (op) {
-        case KDB_OP_EQ:          return "eq";
-        case KDB_OP_NEQ:         return "neq";
-        case KDB_OP_GT:          return "gt";
-        case KDB_OP_GTE:         return "gte";
-        case KDB_OP_LT:          return "lt";
-        case KDB_OP_LTE:         return "lte";
-        case KDB_OP_CONTAINS:    return "contains";
-        case KDB_OP_STARTSWITH:  return "startswith";
-        case KDB_OP_ENDSWITH:    return "endswith";
-        case KDB_OP_IN:          return "in";
-        case KDB_OP_BETWEEN:     return "between";
-        case KDB_OP_IS_NULL:     return "isnull";
-        case KDB_OP_IS_NOT_NULL: return "isnotnull";
-        default:                 return "unknown";
-    }
+    if ((unsigned)op >= KDB_ARRAY_LEN(kdb__op_names)) return "unknown";
+    return kdb__op_names[op].name;
 }
 
 
@@ -401,19 +496,14 @@ KdbStatus kdb_parse_filter_key(const char  *key,
     
     const char *op_str = sep + 2;
 
-    if (strcmp(op_str, "eq")          == 0) { *op_out = KDB_OP_EQ;          return KDB_OK; }
-    if (strcmp(op_str, "neq")         == 0) { *op_out = KDB_OP_NEQ;         return KDB_OK; }
-    if (strcmp(op_str, "gt")          == 0) { *op_out = KDB_OP_GT;          return KDB_OK; }
-    if (strcmp(op_str, "gte")         == 0) { *op_out = KDB_OP_GTE;         return KDB_OK; }
-    if (strcmp(op_str, "lt")          == 0) { *op_out = KDB_OP_LT;          return KDB_OK; }
-    if (strcmp(op_str, "lte")         == 0) { *op_out = KDB_OP_LTE;         return KDB_OK; }
-    if (strcmp(op_str, "contains")    == 0) { *op_out = KDB_OP_CONTAINS;    return KDB_OK; }
-    if (strcmp(op_str, "startswith")  == 0) { *op_out = KDB_OP_STARTSWITH;  return KDB_OK; }
-    if (strcmp(op_str, "endswith")    == 0) { *op_out = KDB_OP_ENDSWITH;    return KDB_OK; }
-    if (strcmp(op_str, "in")          == 0) { *op_out = KDB_OP_IN;          return KDB_OK; }
-    if (strcmp(op_str, "between")     == 0) { *op_out = KDB_OP_BETWEEN;     return KDB_OK; }
-    if (strcmp(op_str, "isnull")      == 0) { *op_out = KDB_OP_IS_NULL;     return KDB_OK; }
-    if (strcmp(op_str, "isnotnull")   == 0) { *op_out = KDB_OP_IS_NOT_NULL; return KDB_OK; }
+    size_t      op_len = strlen(op_str);
+    for (uint32_t i = 0; i < KDB_ARRAY_LEN(kdb__op_names); i++) {
+        if (kdb__op_names[i].len == op_len &&
+            memcmp(kdb__op_names[i].name, op_str, op_len) == 0) {
+            *op_out = (KdbOperator)i;
+            return KDB_OK;
+        }
+    }
 
     kdb_err_bad_filter(key, "unknown operator suffix — valid: eq, neq, gt, gte, lt, lte, "
                             "contains, startswith, endswith, in, between, isnull, isnotnull");
@@ -139,6 +139,342 @@ static void test_count(void) {
     const char *filters[] = { "val__lt=3", NULL };
     ASSERT_EQ(kdb_count(db, TABLE, filters), 3);
 
+    KdbField low[]  = { kdb_field_int("val", 1),  kdb_field_end() };
+    KdbField high[] = { kdb_field_int("val", 10), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, low));
+    ASSERT_OK(kdb_add(db, TABLE, high));
+    ASSERT_EQ(kdb_count(db, TABLE, filters), 4);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 7);
+
+    const char *gone[] = { "val=0", NULL };
+    ASSERT_OK(kdb_delete(db, TABLE, gone, NULL));
+    ASSERT_OK(kdb_add(db, TABLE, low));
+    ASSERT_EQ(kdb_count(db, TABLE, filters), 4);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 7);
+
+    teardown(db);
+}
+
+static void test_batch_import(void) {
+    KumDB *db;
+    setup(&db);
+
+    char names[200][16];
+    KdbField fields[200][3];
+    const KdbField *rows[200];
+    for (int i = 0; i < 200; i++) {
+        snprintf(names[i], sizeof(names[i]), "row%d", i);
+        fields[i][0] = kdb_field_string("name", names[i]);
+        fields[i][1] = kdb_field_int   ("n",    i);
+        fields[i][2] = kdb_field_end   ();
+        rows[i] = fields[i];
+    }
+
+    size_t inserted = 0;
+    ASSERT_OK(kdb_batch_import(db, TABLE, rows, 200, &inserted));
+    ASSERT_EQ(inserted, 200u);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 200);
+
+    const char *filters[] = { "name=row123", NULL };
+    KdbRow *row = kdb_find_one(db, TABLE, filters);
+    ASSERT(row != NULL);
+    int64_t n = 0;
+    ASSERT_OK(kdb_row_get_int(row, "n", &n));
+    ASSERT_EQ(n, 123);
+    kdb_row_free(row);
+
+    teardown(db);
+}
+
+static KdbStatus reject_negative(const KdbRow *row, void *user_data) {
+    int64_t n = 0;
+    (*(int *)user_data)++;
+    return (kdb_row_get_int(row, "n", &n) == KDB_OK && n >= 0) ? KDB_OK : KDB_ERR_VALIDATION;
+}
+
+static KdbStatus require_named(const KdbRow *row, void *user_data) {
+    const char *name = NULL;
+    KDB_UNUSED(user_data);
+    return (kdb_row_get_string(row, "name", &name) == KDB_OK && name[0]) ? KDB_OK : KDB_ERR_VALIDATION;
+}
+
+static void test_add_validated(void) {
+    KumDB *db;
+    setup(&db);
+
+    KdbField ok[]  = { kdb_field_string("name", "Alice"), kdb_field_int("n", 1), kdb_field_end() };
+    KdbField bad[] = { kdb_field_string("name", ""),      kdb_field_int("n", 2), kdb_field_end() };
+    ASSERT_OK(kdb_add_validated(db, TABLE, ok, require_named, NULL));
+    ASSERT_EQ(kdb_add_validated(db, TABLE, bad, require_named, NULL), KDB_ERR_VALIDATION);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 1);
+
+    teardown(db);
+}
+
+static void test_batch_import_validated(void) {
+    KumDB *db;
+    setup(&db);
+
+    KdbField fields[3][2];
+    const KdbField *rows[3];
+    for (int i = 0; i < 3; i++) {
+        fields[i][0] = kdb_field_int("n", i);
+        fields[i][1] = kdb_field_end();
+        rows[i] = fields[i];
+    }
+
+    int    calls    = 0;
+    size_t inserted = 0;
+    ASSERT_OK(kdb_batch_import_validated(db, TABLE, rows, 3, reject_negative, &calls, &inserted));
+    ASSERT_EQ(calls, 3);
+    ASSERT_EQ(inserted, 3u);
+
+    fields[1][0] = kdb_field_int("n", -1);
+    ASSERT_EQ(kdb_batch_import_validated(db, TABLE, rows, 3, reject_negative, &calls, &inserted),
+              KDB_ERR_VALIDATION);
+    ASSERT_EQ(inserted, 0u);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 3);
+
+    teardown(db);
+}
+
+static void test_create_index(void) {
+    KumDB *db;
+    setup(&db);
+
+    char names[300][16];
+    KdbField fields[300][4];
+    const KdbField *rows[300];
+    for (int i = 0; i < 300; i++) {
+        snprintf(names[i], sizeof(names[i]), "row%d", i);
+        fields[i][0] = kdb_field_string("name", names[i]);
+        fields[i][1] = kdb_field_int   ("grp",  i % 10);
+        fields[i][2] = kdb_field_int   ("n",    i);
+        fields[i][3] = kdb_field_end   ();
+        rows[i] = fields[i];
+    }
+    ASSERT_OK(kdb_batch_import(db, TABLE, rows, 300, NULL));
+
+    ASSERT(kdb_create_index(db, TABLE, "nope") == KDB_ERR_NOT_FOUND);
+    ASSERT_OK(kdb_create_index(db, TABLE, "grp"));
+
+    const char *grp[] = { "grp=3", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, grp), 30);
+
+    const char *both[] = { "grp=3", "n__gte=200", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, both), 10);
+
+    const char *none[] = { "grp=42", NULL };
+    size_t deleted = 99;
+    ASSERT_OK(kdb_delete(db, TABLE, none, &deleted));
+    ASSERT_EQ(deleted, 0u);
+
+    
+    const char *by_name[] = { "name=row77", NULL };
+    for (int i = 0; i < 5; i++) {
+        KdbRow *row = kdb_find_one(db, TABLE, by_name);
+        ASSERT(row != NULL);
+        if (row) ASSERT_EQ(row->id, 78u);
+        kdb_row_free(row);
+    }
+
+    KdbField extra[] = { kdb_field_string("name", "row77"), kdb_field_int("grp", 3), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, extra));
+    ASSERT_EQ(kdb_count(db, TABLE, by_name), 2);
+    ASSERT_EQ(kdb_count(db, TABLE, grp), 31);
+    ASSERT_OK(kdb_create_index(db, TABLE, "name"));
+
+    kdb_close(db);
+    db = kdb_open(TEST_DIR);
+    ASSERT(db != NULL);
+    ASSERT_EQ(kdb_count(db, TABLE, grp), 31);
+    ASSERT_EQ(kdb_count(db, TABLE, by_name), 2);
+
+    teardown(db);
+}
+
+static void test_index_mixed_numeric(void) {
+    KumDB *db;
+    setup(&db);
+
+    for (int i = 0; i < 40; i++) {
+        KdbField f[] = { kdb_field_int("x", i), kdb_field_end() };
+        ASSERT_OK(kdb_add(db, TABLE, f));
+    }
+    KdbField as_float[] = { kdb_field_float("x", 5.0), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, as_float));
+
+    
+    const char *five[] = { "x=5", NULL };
+    KdbRows *rows = kdb_find(db, TABLE, five);
+    ASSERT(rows != NULL);
+    if (rows) ASSERT_EQ(rows->count, 2u);
+    kdb_rows_free(rows);
+
+    ASSERT_OK(kdb_create_index(db, TABLE, "x"));
+    ASSERT_EQ(kdb_count(db, TABLE, five), 2);
+    const char *five_f[] = { "x=5.0", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, five_f), 2);
+
+    teardown(db);
+}
+
+static void test_create_text_index(void) {
+    KumDB *db;
+    setup(&db);
+
+    char names[300][16];
+    KdbField fields[300][3];
+    const KdbField *rows[300];
+    for (int i = 0; i < 300; i++) {
+        snprintf(names[i], sizeof(names[i]), "row%d", i);
+        fields[i][0] = kdb_field_string("name", names[i]);
+        fields[i][1] = kdb_field_int   ("n",    i);
+        fields[i][2] = kdb_field_end   ();
+        rows[i] = fields[i];
+    }
+    ASSERT_OK(kdb_batch_import(db, TABLE, rows, 300, NULL));
+    ASSERT_OK(kdb_create_text_index(db, TABLE, "name"));
+
+    const char *sub[]    = { "name__contains=w12", NULL };
+    const char *prefix[] = { "name__startswith=row29", NULL };
+    const char *shorty[] = { "name__contains=w1", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, sub), 11);
+    ASSERT_EQ(kdb_count(db, TABLE, prefix), 11);
+    ASSERT_EQ(kdb_count(db, TABLE, shorty), 111);
+
+    const char *gone[] = { "name=row125", NULL };
+    ASSERT_OK(kdb_delete(db, TABLE, gone, NULL));
+    ASSERT_EQ(kdb_count(db, TABLE, sub), 10);
+
+    KdbRows *hits = kdb_find_text(db, TABLE, "name", "w12", 3);
+    ASSERT(hits != NULL);
+    if (hits) {
+        ASSERT_EQ(hits->count, 3u);
+        if (hits->count == 3) ASSERT_EQ(hits->rows[0].id, 130u);
+        kdb_rows_free(hits);
+    }
+
+    char long_name[601];
+    for (int i = 0; i < 600; i++) long_name[i] = "xyz"[i % 3];
+    long_name[600] = '\0';
+    KdbField repeat[] = { kdb_field_string("name", long_name), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, repeat));
+    const char *zxy[] = { "name__contains=zxyz", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, zxy), 1);
+    ASSERT_OK(kdb_delete(db, TABLE, zxy, NULL));
+    ASSERT_EQ(kdb_count(db, TABLE, zxy), 0);
+
+    kdb_close(db);
+    db = kdb_open(TEST_DIR);
+    ASSERT(db != NULL);
+    ASSERT_EQ(kdb_count(db, TABLE, sub), 10);
+    ASSERT_EQ(kdb_count(db, TABLE, shorty), 110);
+
+    teardown(db);
+}
+
+static void test_open_memory(void) {
+    KumDB *db = kdb_open_memory();
+    ASSERT(db != NULL);
+    if (!db) return;
+
+    char dir[4096];
+    snprintf(dir, sizeof(dir), "%s", db->data_dir);
+
+    for (int i = 0; i < 20; i++) {
+        KdbField f[] = { kdb_field_int("n", i), kdb_field_end() };
+        ASSERT_OK(kdb_add(db, TABLE, f));
+    }
+    const char *small[] = { "n__lt=5", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, small), 5);
+    ASSERT_OK(kdb_delete(db, TABLE, small, NULL));
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 15);
+
+    system("rm -rf " TEST_DIR);
+    ASSERT_OK(kdb_backup(db, TEST_DIR));
+    kdb_close(db);
+
+    struct stat sb;
+    ASSERT(stat(dir, &sb) != 0);
+
+    db = kdb_open(TEST_DIR);
+    ASSERT(db != NULL);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 15);
+    KdbField f[] = { kdb_field_int("n", 99), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, f));
+    const char *last[] = { "n=99", NULL };
+    KdbRow *row = kdb_find_one(db, TABLE, last);
+    ASSERT(row != NULL);
+    if (row) ASSERT_EQ(row->id, 21u);
+    kdb_row_free(row);
+    teardown(db);
+}
+
+static void test_find_by_id_and_delete(void) {
+    KumDB *db;
+    setup(&db);
+
+    KdbField fields[300][3];
+    const KdbField *rows[300];
+    for (int i = 0; i < 300; i++) {
+        fields[i][0] = kdb_field_int("grp", i % 10);
+        fields[i][1] = kdb_field_int("n",   i);
+        fields[i][2] = kdb_field_end();
+        rows[i] = fields[i];
+    }
+    ASSERT_OK(kdb_batch_import(db, TABLE, rows, 300, NULL));
+
+    KdbRow *row = kdb_find_by_id(db, TABLE, 150);
+    ASSERT(row != NULL);
+    int64_t n = -1;
+    if (row) ASSERT_OK(kdb_row_get_int(row, "n", &n));
+    ASSERT_EQ(n, 149);
+    kdb_row_free(row);
+
+    row = kdb_find_by_id(db, TABLE, 1);
+    ASSERT(row != NULL);
+    kdb_row_free(row);
+    ASSERT(kdb_find_by_id(db, TABLE, 0) == NULL);
+    ASSERT_EQ(kdb_last_status(), KDB_ERR_NOT_FOUND);
+
+    const char *first[] = { "id=1", NULL };
+    const char *above[] = { "id__gt=290", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, first), 1);
+    ASSERT_EQ(kdb_count(db, TABLE, above), 10);
+
+    const char *one[] = { "id=150", NULL };
+    size_t deleted = 0;
+    ASSERT_OK(kdb_delete(db, TABLE, one, &deleted));
+    ASSERT_EQ(deleted, 1u);
+    ASSERT(kdb_find_by_id(db, TABLE, 150) == NULL);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 299);
+
+    ASSERT_OK(kdb_create_index(db, TABLE, "grp"));
+    const char *grp[] = { "grp=3", NULL };
+    ASSERT_OK(kdb_delete(db, TABLE, grp, &deleted));
+    ASSERT_EQ(deleted, 30u);
+    ASSERT_EQ(kdb_count(db, TABLE, grp), 0);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 269);
+
+    KdbField extra[] = { kdb_field_int("grp", 3), kdb_field_int("n", 300), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, extra));
+    row = kdb_find_by_id(db, TABLE, 301);
+    ASSERT(row != NULL);
+    kdb_row_free(row);
+    ASSERT_EQ(kdb_count(db, TABLE, grp), 1);
+
+    ASSERT_OK(kdb_compact(db, TABLE));
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 270);
+
+    kdb_close(db);
+    db = kdb_open(TEST_DIR);
+    ASSERT(db != NULL);
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 270);
+    row = kdb_find_by_id(db, TABLE, 149);
+    ASSERT(row != NULL);
+    kdb_row_free(row);
+
     teardown(db);
 }
 
@@ -216,6 +552,18 @@ static void test_compact(void) {
     ASSERT_OK(kdb_compact(db, TABLE));
     ASSERT_EQ(kdb_count(db, TABLE, NULL), 5);
 
+    const char *newest[] = { "n__gte=8", NULL };
+    ASSERT_OK(kdb_delete(db, TABLE, newest, &deleted));
+    ASSERT_OK(kdb_compact(db, TABLE));
+
+    KdbField f[] = { kdb_field_int("n", 99), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, f));
+    const char *added[] = { "n=99", NULL };
+    KdbRow *row = kdb_find_one(db, TABLE, added);
+    ASSERT(row != NULL);
+    if (row) ASSERT_EQ(row->id, 11u);
+    kdb_row_free(row);
+
     teardown(db);
 }
 
@@ -262,6 +610,38 @@ static void test_reopen(void) {
     system("rm -rf " TEST_DIR);
 }
 
+static void test_sees_external_writes(void) {
+    KumDB *db;
+    setup(&db);
+    KumDB *other = kdb_open(TEST_DIR);
+    ASSERT(other != NULL);
+
+    KdbField a[] = { kdb_field_int("n", 1), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, a));
+    ASSERT_EQ(kdb_count(other, TABLE, NULL), 1);
+
+    KdbField b[] = { kdb_field_int("n", 2), kdb_field_end() };
+    ASSERT_OK(kdb_add(other, TABLE, b));
+    ASSERT_OK(kdb_add(db, TABLE, a));
+    ASSERT_EQ(kdb_count(db, TABLE, NULL), 3);
+
+    const char *mine[] = { "n=1", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, mine), 2);
+    KdbRow *row = kdb_find_by_id(other, TABLE, 3);
+    ASSERT(row != NULL);
+    kdb_row_free(row);
+
+    ASSERT_OK(kdb_compact(other, TABLE));
+    ASSERT_OK(kdb_add(db, TABLE, b));
+    ASSERT_EQ(kdb_count(other, TABLE, NULL), 4);
+    row = kdb_find_by_id(other, TABLE, 4);
+    ASSERT(row != NULL);
+    kdb_row_free(row);
+
+    kdb_close(other);
+    teardown(db);
+}
+
 static void test_row_accessors(void) {
     KumDB *db;
     setup(&db);
@@ -298,6 +678,36 @@ static void test_row_accessors(void) {
     teardown(db);
 }
 
+static void test_blob_roundtrip(void) {
+    KumDB *db;
+    setup(&db);
+
+    const uint8_t payload[] = { 0x00, 0xff, 0x10, 0x00, 0x7f };
+    KdbField f[] = {
+        kdb_field_string("name",  "bin"),
+        kdb_field_blob  ("data",  payload, sizeof(payload)),
+        kdb_field_blob  ("empty", NULL, 0),
+        kdb_field_end   ()
+    };
+    ASSERT_OK(kdb_add(db, TABLE, f));
+
+    const char *filters[] = { "name=bin", NULL };
+    KdbRow *row = kdb_find_one(db, TABLE, filters);
+    ASSERT(row != NULL);
+
+    const void *data = NULL;
+    size_t      len  = 0;
+    ASSERT_OK(kdb_row_get_blob(row, "data", &data, &len));
+    ASSERT_EQ(len, sizeof(payload));
+    ASSERT(data && memcmp(data, payload, sizeof(payload)) == 0);
+
+    ASSERT_OK(kdb_row_get_blob(row, "empty", &data, &len));
+    ASSERT_EQ(len, 0u);
+
+    kdb_row_free(row);
+    teardown(db);
+}
+
 int main(void) {
     printf("=== test_core ===\n");
 
@@ -305,12 +715,22 @@ int main(void) {
     test_find_with_filter();
     test_find_one();
     test_count();
+    test_batch_import();
+    test_add_validated();
+    test_batch_import_validated();
+    test_create_index();
+    test_index_mixed_numeric();
+    test_create_text_index();
+    test_open_memory();
+    test_find_by_id_and_delete();
     test_update();
     test_delete();
     test_compact();
     test_table_exists_and_drop();
     test_reopen();
+    test_sees_external_writes();
     test_row_accessors();
+    test_blob_roundtrip();
 
     printf("passed=%d  failed=%d\n", passed, failed);
     return failed > 0 ? 1 : 0;
@@ -151,6 +151,22 @@ static void test_multi_filter_and(void) {
     kdb_rows_free(rows);
 }
 
+static void test_multi_filter_mixed_ops(void) {
+    const char *f[] = { "name__contains=a", "score__gte=20", "active=true", NULL };
+    KdbRows *rows = kdb_find(db, TABLE, f);
+    ASSERT(rows != NULL);
+    ASSERT_EQ(rows->count, 1u);
+    if (rows && rows->count == 1) {
+        const char *name = NULL;
+        ASSERT_OK(kdb_row_get_string(&rows->rows[0], "name", &name));
+        ASSERT(name && strcmp(name, "gamma") == 0);
+    }
+    kdb_rows_free(rows);
+
+    const char *g[] = { "missing__isnull", "score__lt=30", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, g), 2);
+}
+
 static void test_find_all(void) {
     KdbRows *rows = kdb_find(db, TABLE, NULL);
     ASSERT(rows != NULL);
@@ -158,6 +174,28 @@ static void test_find_all(void) {
     kdb_rows_free(rows);
 }
 
+static void test_find_page(void) {
+    const char *f[] = { "score__gte=20", NULL };
+    KdbRows *rows = kdb_find_page(db, TABLE, f, 1, 2);
+    ASSERT(rows != NULL);
+    if (rows) {
+        ASSERT_EQ(rows->count, 2u);
+        if (rows->count == 2) {
+            ASSERT_EQ(rows->rows[0].id, 3u);
+            ASSERT_EQ(rows->rows[1].id, 4u);
+        }
+        kdb_rows_free(rows);
+    }
+
+    rows = kdb_find_page(db, TABLE, NULL, 4, 10);
+    ASSERT(rows != NULL);
+    if (rows) { ASSERT_EQ(rows->count, 1u); kdb_rows_free(rows); }
+
+    rows = kdb_find_page(db, TABLE, f, 0, 0);
+    ASSERT(rows != NULL);
+    if (rows) { ASSERT_EQ(rows->count, 0u); kdb_rows_free(rows); }
+}
+
 static void test_no_results(void) {
     const char *f[] = { "score__gt=999", NULL };
     KdbRows *rows = kdb_find(db, TABLE, f);
@@ -174,6 +212,141 @@ static void test_float_filter(void) {
     kdb_rows_free(rows);
 }
 
+static void test_filter_uses_column_type(void) {
+    const char *codes[] = { "007", "1", "abc" };
+    for (int i = 0; i < 3; i++) {
+        KdbField f[] = {
+            kdb_field_string("code", codes[i]),
+            kdb_field_int   ("qty",  i),
+            kdb_field_float ("cost", i * 2.0),
+            kdb_field_end   ()
+        };
+        ASSERT_OK(kdb_add(db, "codes", f));
+    }
+
+    const char *f1[] = { "code=007", NULL };
+    ASSERT_EQ(kdb_count(db, "codes", f1), 1);
+
+    const char *f2[] = { "code=1", NULL };
+    ASSERT_EQ(kdb_count(db, "codes", f2), 1);
+
+    const char *f3[] = { "qty=1", NULL };
+    ASSERT_EQ(kdb_count(db, "codes", f3), 1);
+
+    const char *f4[] = { "cost=2", NULL };
+    ASSERT_EQ(kdb_count(db, "codes", f4), 1);
+
+    const char *f5[] = { "code__startswith=00", NULL };
+    ASSERT_EQ(kdb_count(db, "codes", f5), 1);
+}
+
+static void test_find_text(void) {
+    const char *notes[] = { "red fox", "red red red", "blue", "red", "fox red fox" };
+    for (int i = 0; i < 5; i++) {
+        KdbField f[] = {
+            kdb_field_string("note", notes[i]),
+            kdb_field_string("tag",  "red"),
+            kdb_field_end   ()
+        };
+        ASSERT_OK(kdb_add(db, "notes", f));
+    }
+    const char *gone[] = { "note=red", NULL };
+    ASSERT_OK(kdb_delete(db, "notes", gone, NULL));
+
+    KdbRows *rows = kdb_find_text(db, "notes", "note", "red", 2);
+    ASSERT(rows != NULL);
+    if (rows) {
+        ASSERT_EQ(rows->count, 2u);
+        if (rows->count == 2) {
+            ASSERT_EQ(rows->rows[0].id, 2u);
+            ASSERT_EQ(rows->rows[1].id, 5u);
+        }
+        kdb_rows_free(rows);
+    }
+
+    rows = kdb_find_text(db, "notes", "note", "green", 10);
+    ASSERT(rows != NULL);
+    if (rows) { ASSERT_EQ(rows->count, 0u); kdb_rows_free(rows); }
+
+    
+    KdbField first[] = { kdb_field_string("title", "title page"), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, "docs", first));
+    for (int i = 0; i < 50; i++) {
+        char title[32];
+        snprintf(title, sizeof(title), "doc %d", i);
+        KdbField f[] = { kdb_field_string("title", title), kdb_field_end() };
+        ASSERT_OK(kdb_add(db, "docs", f));
+    }
+    rows = kdb_find_text(db, "docs", "title", "tit", 1);
+    ASSERT(rows != NULL);
+    if (rows) {
+        ASSERT_EQ(rows->count, 1u);
+        if (rows->count == 1) ASSERT_EQ(rows->rows[0].id, 1u);
+        kdb_rows_free(rows);
+    }
+
+    rows = kdb_find_text(db, "docs", "title", "page", (size_t)-1 / 4);
+    ASSERT(rows != NULL);
+    if (rows) { ASSERT_EQ(rows->count, 1u); kdb_rows_free(rows); }
+
+    rows = kdb_find_text(db, "docs", "title", "doc", (size_t)-1);
+    ASSERT(rows != NULL);
+    if (rows) { ASSERT_EQ(rows->count, 50u); kdb_rows_free(rows); }
+}
+
+static void test_user_id_column(void) {
+    KdbField first[]  = { kdb_field_int("id", 10), kdb_field_string("name", "a"), kdb_field_end() };
+    KdbField second[] = { kdb_field_string("name", "b"), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, "owned_ids", first));
+    ASSERT_OK(kdb_add(db, "owned_ids", second));
+
+    
+    const char *by_record[] = { "id=2", NULL };
+    const char *missing[]   = { "id__isnull", NULL };
+    const char *by_user[]   = { "id=10", NULL };
+    ASSERT_EQ(kdb_count(db, "owned_ids", by_record), 0);
+    ASSERT_EQ(kdb_count(db, "owned_ids", missing), 1);
+    ASSERT_EQ(kdb_count(db, "owned_ids", by_user), 1);
+
+    
+    KdbField plain[] = { kdb_field_string("name", "p"), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, "late_ids", plain));
+    for (int i = 0; i < 10; i++) {
+        KdbField late[] = { kdb_field_string("name", "q"), kdb_field_int("id", 100 + i), kdb_field_end() };
+        ASSERT_OK(kdb_add(db, "late_ids", late));
+    }
+    const char *eq[]      = { "id=5", NULL };
+    const char *range[]   = { "id__gte=5", "id__lte=5", NULL };
+    const char *stored[]  = { "id=105", NULL };
+    const char *no_null[] = { "id__isnull", NULL };
+    ASSERT_EQ(kdb_count(db, "late_ids", eq), 1);
+    ASSERT_EQ(kdb_count(db, "late_ids", range), 1);
+    ASSERT_EQ(kdb_count(db, "late_ids", stored), 0);
+    ASSERT_EQ(kdb_count(db, "late_ids", no_null), 0);
+    KdbRow *row = kdb_find_by_id(db, "late_ids", 5);
+    ASSERT(row != NULL);
+    kdb_row_free(row);
+}
+
+typedef struct { int seen; int stop_at; } ForeachCtx;
+static int foreach_cb(const KdbRow *row, void *ud) {
+    ForeachCtx *ctx = (ForeachCtx *)ud;
+    const char *name = NULL;
+    if (kdb_row_get_string(row, "name", &name) == KDB_OK && name) ctx->seen++;
+    return ctx->seen < ctx->stop_at;
+}
+
+static void test_foreach(void) {
+    ForeachCtx ctx = { 0, 100 };
+    const char *f[] = { "score__gte=20", NULL };
+    ASSERT_OK(kdb_foreach(db, TABLE, f, foreach_cb, &ctx));
+    ASSERT_EQ(ctx.seen, 4);
+
+    ForeachCtx stop = { 0, 2 };
+    ASSERT_OK(kdb_foreach(db, TABLE, NULL, foreach_cb, &stop));
+    ASSERT_EQ(stop.seen, 2);
+}
+
 int main(void) {
     printf("=== test_query ===\n");
     setup();
@@ -188,9 +361,15 @@ int main(void) {
     test_startswith();
     test_endswith();
     test_multi_filter_and();
+    test_multi_filter_mixed_ops();
     test_find_all();
+    test_find_page();
     test_no_results();
     test_float_filter();
+    test_foreach();
+    test_filter_uses_column_type();
+    test_find_text();
+    test_user_id_column();
 
     teardown();
     printf("passed=%d  failed=%d\n", passed, failed);
@@ -7,6 +7,10 @@
 #include "../include/kumdb.h"
 #include "../include/internal.h"
 #include "../include/storage.h"
+#include "../include/index.h"
+#include "../include/table.h"
+#include "../include/lock.h"
+#include "../include/query.h"
 #include "../include/record.h"
 #include "../include/types.h"
 #include "../include/error.h"
@@ -82,6 +86,173 @@ static void test_record_serialize_roundtrip(void) {
     kdb_record_free(r2);
 }
 
+static void test_record_deserialize_legacy(void) {
+    uint8_t buf[KDB_RECORD_FIXED_SIZE + KDB_FIELD_HEADER_SIZE + 8];
+    memset(buf, 0, sizeof(buf));
+    buf[0]  = 7;
+    buf[24] = 1;
+    memcpy(buf + KDB_RECORD_FIXED_SIZE, "num", 3);
+    buf[KDB_RECORD_FIXED_SIZE + KDB_MAX_NAME_LEN] = KDB_TYPE_INT;
+    buf[KDB_RECORD_FIXED_SIZE + KDB_FIELD_HEADER_SIZE] = 42;
+
+    size_t read_back = 0;
+    KdbRecord *r = kdb_record_deserialize(buf, sizeof(buf), &read_back);
+    ASSERT(r != NULL);
+    ASSERT_EQ(read_back, sizeof(buf));
+    ASSERT_EQ(r->id, 7u);
+
+    int64_t num = 0;
+    ASSERT_OK(kdb_record_get_int(r, "num", &num));
+    ASSERT_EQ(num, 42);
+
+    ASSERT(kdb_record_serial_size(r) < sizeof(buf));
+    kdb_record_free(r);
+}
+
+static void test_record_order_fields(void) {
+    KdbColumn cols[3];
+    memset(cols, 0, sizeof(cols));
+    strcpy(cols[0].name, "a");
+    strcpy(cols[1].name, "b");
+    strcpy(cols[2].name, "c");
+
+    KdbRecord *r = kdb_record_new(0);
+    ASSERT_OK(kdb_record_set_int(r, "extra", 9));
+    ASSERT_OK(kdb_record_set_int(r, "c", 3));
+    ASSERT_OK(kdb_record_set_int(r, "a", 1));
+    ASSERT_OK(kdb_record_set_int(r, "b", 2));
+    ASSERT(r->field_capacity >= r->field_count);
+
+    kdb_record_order_fields(r, cols, 3);
+    ASSERT_EQ(r->field_count, 4u);
+    ASSERT(strcmp(r->fields[0].col_name, "a") == 0);
+    ASSERT(strcmp(r->fields[1].col_name, "b") == 0);
+    ASSERT(strcmp(r->fields[2].col_name, "c") == 0);
+    ASSERT(strcmp(r->fields[3].col_name, "extra") == 0);
+
+    int64_t v = 0;
+    ASSERT_OK(kdb_record_get_int(r, "c", &v));
+    ASSERT_EQ(v, 3);
+    kdb_record_free(r);
+}
+
+static void test_record_view_fields(void) {
+    KdbRecord *r = kdb_record_new(3);
+    r->id = 7;
+    ASSERT_OK(kdb_record_set_int(r, "age", 41));
+    ASSERT_OK(kdb_record_set_string(r, "name", "alice"));
+
+    size_t   sz  = kdb_record_serial_size(r);
+    uint8_t *buf = malloc(sz);
+    ASSERT_EQ(kdb_record_serialize(r, buf, sz), sz);
+
+    KdbFieldView view[KDB_MAX_COLUMNS];
+    int n = kdb_record_view_fields(buf, sz, view, KDB_MAX_COLUMNS);
+    ASSERT_EQ(n, 2);
+    ASSERT(view[0].name_len == 3 && memcmp(view[0].name, "age", 3) == 0);
+    ASSERT_EQ(view[0].value.v.as_int, 41);
+    ASSERT_EQ(view[1].value.v.as_string.len, 5u);
+    ASSERT(memcmp(view[1].value.v.as_string.data, "alice", 5) == 0);
+    ASSERT_EQ(kdb_record_view_fields(buf, sz, view, 1), -1);
+
+    KdbRecordField slots[KDB_MAX_COLUMNS];
+    KdbRecord      borrowed;
+    kdb_record_borrow_view(buf, view, (uint32_t)n, slots, &borrowed);
+    ASSERT_EQ(borrowed.id, 7u);
+    ASSERT_EQ(borrowed.field_count, 2u);
+    ASSERT(strcmp(kdb_record_get_field(&borrowed, "name")->value.v.as_string.data, "alice") == 0);
+    ASSERT((const uint8_t *)borrowed.fields[1].value.v.as_string.data > buf);
+
+    KdbQuery q;
+    kdb_query_init(&q);
+    ASSERT_OK(kdb_query_add_filter(&q, "age__gte", "40", NULL));
+    ASSERT_OK(kdb_query_add_filter(&q, "name__startswith", "al", NULL));
+    KdbPredicate pred;
+    kdb_predicate_init(&pred, &q, NULL);
+    ASSERT(kdb_predicate_matches_view(&pred, r->id, view, (uint32_t)n));
+    ASSERT(kdb_predicate_may_match_raw(&pred, buf, sz));
+    ASSERT_EQ(kdb_predicate_matches_view(&pred, r->id, view, (uint32_t)n),
+              kdb_predicate_matches(&pred, r));
+    kdb_query_free(&q);
+
+    kdb_query_init(&q);
+    ASSERT_OK(kdb_query_add_filter(&q, "missing__isnull", "true", NULL));
+    ASSERT_OK(kdb_query_add_filter(&q, "id", "8", NULL));
+    kdb_predicate_init(&pred, &q, NULL);
+    ASSERT(!kdb_predicate_matches_view(&pred, r->id, view, (uint32_t)n));
+    kdb_query_free(&q);
+
+    kdb_query_init(&q);
+    ASSERT_OK(kdb_query_add_filter(&q, "name__contains", "bob", NULL));
+    kdb_predicate_init(&pred, &q, NULL);
+    ASSERT(!kdb_predicate_may_match_raw(&pred, buf, sz));
+    kdb_query_free(&q);
+
+    free(buf);
+    kdb_record_free(r);
+}
+
+static void test_predicate_int_ranges(void) {
+    const KdbOperator ops[] = { KDB_OP_GT, KDB_OP_GTE, KDB_OP_LT, KDB_OP_LTE, KDB_OP_BETWEEN };
+    const int64_t     bounds[] = { INT64_MIN, -1, 0, 7, INT64_MAX };
+    const int64_t     samples[] = { INT64_MIN, INT64_MIN + 1, -1, 0, 6, 7, 8, INT64_MAX - 1, INT64_MAX };
+
+    KdbFieldView view = { .name = "n", .name_len = 1 };
+    for (size_t o = 0; o < KDB_ARRAY_LEN(ops); o++) {
+        for (size_t b = 0; b < KDB_ARRAY_LEN(bounds); b++) {
+            KdbValue lo, hi;
+            kdb_value_from_int(bounds[b], &lo);
+            kdb_value_from_int(bounds[KDB_ARRAY_LEN(bounds) - 1 - b], &hi);
+
+            KdbQuery q;
+            kdb_query_init(&q);
+            ASSERT_OK(kdb_query_add_filter_value(&q, "n", ops[o], &lo, &hi));
+            KdbPredicate pred;
+            kdb_predicate_init(&pred, &q, NULL);
+            ASSERT(pred.ranged[0]);
+
+            for (size_t s = 0; s < KDB_ARRAY_LEN(samples); s++) {
+                kdb_value_from_int(samples[s], &view.value);
+                int want = kdb_value_matches(&view.value, ops[o], &lo, &hi);
+                ASSERT_EQ(kdb_predicate_matches_view(&pred, 1, &view, 1), want);
+            }
+
+            
+            kdb_value_from_float(7.5, &view.value);
+            ASSERT_EQ(kdb_predicate_matches_view(&pred, 1, &view, 1),
+                      kdb_value_matches(&view.value, ops[o], &lo, &hi));
+            kdb_query_free(&q);
+        }
+    }
+}
+
+static void test_result_sort(void) {
+    KdbResult res;
+    ASSERT_OK(kdb_result_init(&res, 2));
+    int64_t ages[] = { 30, 10, 20, 10 };
+    for (int i = 0; i < 4; i++) {
+        KdbRecord *r = kdb_record_new(1);
+        r->id = (uint64_t)(i + 1);
+        if (i != 2) ASSERT_OK(kdb_record_set_int(r, "age", ages[i]));
+        ASSERT_OK(kdb_result_append(&res, r));
+        kdb_record_free(r);
+    }
+
+    ASSERT_OK(kdb_result_sort(&res, "age", 1));
+    ASSERT_EQ(res.count, 4u);
+    ASSERT_EQ(res.rows[0].id, 3u);
+    ASSERT_EQ(res.rows[1].id, 2u);
+    ASSERT_EQ(res.rows[2].id, 4u);
+    ASSERT_EQ(res.rows[3].id, 1u);
+
+    ASSERT_OK(kdb_result_sort(&res, "age", 0));
+    ASSERT_EQ(res.rows[0].id, 1u);
+    ASSERT_EQ(res.rows[1].id, 2u);
+    ASSERT_EQ(res.rows[2].id, 4u);
+    ASSERT_EQ(res.rows[3].id, 3u);
+    kdb_result_free(&res);
+}
+
 static void test_storage_create_open_close(void) {
     system("rm -rf " TEST_DIR);
     mkdir(TEST_DIR, 0755);
@@ -111,7 +282,7 @@ static void test_storage_append_and_scan(void) {
         KdbValue v;
         kdb_value_from_int(i * 10, &v);
         kdb_record_set_field(r, "val", &v);
-        ASSERT_OK(kdb_storage_append(&tbl, r));
+        ASSERT_OK(kdb_storage_append(&tbl, r, NULL));
         kdb_record_free(r);
     }
 
@@ -122,6 +293,51 @@ static void test_storage_append_and_scan(void) {
     system("rm -rf " TEST_DIR);
 }
 
+static void test_storage_read_at(void) {
+    system("rm -rf " TEST_DIR);
+    mkdir(TEST_DIR, 0755);
+
+    ASSERT_OK(kdb_storage_create(TEST_DIR, TABLE, NULL, 0));
+
+    KdbTable tbl;
+    ASSERT_OK(kdb_storage_open(&tbl, TEST_DIR, TABLE));
+
+    
+    static char big[3000];
+    memset(big, 'q', sizeof(big) - 1);
+    uint64_t offsets[3];
+    for (int i = 0; i < 3; i++) {
+        KdbRecord *r = kdb_record_new(2);
+        KdbValue v;
+        kdb_value_from_int(i, &v);
+        kdb_record_set_field(r, "val", &v);
+        if (i == 1) {
+            kdb_value_from_string(big, KDB_TYPE_STRING, &v);
+            kdb_record_set_field(r, "a", &v);
+            kdb_record_set_field(r, "b", &v);
+            kdb_value_free(&v);
+        }
+        ASSERT_OK(kdb_storage_append(&tbl, r, &offsets[i]));
+        kdb_record_free(r);
+    }
+
+    for (int i = 2; i >= 0; i--) {
+        KdbRecord *r = kdb_storage_read_at(&tbl, offsets[i]);
+        ASSERT(r != NULL);
+        if (!r) continue;
+        const KdbRecordField *f = kdb_record_get_field(r, "val");
+        ASSERT(f != NULL && f->value.v.as_int == i);
+        if (i == 1) {
+            const KdbRecordField *b = kdb_record_get_field(r, "b");
+            ASSERT(b != NULL && b->value.v.as_string.len == sizeof(big) - 1);
+        }
+        kdb_record_free(r);
+    }
+
+    kdb_storage_close(&tbl);
+    system("rm -rf " TEST_DIR);
+}
+
 typedef struct { int count; } ScanCtx;
 static int count_cb(const KdbRecord *r, void *ud) {
     (void)r;
@@ -143,15 +359,70 @@ static void test_storage_scan_c(void) {
         KdbValue v;
         kdb_value_from_int(i, &v);
         kdb_record_set_field(r, "n", &v);
-        kdb_storage_append(&tbl, r);
+        kdb_storage_append(&tbl, r, NULL);
         kdb_record_free(r);
     }
     kdb_storage_flush_header(&tbl);
 
+    KdbRecord *gone = kdb_record_new(1);
+    gone->deleted = 1;
+    kdb_storage_append(&tbl, gone, NULL);
+    kdb_record_free(gone);
+
     ScanCtx ctx = { 0 };
     ASSERT_OK(kdb_storage_scan(&tbl, count_cb, &ctx));
     ASSERT_EQ(ctx.count, 7);
 
+    KdbStorageStats stats;
+    ASSERT_OK(kdb_storage_stats(&tbl, &stats));
+    ASSERT_EQ(stats.live_count, 7u);
+    ASSERT_EQ(stats.deleted_count, 1u);
+    ASSERT(stats.file_size_bytes > 0);
+
+    kdb_storage_close(&tbl);
+    system("rm -rf " TEST_DIR);
+}
+
+typedef struct { int count; int bad; KdbTable *tbl; } OffsetCtx;
+static int offset_cb(const KdbRecord *r, uint64_t off, void *ud) {
+    OffsetCtx *ctx = (OffsetCtx *)ud;
+    KdbRecord *back = kdb_storage_read_at(ctx->tbl, off);
+    if (!back || back->id != r->id) ctx->bad++;
+    kdb_record_free(back);
+    ctx->count++;
+    return 1;
+}
+
+static void test_storage_scan_across_blocks(void) {
+    system("rm -rf " TEST_DIR);
+    mkdir(TEST_DIR, 0755);
+
+    ASSERT_OK(kdb_storage_create(TEST_DIR, TABLE, NULL, 0));
+
+    KdbTable tbl;
+    ASSERT_OK(kdb_storage_open(&tbl, TEST_DIR, TABLE));
+
+    char text[600];
+    memset(text, 'x', sizeof(text) - 1);
+    text[sizeof(text) - 1] = '\0';
+
+    const int n = 6000;
+    for (int i = 0; i < n; i++) {
+        KdbRecord *r = kdb_record_new(2);
+        kdb_record_set_int(r, "n", i);
+        text[i % 500] = '\0';
+        kdb_record_set_string(r, "s", text);
+        text[i % 500] = 'x';
+        ASSERT_OK(kdb_storage_append(&tbl, r, NULL));
+        kdb_record_free(r);
+    }
+    kdb_storage_flush_header(&tbl);
+
+    OffsetCtx ctx = { 0, 0, &tbl };
+    ASSERT_OK(kdb_storage_scan_offsets(&tbl, offset_cb, &ctx));
+    ASSERT_EQ(ctx.count, n);
+    ASSERT_EQ(ctx.bad, 0);
+
     kdb_storage_close(&tbl);
     system("rm -rf " TEST_DIR);
 }
@@ -177,6 +448,72 @@ static void test_compact_removes_deleted(void) {
     ASSERT_OK(kdb_compact(db, TABLE));
     ASSERT_EQ(kdb_count(db, TABLE, NULL), 5);
 
+    char table_path[4096], tmp_path[4096];
+    struct stat sb;
+    kdb_storage_path(TEST_DIR, TABLE, table_path, sizeof(table_path));
+    kdb_temp_path(table_path, tmp_path, sizeof(tmp_path));
+    ASSERT(stat(tmp_path, &sb) != 0);
+
+    const char *kept[] = { "n=7", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, kept), 1);
+
+    KdbField extra[] = { kdb_field_int("n", 10), kdb_field_end() };
+    ASSERT_OK(kdb_add(db, TABLE, extra));
+    const char *added[] = { "n=10", NULL };
+    KdbRow *row = kdb_find_one(db, TABLE, added);
+    ASSERT(row != NULL);
+    ASSERT_EQ(row->id, 11u);
+    kdb_row_free(row);
+
+    kdb_close(db);
+    system("rm -rf " TEST_DIR);
+}
+
+static void test_corrupt_record_is_isolated(void) {
+    system("rm -rf " TEST_DIR);
+    mkdir(TEST_DIR, 0755);
+
+    KumDB *db = kdb_open(TEST_DIR);
+    ASSERT(db != NULL);
+    for (int i = 0; i < 5; i++) {
+        KdbField f[] = { kdb_field_int("n", i), kdb_field_end() };
+        kdb_add(db, TABLE, f);
+    }
+    kdb_close(db);
+
+    
+    char table_path[4096];
+    kdb_storage_path(TEST_DIR, TABLE, table_path, sizeof(table_path));
+    FILE *fp = fopen(table_path, "r+b");
+    ASSERT(fp != NULL);
+    KdbTableHeader hdr;
+    ASSERT_EQ(fread(&hdr, sizeof(hdr), 1, fp), 1u);
+    long pos = (long)hdr.data_offset;
+    for (int i = 0; i < 2; i++) {
+        uint32_t sz = 0;
+        fseek(fp, pos, SEEK_SET);
+        ASSERT_EQ(fread(&sz, 4, 1, fp), 1u);
+        pos += 4 + (long)sz;
+    }
+    uint8_t bad_format = 7;
+    fseek(fp, pos + 4 + KDB_RECORD_DELETED_AT + 1, SEEK_SET);
+    ASSERT_EQ(fwrite(&bad_format, 1, 1, fp), 1u);
+    fclose(fp);
+
+    db = kdb_open(TEST_DIR);
+    ASSERT(db != NULL);
+    const char *all[]  = { "n__gte=0", NULL };
+    const char *last[] = { "n=4", NULL };
+    ASSERT_EQ(kdb_count(db, TABLE, all), 4);
+    ASSERT_EQ(kdb_count(db, TABLE, last), 1);
+
+    struct stat before, after;
+    ASSERT(stat(table_path, &before) == 0);
+    ASSERT(kdb_compact(db, TABLE) == KDB_ERR_CORRUPT);
+    ASSERT(stat(table_path, &after) == 0);
+    ASSERT_EQ(before.st_size, after.st_size);
+    ASSERT_EQ(kdb_count(db, TABLE, all), 4);
+
     kdb_close(db);
     system("rm -rf " TEST_DIR);
 }
@@ -246,16 +583,192 @@ static void test_storage_list_tables(void) {
     system("rm -rf " TEST_DIR);
 }
 
+static void test_backup_copies_tables(void) {
+    system("rm -rf " TEST_DIR " " TEST_DIR "_backup");
+    mkdir(TEST_DIR, 0755);
+
+    KumDB *db = kdb_open(TEST_DIR);
+    ASSERT(db != NULL);
+    for (int i = 0; i < 50; i++) {
+        KdbField f[] = { kdb_field_int("n", i), kdb_field_end() };
+        kdb_add(db, TABLE, f);
+    }
+    KdbField other[] = { kdb_field_string("s", "x"), kdb_field_end() };
+    kdb_add(db, "others", other);
+
+    ASSERT_OK(kdb_backup(db, TEST_DIR "_backup"));
+    kdb_close(db);
+
+    KumDB *copy = kdb_open(TEST_DIR "_backup");
+    ASSERT(copy != NULL);
+    ASSERT_EQ(kdb_count(copy, TABLE, NULL), 50);
+    ASSERT_EQ(kdb_count(copy, "others", NULL), 1);
+
+    KdbField more[] = { kdb_field_int("n", 50), kdb_field_end() };
+    ASSERT_OK(kdb_add(copy, TABLE, more));
+    const char *last[] = { "n=50", NULL };
+    KdbRow *row = kdb_find_one(copy, TABLE, last);
+    ASSERT(row != NULL);
+    if (row) ASSERT_EQ(row->id, 51u);
+    kdb_row_free(row);
+    kdb_close(copy);
+
+    system("rm -rf " TEST_DIR " " TEST_DIR "_backup");
+}
+
+static void test_index_remove_by_value(void) {
+    KdbIndex *idx = kdb_index_new("k");
+    ASSERT(idx != NULL);
+
+    KdbValue a, b;
+    kdb_value_from_int(1, &a);
+    kdb_value_from_int(2, &b);
+    for (uint64_t id = 1; id <= 4; id++) {
+        KdbRecord *r = kdb_record_new(1);
+        kdb_record_set_field(r, "k", (id % 2) ? &a : &b);
+        r->id = id;
+        ASSERT_OK(kdb_index_insert(idx, r, id * 100));
+        kdb_record_free(r);
+    }
+
+    uint64_t *offs  = NULL;
+    size_t    found = 0;
+    ASSERT_OK(kdb_index_candidates(idx, &a, &offs, &found));
+    ASSERT_EQ(found, 2u);
+    if (found == 2) { ASSERT_EQ(offs[0], 100u); ASSERT_EQ(offs[1], 300u); }
+    free(offs);
+
+    ASSERT_OK(kdb_index_remove(idx, &a, 3));
+    ASSERT(kdb_index_remove(idx, &b, 3) == KDB_ERR_NOT_FOUND);
+    ASSERT_OK(kdb_index_candidates(idx, &a, &offs, &found));
+    ASSERT_EQ(found, 1u);
+    free(offs);
+
+    kdb_index_free(idx);
+}
+
+static void test_index_insert_batch(void) {
+    KdbIndex *idx = kdb_index_new("k");
+    ASSERT(idx != NULL);
+
+    KdbRecord recs[600];
+    uint64_t  offs[600];
+    memset(recs, 0, sizeof(recs));
+    for (int i = 0; i < 600; i++) {
+        recs[i].id = (uint64_t)i + 1;
+        kdb_record_set_int(&recs[i], "k", i % 3);
+        offs[i] = (uint64_t)i * 10;
+    }
+    ASSERT_OK(kdb_index_insert_batch(idx, recs, 600, offs));
+    ASSERT_EQ(idx->free_count, 0u);
+
+    KdbValue one;
+    kdb_value_from_int(1, &one);
+    uint64_t *found = NULL;
+    size_t    n     = 0;
+    ASSERT_OK(kdb_index_candidates(idx, &one, &found, &n));
+    ASSERT_EQ(n, 200u);
+    free(found);
+
+    ASSERT_OK(kdb_index_remove(idx, &one, 2));
+    ASSERT_EQ(idx->free_count, 1u);
+    ASSERT_OK(kdb_index_insert(idx, &recs[1], offs[1]));
+    ASSERT_EQ(idx->free_count, 0u);
+
+    for (int i = 0; i < 600; i++) free(recs[i].fields);
+    kdb_index_free(idx);
+}
+
+static void test_table_lock_fd_reused(void) {
+    system("rm -rf " TEST_DIR);
+    mkdir(TEST_DIR, 0755);
+    ASSERT_OK(kdb_storage_create(TEST_DIR, TABLE, NULL, 0));
+
+    KdbTable tbl;
+    ASSERT_OK(kdb_storage_open(&tbl, TEST_DIR, TABLE));
+    ASSERT_EQ(tbl.lock_fd, -1);
+
+    int first_fd = -1;
+    for (int i = 0; i < 3; i++) {
+        KdbRecord *r = kdb_record_new(1);
+        kdb_record_set_int(r, "n", i);
+        ASSERT_OK(kdb_table_insert(&tbl, r));
+        kdb_record_free(r);
+        if (i == 0) first_fd = tbl.lock_fd;
+        ASSERT(tbl.lock_fd >= 0);
+        ASSERT_EQ(tbl.lock_fd, first_fd);
+    }
+    ASSERT_EQ(tbl.header.record_count, 3u);
+
+    kdb_storage_close(&tbl);
+    ASSERT_EQ(tbl.lock_fd, -1);
+    system("rm -rf " TEST_DIR);
+}
+
+static void test_table_update_refreshes_first(void) {
+    system("rm -rf " TEST_DIR);
+    mkdir(TEST_DIR, 0755);
+    ASSERT_OK(kdb_table_create(TEST_DIR, TABLE, NULL, 0));
+
+    KdbTable mine, other;
+    ASSERT_OK(kdb_table_open(&mine,  TEST_DIR, TABLE));
+    ASSERT_OK(kdb_table_open(&other, TEST_DIR, TABLE));
+
+    for (int i = 0; i < 3; i++) {
+        KdbRecord *r = kdb_record_new(1);
+        kdb_record_set_int(r, "n", i);
+        ASSERT_OK(kdb_table_insert(&mine, r));
+        kdb_record_free(r);
+    }
+    ASSERT_OK(kdb_table_create_index(&mine, "n", 0));
+
+    KdbRecord *r = kdb_record_new(1);
+    kdb_record_set_int(r, "n", 7);
+    ASSERT_OK(kdb_table_insert(&other, r));
+    kdb_record_free(r);
+
+    KdbValue seven;
+    kdb_value_from_int(7, &seven);
+    KdbQuery q;
+    kdb_query_init(&q);
+    ASSERT_OK(kdb_query_add_filter_value(&q, "n", KDB_OP_EQ, &seven, NULL));
+
+    KdbRecord *patch = kdb_record_new(1);
+    kdb_record_set_int(patch, "n", 8);
+    size_t updated = 0;
+    ASSERT_OK(kdb_table_update(&mine, &q, patch, &updated));
+    ASSERT_EQ(updated, 1u);
+    kdb_record_free(patch);
+    kdb_query_free(&q);
+
+    kdb_table_close(&other);
+    kdb_table_close(&mine);
+    system("rm -rf " TEST_DIR);
+}
+
 int main(void) {
     printf("=== test_storage ===\n");
 
     test_record_serialize_roundtrip();
+    test_record_deserialize_legacy();
+    test_record_order_fields();
+    test_record_view_fields();
+    test_predicate_int_ranges();
+    test_result_sort();
     test_storage_create_open_close();
+    test_storage_read_at();
     test_storage_scan_c();
+    test_storage_scan_across_blocks();
     test_compact_removes_deleted();
+    test_corrupt_record_is_isolated();
     test_durability_across_reopen();
     test_storage_drop();
     test_storage_list_tables();
+    test_backup_copies_tables();
+    test_index_remove_by_value();
+    test_index_insert_batch();
+    test_table_lock_fd_reused();
+    test_table_update_refreshes_first();
 
     printf("passed=%d  failed=%d\n", passed, failed);
     return failed > 0 ? 1 : 0;
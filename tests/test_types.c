@@ -57,6 +57,20 @@ static void test_value_int(void) {
     ASSERT_EQ_INT(v.v.as_int, -100);
 }
 
+static void test_value_int_from_string(void) {
+    KdbValue v;
+    ASSERT_EQ_INT(kdb_value_from_string("-123", KDB_TYPE_INT, &v), KDB_OK);
+    ASSERT_EQ_INT(v.v.as_int, -123);
+    ASSERT_EQ_INT(kdb_value_from_string("+999999999999999999", KDB_TYPE_INT, &v), KDB_OK);
+    ASSERT_EQ_INT(v.v.as_int, 999999999999999999LL);
+    ASSERT_EQ_INT(kdb_value_from_string("-9223372036854775808", KDB_TYPE_INT, &v), KDB_OK);
+    ASSERT_EQ_INT(v.v.as_int, INT64_MIN);
+    ASSERT_EQ_INT(kdb_value_from_string(" 42 ", KDB_TYPE_INT, &v), KDB_OK);
+    ASSERT_EQ_INT(v.v.as_int, 42);
+    ASSERT_EQ_INT(kdb_value_from_string("9223372036854775808", KDB_TYPE_INT, &v), KDB_ERR_BAD_TYPE);
+    ASSERT_EQ_INT(kdb_value_from_string("12x", KDB_TYPE_INT, &v), KDB_ERR_BAD_TYPE);
+}
+
 static void test_value_float(void) {
     KdbValue v;
     ASSERT_EQ_INT(kdb_value_from_float(3.14, &v), KDB_OK);
@@ -109,6 +123,11 @@ static void test_value_compare(void) {
     ASSERT(kdb_value_compare(&b, &a) > 0);
     ASSERT(kdb_value_compare(&a, &a) == 0);
 
+    kdb_value_from_int(INT64_MAX, &a);
+    kdb_value_from_int(INT64_MAX - 1, &b);
+    ASSERT(kdb_value_compare(&a, &b) > 0);
+    ASSERT(kdb_value_matches(&a, KDB_OP_NEQ, &b, NULL));
+
     kdb_value_from_float(1.5, &a);
     kdb_value_from_float(1.5, &b);
     ASSERT(kdb_value_compare(&a, &b) == 0);
@@ -137,6 +156,12 @@ static void test_value_matches(void) {
     kdb_value_from_int(15, &fv2);
     ASSERT(kdb_value_matches(&field, KDB_OP_BETWEEN, &fv, &fv2));
 
+    kdb_value_from_null(&field);
+    ASSERT(!kdb_value_matches(&field, KDB_OP_LT,      &fv, NULL));
+    ASSERT(!kdb_value_matches(&field, KDB_OP_NEQ,     &fv, NULL));
+    ASSERT(!kdb_value_matches(&field, KDB_OP_BETWEEN, &fv, &fv2));
+    ASSERT(kdb_value_matches(&field, KDB_OP_IS_NULL,  &fv, NULL));
+
     kdb_value_from_string("hello world", KDB_TYPE_STRING, &field);
     kdb_value_from_string("hello", KDB_TYPE_STRING, &fv);
     ASSERT(kdb_value_matches(&field, KDB_OP_STARTSWITH, &fv, NULL));
@@ -145,6 +170,23 @@ static void test_value_matches(void) {
     kdb_value_free(&fv);
     kdb_value_from_string("world", KDB_TYPE_STRING, &fv);
     ASSERT(kdb_value_matches(&field, KDB_OP_ENDSWITH, &fv, NULL));
+    ASSERT(!kdb_value_matches(&field, KDB_OP_STARTSWITH, &fv, NULL));
+    ASSERT(kdb_value_matches(&field, KDB_OP_CONTAINS,   &fv, NULL));
+
+    kdb_value_free(&fv);
+    kdb_value_from_string("o w", KDB_TYPE_STRING, &fv);
+    ASSERT(kdb_value_matches(&field, KDB_OP_CONTAINS, &fv, NULL));
+    ASSERT(!kdb_value_matches(&field, KDB_OP_ENDSWITH, &fv, NULL));
+
+    kdb_value_free(&fv);
+    kdb_value_from_string("hello world!", KDB_TYPE_STRING, &fv);
+    ASSERT(!kdb_value_matches(&field, KDB_OP_CONTAINS, &fv, NULL));
+    ASSERT(!kdb_value_matches(&field, KDB_OP_ENDSWITH, &fv, NULL));
+
+    kdb_value_free(&fv);
+    kdb_value_from_string("", KDB_TYPE_STRING, &fv);
+    ASSERT(kdb_value_matches(&field, KDB_OP_CONTAINS,   &fv, NULL));
+    ASSERT(kdb_value_matches(&field, KDB_OP_STARTSWITH, &fv, NULL));
 
     kdb_value_free(&field);
     kdb_value_free(&fv);
@@ -172,6 +214,16 @@ static void test_parse_filter_key(void) {
     ASSERT_EQ_INT(op, KDB_OP_IS_NULL);
 
     ASSERT(kdb_parse_filter_key("age__bogus", col, &op) != KDB_OK);
+    ASSERT(kdb_parse_filter_key("age__gtx",   col, &op) != KDB_OK);
+    ASSERT(kdb_parse_filter_key("age__",      col, &op) != KDB_OK);
+
+    for (int i = KDB_OP_EQ; i <= KDB_OP_IS_NOT_NULL; i++) {
+        char key[64];
+        snprintf(key, sizeof(key), "c__%s", kdb_op_name((KdbOperator)i));
+        ASSERT_EQ_INT(kdb_parse_filter_key(key, col, &op), KDB_OK);
+        ASSERT_EQ_INT((int)op, i);
+    }
+    ASSERT_STR(kdb_op_name((KdbOperator)99), "unknown");
 }
 
 static void test_value_cast(void) {
@@ -200,6 +252,7 @@ int main(void) {
 
     test_type_inference();
     test_value_int();
+    test_value_int_from_string();
     test_value_float();
     test_value_bool();
     test_value_string();
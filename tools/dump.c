@@ -1,62 +1,80 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <math.h>
+#include <unistd.h>
 
 #include "../include/kumdb.h"
 
+#define DUMP_OUTPUT_BUFFER (1 << 20)
+
 typedef enum { FMT_PRETTY, FMT_CSV, FMT_JSON } OutputFmt;
 
 static void usage(const char *prog) {
-    fprintf(stderr, "Usage: %s <data_dir> <table> [--csv | --json] [--limit N]\n", prog);
+    fprintf(stderr, "Usage: %s <data_dir> <table> [--csv | --json] [--compact] [--limit N]\n", prog);
     fprintf(stderr, "  --csv      output as CSV\n");
     fprintf(stderr, "  --json     output as JSON array\n");
+    fprintf(stderr, "  --compact  JSON without indentation or spacing\n");
     fprintf(stderr, "  --limit N  cap output at N rows\n");
 }
 
 static void escape_csv(const char *s, FILE *fp) {
-    int needs_quote = strchr(s, ',') || strchr(s, '"') || strchr(s, '\n');
-    if (needs_quote) fputc('"', fp);
-    for (const char *p = s; *p; p++) {
-        if (*p == '"') fputc('"', fp);
-        fputc(*p, fp);
+    if (!strpbrk(s, ",\"\r\n")) { fputs(s, fp); return; }
+
+    fputc('"', fp);
+    for (const char *q; (q = strchr(s, '"')) != NULL; s = q + 1) {
+        fwrite(s, 1, (size_t)(q - s) + 1, fp);
+        fputc('"', fp);
     }
-    if (needs_quote) fputc('"', fp);
+    fputs(s, fp);
+    fputc('"', fp);
 }
 
 static void escape_json_string(const char *s, FILE *fp) {
     fputc('"', fp);
-    for (const char *p = s; *p; p++) {
-        switch (*p) {
+    for (;;) {
+        const char *run = s;
+        while ((unsigned char)*s >= 0x20 && *s != '"' && *s != '\\') s++;
+        if (s > run) fwrite(run, 1, (size_t)(s - run), fp);
+        if (!*s) break;
+
+        switch (*s) {
             case '"':  fputs("\\\"", fp); break;
             case '\\': fputs("\\\\", fp); break;
             case '\n': fputs("\\n",  fp); break;
             case '\r': fputs("\\r",  fp); break;
             case '\t': fputs("\\t",  fp); break;
-            default:   fputc(*p, fp);     break;
+            default:   fprintf(fp, "\\u%04x", (unsigned char)*s); break;
         }
+        s++;
     }
     fputc('"', fp);
 }
 
+static void print_json_float(double v, FILE *fp) {
+    if (!isfinite(v)) { fputs("null", fp); return; }
+    char buf[32];
+    snprintf(buf, sizeof(buf), "%.15g", v);
+    if (strtod(buf, NULL) != v)
+        snprintf(buf, sizeof(buf), "%.17g", v);
+    fputs(buf, fp);
+}
+
 static void print_field_csv(const KdbField *f, FILE *fp) {
-    char buf[64];
     switch (f->type) {
         case KDB_TYPE_INT:    fprintf(fp, "%lld",  (long long)f->v.as_int);   break;
         case KDB_TYPE_FLOAT:  fprintf(fp, "%g",    f->v.as_float);            break;
-        case KDB_TYPE_BOOL:   fprintf(fp, "%s",    f->v.as_bool ? "true" : "false"); break;
+        case KDB_TYPE_BOOL:   fputs(f->v.as_bool ? "true" : "false", fp);     break;
         case KDB_TYPE_NULL:   break;
         case KDB_TYPE_STRING: escape_csv(f->v.as_string ? f->v.as_string : "", fp); break;
-        default:
-            snprintf(buf, sizeof(buf), "<blob>");
-            escape_csv(buf, fp);
-            break;
+        default:              fputs("<blob>", fp);                             break;
     }
 }
 
 static void print_field_json(const KdbField *f, FILE *fp) {
     switch (f->type) {
         case KDB_TYPE_INT:    fprintf(fp, "%lld",  (long long)f->v.as_int);   break;
-        case KDB_TYPE_FLOAT:  fprintf(fp, "%g",    f->v.as_float);            break;
+        case KDB_TYPE_FLOAT:  print_json_float(f->v.as_float, fp);            break;
         case KDB_TYPE_BOOL:   fprintf(fp, "%s",    f->v.as_bool ? "true" : "false"); break;
         case KDB_TYPE_NULL:   fprintf(fp, "null");                             break;
         case KDB_TYPE_STRING: escape_json_string(f->v.as_string ? f->v.as_string : "", fp); break;
@@ -64,45 +82,105 @@ static void print_field_json(const KdbField *f, FILE *fp) {
     }
 }
 
-static void dump_pretty(KdbRows *rows) {
-    if (rows->count == 0) { printf("(empty)\n"); return; }
-    kdb_rows_print(rows, stdout);
+typedef struct {
+    OutputFmt fmt;
+    int       compact;
+    int64_t   limit;
+    size_t    emitted;
+    uint32_t  column_count;
+    uint32_t  column_cap;
+    char    (*columns)[KDB_MAX_NAME_LEN];
+    size_t    scanned;
+    int       oom;
+} DumpCtx;
+
+static int has_column(const DumpCtx *ctx, uint32_t hint, const char *name) {
+    if (hint < ctx->column_count && strcmp(ctx->columns[hint], name) == 0) return 1;
+    for (uint32_t i = 0; i < ctx->column_count; i++)
+        if (strcmp(ctx->columns[i], name) == 0) return 1;
+    return 0;
 }
 
-static void dump_csv(KdbRows *rows) {
-    if (rows->count == 0) return;
+static int collect_columns_cb(const KdbRow *row, void *user_data) {
+    DumpCtx *ctx = (DumpCtx *)user_data;
+    if (ctx->limit >= 0 && ctx->scanned >= (size_t)ctx->limit) return 0;
 
-    printf("id");
-    for (uint32_t j = 0; j < rows->rows[0].field_count; j++)
-        printf(",%s", rows->rows[0].fields[j].name ? rows->rows[0].fields[j].name : "");
-    printf("\n");
-
-    for (size_t i = 0; i < rows->count; i++) {
-        KdbRow *row = &rows->rows[i];
-        printf("%llu", (unsigned long long)row->id);
-        for (uint32_t j = 0; j < row->field_count; j++) {
-            printf(",");
-            print_field_csv(&row->fields[j], stdout);
+    for (uint32_t j = 0; j < row->field_count; j++) {
+        const char *name = row->fields[j].name ? row->fields[j].name : "";
+        if (has_column(ctx, j, name)) continue;
+
+        if (ctx->column_count == ctx->column_cap) {
+            uint32_t cap  = ctx->column_cap ? ctx->column_cap * 2 : KDB_MAX_COLUMNS;
+            void    *grow = realloc(ctx->columns, (size_t)cap * KDB_MAX_NAME_LEN);
+            if (!grow) { ctx->oom = 1; return 0; }
+            ctx->columns    = grow;
+            ctx->column_cap = cap;
         }
-        printf("\n");
+        snprintf(ctx->columns[ctx->column_count++], KDB_MAX_NAME_LEN, "%s", name);
     }
+    ctx->scanned++;
+    return ctx->limit < 0 || ctx->scanned < (size_t)ctx->limit;
 }
 
-static void dump_json(KdbRows *rows) {
-    printf("[\n");
-    for (size_t i = 0; i < rows->count; i++) {
-        KdbRow *row = &rows->rows[i];
-        printf("  {\"id\": %llu", (unsigned long long)row->id);
-        for (uint32_t j = 0; j < row->field_count; j++) {
-            const KdbField *f = &row->fields[j];
-            printf(", ");
-            escape_json_string(f->name ? f->name : "", stdout);
-            printf(": ");
-            print_field_json(f, stdout);
-        }
-        printf("}%s\n", i + 1 < rows->count ? "," : "");
+static void dump_csv_header(const DumpCtx *ctx) {
+    printf("id");
+    for (uint32_t j = 0; j < ctx->column_count; j++) {
+        putchar(',');
+        escape_csv(ctx->columns[j], stdout);
+    }
+    putchar('\n');
+}
+
+static void dump_csv_row(const DumpCtx *ctx, const KdbRow *row) {
+    printf("%llu", (unsigned long long)row->id);
+    for (uint32_t j = 0; j < ctx->column_count; j++) {
+        putchar(',');
+        
+        const KdbField *f = NULL;
+        if (j < row->field_count && row->fields[j].name &&
+            strcmp(row->fields[j].name, ctx->columns[j]) == 0)
+            f = &row->fields[j];
+        else
+            f = kdb_row_get(row, ctx->columns[j]);
+        if (f) print_field_csv(f, stdout);
+    }
+    putchar('\n');
+}
+
+static void dump_json_row(const DumpCtx *ctx, const KdbRow *row) {
+    const char *field_sep = ctx->compact ? ","  : ", ";
+    const char *key_sep   = ctx->compact ? ":"  : ": ";
+
+    if (ctx->emitted > 0) fputs(ctx->compact ? "," : ",\n", stdout);
+    printf(ctx->compact ? "{\"id\":%llu" : "  {\"id\": %llu", (unsigned long long)row->id);
+    for (uint32_t j = 0; j < row->field_count; j++) {
+        const KdbField *f = &row->fields[j];
+        fputs(field_sep, stdout);
+        escape_json_string(f->name ? f->name : "", stdout);
+        fputs(key_sep, stdout);
+        print_field_json(f, stdout);
+    }
+    putchar('}');
+}
+
+static int dump_row_cb(const KdbRow *row, void *user_data) {
+    DumpCtx *ctx = (DumpCtx *)user_data;
+    if (ctx->limit >= 0 && ctx->emitted >= (size_t)ctx->limit) return 0;
+
+    switch (ctx->fmt) {
+        case FMT_CSV:
+            if (ctx->emitted == 0) dump_csv_header(ctx);
+            dump_csv_row(ctx, row);
+            break;
+        case FMT_JSON:
+            dump_json_row(ctx, row);
+            break;
+        default:
+            kdb_row_print(row, stdout);
+            break;
     }
-    printf("]\n");
+    ctx->emitted++;
+    return ctx->limit < 0 || ctx->emitted < (size_t)ctx->limit;
 }
 
 int main(int argc, char **argv) {
@@ -110,12 +188,14 @@ int main(int argc, char **argv) {
 
     const char *dir   = argv[1];
     const char *table = argv[2];
-    OutputFmt   fmt   = FMT_PRETTY;
-    int64_t     limit = -1;
+    OutputFmt   fmt     = FMT_PRETTY;
+    int         compact = 0;
+    int64_t     limit   = -1;
 
     for (int i = 3; i < argc; i++) {
         if (strcmp(argv[i], "--csv")  == 0) fmt = FMT_CSV;
         else if (strcmp(argv[i], "--json") == 0) fmt = FMT_JSON;
+        else if (strcmp(argv[i], "--compact") == 0) compact = 1;
         else if (strcmp(argv[i], "--limit") == 0 && i + 1 < argc) {
             limit = atoll(argv[++i]);
         } else {
@@ -137,23 +217,48 @@ int main(int argc, char **argv) {
         return 1;
     }
 
-    KdbRows *rows = kdb_find(db, table, NULL);
-    if (!rows) {
-        fprintf(stderr, "Failed to read '%s': %s\n", table, kdb_last_error());
-        kdb_close(db);
-        return 1;
+    if (!isatty(STDOUT_FILENO))
+        setvbuf(stdout, NULL, _IOFBF, DUMP_OUTPUT_BUFFER);
+
+    if (fmt == FMT_PRETTY) {
+        int64_t total = kdb_count(db, table, NULL);
+        if (total < 0) {
+            fprintf(stderr, "Failed to read '%s': %s\n", table, kdb_last_error());
+            kdb_close(db);
+            return 1;
+        }
+        if (limit >= 0 && limit < total) total = limit;
+        if (total == 0) { printf("(empty)\n"); kdb_close(db); return 0; }
+        printf("%lld row(s)\n", (long long)total);
+    } else if (fmt == FMT_JSON) {
+        fputs(compact ? "[" : "[\n", stdout);
     }
 
-    if (limit >= 0 && (size_t)limit < rows->count)
-        rows->count = (size_t)limit;
+    DumpCtx   ctx = { .fmt = fmt, .compact = compact, .limit = limit, .emitted = 0, .column_count = 0 };
+    KdbStatus st  = KDB_OK;
 
-    switch (fmt) {
-        case FMT_CSV:    dump_csv   (rows); break;
-        case FMT_JSON:   dump_json  (rows); break;
-        default:         dump_pretty(rows); break;
+    
+    if (fmt == FMT_CSV && limit != 0) {
+        st = kdb_foreach(db, table, NULL, collect_columns_cb, &ctx);
+        if (st == KDB_OK && ctx.oom) {
+            fprintf(stderr, "Out of memory collecting the columns of '%s'.\n", table);
+            free(ctx.columns);
+            kdb_close(db);
+            return 1;
+        }
+    }
+    if (st == KDB_OK && limit != 0) st = kdb_foreach(db, table, NULL, dump_row_cb, &ctx);
+    free(ctx.columns);
+
+    if (fmt == FMT_JSON)
+        printf("%s]\n", (ctx.emitted > 0 && !compact) ? "\n" : "");
+
+    if (st != KDB_OK) {
+        fprintf(stderr, "Failed to read '%s': %s\n", table, kdb_last_error());
+        kdb_close(db);
+        return 1;
     }
 
-    kdb_rows_free(rows);
     kdb_close(db);
     return 0;
 }
\ No newline at end of file
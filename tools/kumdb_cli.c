@@ -2,6 +2,7 @@
 #include <stdlib.h>
 #include <string.h>
 #include <ctype.h>
+#include <unistd.h>
 
 #include "../include/kumdb.h"
 #include "../include/types.h"
@@ -231,7 +232,9 @@ static void cmd_compact(int argc, char **argv) {
 }
 
 int main(int argc, char **argv) {
-    print_banner();
+    
+    int interactive = isatty(STDIN_FILENO);
+    if (interactive) print_banner();
 
     if (argc >= 2) {
         char *open_argv[] = { "open", argv[1] };
@@ -242,8 +245,10 @@ int main(int argc, char **argv) {
     char *tokens[MAX_TOKENS];
 
     while (1) {
-        printf("kumdb> ");
-        fflush(stdout);
+        if (interactive) {
+            printf("kumdb> ");
+            fflush(stdout);
+        }
 
         if (!fgets(line, sizeof(line), stdin)) break;
 
@@ -272,6 +277,6 @@ int main(int argc, char **argv) {
     }
 
     if (db) kdb_close(db);
-    printf("Bye.\n");
+    if (interactive) printf("Bye.\n");
     return 0;
 }
\ No newline at end of file